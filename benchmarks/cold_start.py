@@ -0,0 +1,248 @@
+"""
+Cold-start and import-time benchmark for the Lambda handlers
+
+Runs each handler module in a fresh interpreter (benchmarks/handler_probe.py)
+and records the ``-X importtime`` breakdown, module init duration, first and
+warm invocation latency, client creation time and peak RSS. Each handler gets
+the environment ApiStack deploys it with; DynamoDB is replaced by
+local_aws.dynamodb.InMemoryTable and the Secrets Manager lookup is answered
+by the probe, so no network access is needed.
+
+Results are written as sorted, indented JSON so runs from different commits
+can be compared with a plain diff.
+
+Usage:
+    python benchmarks/cold_start.py [--runs 5] [--warm 50] [--dataset 500]
+                                    [--output cold_start.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Any, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBE = os.path.join(REPO_ROOT, 'benchmarks', 'handler_probe.py')
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+from handler_probe import IMPORT_END, IMPORT_START  # noqa: E402
+
+# Task handler environment as ApiStack deploys it. The secret is read through
+# CURSOR_SECRET_ARN as in production (the probe answers the Secrets Manager
+# call offline), TASK_QUEUE is on as in benchmarks/load_test.py, and
+# OFFLOAD_BUCKET is left out so large lists are never sent to S3
+TASK_HANDLER_ENV = {
+    'TASKS_TABLE': 'tasks-bench',
+    'META_TABLE': 'tasks-meta-bench',
+    'ENVIRONMENT': 'bench',
+    'CURSOR_SECRET_ARN': 'arn:aws:secretsmanager:us-east-1:000000000000:secret:cursor-bench',
+    'TASK_CACHE_SIZE': '512',
+    'TASK_CACHE_TTL_SECONDS': '5',
+    'CACHE_STATS_INTERVAL': '100',
+    'COMPRESSION_MIN_BYTES': '1024',
+    'BATCH_MAX_TASKS': '1000',
+    'BATCH_WRITE_CONCURRENCY': '4',
+    'BATCH_GET_MAX_IDS': '100',
+    'BATCH_GET_CONCURRENCY': '4',
+    'BATCH_UPDATE_MAX_TASKS': '100',
+    'BATCH_UPDATE_CONCURRENCY': '8',
+    'EXPORT_MAX_BYTES': str(4 * 1024 * 1024),
+    'EXPORT_PAGE_SIZE': '500',
+    'OFFLOAD_EXPIRY_DAYS': '1',
+    'OFFLOAD_URL_TTL_SECONDS': '900',
+    'LIST_OFFLOAD_BYTES': str(1024 * 1024),
+    'TASK_ID_FORMAT': 'uuid7',
+    'TASK_SHARDS': '4',
+    'LIST_FROM_CREATED_INDEX': 'false',
+    'STATUS_INDEX_SHARDED': 'false',
+    'TOMBSTONE_TTL_SECONDS': str(7 * 86400),
+    'SYNC_OVERLAP_SECONDS': '5',
+    'COUNTER_WRITE_ATTEMPTS': '3',
+    'STATS_SHARDS': '8',
+    'TRANSACT_MAX_ATTEMPTS': '4',
+    'RECENT_TASKS_SIZE': '100',
+    'SEARCH_PREFIX_LENGTH': '2',
+    'SEARCH_MAX_POSTINGS': '2000',
+    'TASK_QUEUE': 'true',
+    'CLAIM_LEASE_SECONDS': '300',
+    'CLAIM_MAX_LEASE_SECONDS': '3600',
+    'CLAIM_CANDIDATES': '10',
+    'CLAIM_SPREAD': '4'
+}
+
+# Handler module -> environment it is deployed with (see ApiStack)
+HANDLERS = {
+    'task_handler': {
+        'module': 'handlers.task_handler',
+        'env': TASK_HANDLER_ENV
+    },
+    'health_handler': {
+        'module': 'handlers.health_handler',
+        'env': {
+            'ENVIRONMENT': 'bench'
+        }
+    },
+}
+
+def child_env(extra: Dict[str, str]) -> Dict[str, str]:
+    """Minimal, offline environment for a probe process."""
+    env = {
+        'PATH': os.environ.get('PATH', ''),
+        'PYTHONPATH': os.pathsep.join([os.path.join(REPO_ROOT, 'src'), REPO_ROOT]),
+        'AWS_DEFAULT_REGION': 'us-east-1',
+        'AWS_ACCESS_KEY_ID': 'bench',
+        'AWS_SECRET_ACCESS_KEY': 'bench',
+        'AWS_EC2_METADATA_DISABLED': 'true',
+    }
+    env.update(extra)
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """
+    Extract the modules imported by the handler from ``-X importtime`` output.
+
+    Returns:
+        One entry per module with self/cumulative microseconds and nesting depth
+    """
+    modules = []
+    recording = False
+    for line in stderr.splitlines():
+        if line == IMPORT_START:
+            recording = True
+            continue
+        if line == IMPORT_END:
+            break
+        if not recording or not line.startswith('import time:') or 'imported package' in line:
+            continue
+
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        stripped = name.lstrip(' ')
+        modules.append({
+            'module': stripped,
+            'depth': (len(name) - len(stripped) - 1) // 2,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us)
+        })
+    return modules
+
+
+def run_probe(module: str, env: Dict[str, str], dataset: int, warm: int) -> Dict[str, Any]:
+    """Run one probe in a fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', PROBE, module, str(dataset), str(warm)],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Probe for {module} failed:\n{completed.stderr[-2000:]}")
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['imports'] = parse_importtime(completed.stderr)
+    return result
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        'median': round(statistics.median(values), 3),
+        'min': round(min(values), 3),
+        'max': round(max(values), 3)
+    }
+
+
+def aggregate(runs: List[Dict[str, Any]], top: int) -> Dict[str, Any]:
+    """Combine probe runs into medians and an import-time breakdown."""
+    summary: Dict[str, Any] = {
+        'init_ms': summarize([run['init_ms'] for run in runs]),
+        'first_invocation_ms': summarize([run['first_invocation_ms'] for run in runs]),
+        'peak_rss_kb': summarize([run['peak_rss_kb'] for run in runs]),
+        'warm_invocation_ms': {
+            route: {
+                stat: round(statistics.median(run['warm_invocation_ms'][route][stat] for run in runs), 3)
+                for stat in ('median', 'p95')
+            }
+            for route in runs[0]['warm_invocation_ms']
+        }
+    }
+    if runs[0]['client_init_ms'] is not None:
+        summary['client_init_ms'] = summarize([run['client_init_ms'] for run in runs])
+
+    per_module: Dict[str, Dict[str, Any]] = {}
+    for run in runs:
+        for entry in run['imports']:
+            stats = per_module.setdefault(entry['module'], {'depth': entry['depth'], 'self': [], 'cumulative': []})
+            stats['self'].append(entry['self_us'])
+            stats['cumulative'].append(entry['cumulative_us'])
+
+    breakdown = [
+        {
+            'module': name,
+            'depth': stats['depth'],
+            'self_us': int(statistics.median(stats['self'])),
+            'cumulative_us': int(statistics.median(stats['cumulative']))
+        }
+        for name, stats in per_module.items()
+    ]
+    breakdown.sort(key=lambda entry: (-entry['cumulative_us'], entry['module']))
+    summary['import_modules'] = len(breakdown)
+    summary['import_breakdown'] = breakdown[:top]
+    return summary
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes per handler')
+    parser.add_argument('--warm', type=int, default=50, help='warm invocations per route')
+    parser.add_argument('--dataset', type=int, default=500, help='tasks seeded into the stand-in')
+    parser.add_argument('--top', type=int, default=15, help='slowest imports to keep')
+    parser.add_argument('--handlers', nargs='+', choices=sorted(HANDLERS), default=sorted(HANDLERS))
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'runs': args.runs,
+            'warm': args.warm,
+            'dataset': args.dataset
+        },
+        'handlers': {}
+    }
+
+    for name in args.handlers:
+        spec = HANDLERS[name]
+        env = child_env(spec['env'])
+        runs = [run_probe(spec['module'], env, args.dataset, args.warm) for _ in range(args.runs)]
+        report['handlers'][name] = aggregate(runs, args.top)
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
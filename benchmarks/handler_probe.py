@@ -0,0 +1,130 @@
+"""
+Cold-start probe for a single Lambda handler module
+
+Run in a fresh interpreter by benchmarks/cold_start.py. Only ``sys`` and
+``time`` are imported before the handler so that the measured init time and
+the ``-X importtime`` breakdown belong to the handler alone. Prints one JSON
+document on stdout.
+
+Usage:
+    python -X importtime benchmarks/handler_probe.py <module> <dataset> <warm>
+"""
+
+import sys
+import time
+
+IMPORT_START = '@@probe-import-start'
+IMPORT_END = '@@probe-import-end'
+
+
+def _task_handler_scenario(module, dataset: int):
+    """Point the task handler at seeded in-memory tables and an offline secret."""
+    import functools
+    import os
+    from local_aws.dynamodb import InMemoryTransactions, meta_table, tasks_table
+    from utils import pagination
+
+    class OfflineSecrets:
+        """Secrets Manager stand-in answering the cursor secret lookup."""
+
+        def get_secret_value(self, SecretId):
+            return {'SecretString': 'bench-cursor-secret'}
+
+    # The secret is still loaded lazily on the first cursor, as deployed
+    pagination.cursor_secret_from_env = functools.partial(pagination.cursor_secret_from_env, client=OfflineSecrets())
+
+    table = tasks_table(os.environ['TASKS_TABLE'])
+    meta = meta_table(os.environ['META_TABLE'])
+    table.seed(
+        {
+            'id': f'task-{i:06d}',
+            'title': f'Task {i}',
+            'description': 'Benchmark task',
+            'status': ('pending', 'in_progress', 'completed')[i % 3],
+            'priority': ('low', 'medium', 'high')[i % 3],
+            'created_at': f'2024-01-01T00:00:{i % 60:02d}.{i:06d}+00:00',
+            'updated_at': f'2024-01-01T00:00:{i % 60:02d}.{i:06d}+00:00',
+            'version': 1
+        }
+        for i in range(dataset)
+    )
+    module.table = table
+    module.meta_table = meta
+    module.transact_write = InMemoryTransactions(table, meta).transact_write
+
+    first = ('GET /tasks', {'httpMethod': 'GET', 'pathParameters': None})
+    warm = [
+        first,
+        ('GET /tasks/{id}', {'httpMethod': 'GET', 'pathParameters': {'id': 'task-000000'}}),
+        ('POST /tasks', {'httpMethod': 'POST', 'body': '{"title": "Benchmark"}'}),
+    ]
+    return first, warm
+
+
+def _health_handler_scenario(module, dataset: int):
+    event = ('GET /health', {'httpMethod': 'GET'})
+    return event, [event]
+
+
+SCENARIOS = {
+    'handlers.task_handler': _task_handler_scenario,
+    'handlers.health_handler': _health_handler_scenario,
+}
+
+
+def main() -> None:
+    module_name, dataset, warm_runs = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+
+    sys.stderr.write(IMPORT_START + '\n')
+    sys.stderr.flush()
+    started = time.perf_counter()
+    __import__(module_name)
+    init_ms = (time.perf_counter() - started) * 1000
+    sys.stderr.write(IMPORT_END + '\n')
+    sys.stderr.flush()
+
+    import json
+    import resource
+    import statistics
+
+    module = sys.modules[module_name]
+    first, warm = SCENARIOS[module_name](module, dataset)
+
+    def invoke(event):
+        started = time.perf_counter()
+        response = module.lambda_handler(event, None)
+        elapsed = (time.perf_counter() - started) * 1000
+        if response['statusCode'] >= 500:
+            raise RuntimeError(f"Handler failed: {response}")
+        return elapsed
+
+    first_ms = invoke(first[1])
+
+    warm_ms = {}
+    for route, event in warm:
+        samples = sorted(invoke(event) for _ in range(warm_runs))
+        warm_ms[route] = {
+            'median': statistics.median(samples),
+            'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        }
+
+    # Creating the real client is deferred to the first DynamoDB call in
+    # production, so report it separately (no network is needed)
+    client_init_ms = None
+    if hasattr(module, 'table') and 'utils.dynamodb' in sys.modules:
+        dynamodb = sys.modules['utils.dynamodb']
+        started = time.perf_counter()
+        dynamodb.get_client()
+        client_init_ms = (time.perf_counter() - started) * 1000
+
+    print(json.dumps({
+        'init_ms': init_ms,
+        'first_invocation_ms': first_ms,
+        'warm_invocation_ms': warm_ms,
+        'client_init_ms': client_init_ms,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark for response JSON encoding
+
+Compares the previous approach (stdlib json.dumps with a Decimal fallback)
+against utils.response.to_json on a 1,000-task list shaped like a DynamoDB
+scan result.
+
+Usage:
+    python benchmarks/json_encoding.py [--tasks 1000] [--repeat 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from utils import response  # noqa: E402
+
+
+def build_tasks(count: int) -> list:
+    """Build tasks with the attribute types DynamoDB returns."""
+    return [
+        {
+            'id': f'00000000-0000-4000-8000-{i:012d}',
+            'title': f'Task {i}',
+            'description': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 3,
+            'status': ('pending', 'in_progress', 'completed')[i % 3],
+            'priority': ('low', 'medium', 'high')[i % 3],
+            'created_at': '2024-01-01T00:00:00.000000+00:00',
+            'updated_at': '2024-01-02T00:00:00.000000+00:00',
+            'version': Decimal(i % 7 + 1),
+            'estimate_hours': Decimal('2.5'),
+        }
+        for i in range(count)
+    ]
+
+
+def stdlib_baseline(body: dict) -> str:
+    """Encoding as the handlers did before to_json existed."""
+    return json.dumps(body, default=lambda obj: float(obj) if isinstance(obj, Decimal) else str(obj))
+
+
+def time_encoder(encode, body: dict, repeat: int) -> float:
+    """Best-of-three milliseconds per call."""
+    seconds = min(timeit.repeat(lambda: encode(body), number=repeat, repeat=3))
+    return seconds / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    body = {'tasks': build_tasks(args.tasks), 'count': args.tasks}
+    orjson = response.orjson
+
+    results = {'json.dumps (baseline)': time_encoder(stdlib_baseline, body, args.repeat)}
+    if orjson is not None:
+        results['to_json (orjson)'] = time_encoder(response.to_json, body, args.repeat)
+    try:
+        response.orjson = None
+        results['to_json (stdlib)'] = time_encoder(response.to_json, body, args.repeat)
+    finally:
+        response.orjson = orjson
+
+    baseline = results['json.dumps (baseline)']
+    print(f"Encoding {args.tasks} tasks ({len(stdlib_baseline(body))} bytes)")
+    for name, ms in results.items():
+        print(f"  {name:<24} {ms:8.3f} ms/op  {baseline / ms:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
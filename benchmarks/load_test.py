@@ -0,0 +1,328 @@
+"""
+Synthetic load generator for the task handler
+
+Builds API Gateway proxy events for the /tasks routes in a configurable mix
+and drives them through task_handler.lambda_handler from a thread pool, with
+DynamoDB replaced by local_aws.dynamodb stand-ins for the tasks and meta
+tables. Counted writes go through InMemoryTransactions as they would through
+TransactWriteItems, so creates, status changes and deletes pay for their
+counter updates. TASK_QUEUE is on, so writes maintain QueueIndex and workers
+can claim seeded pending tasks. Latency and throttling can be injected into the stand-ins
+to mimic remote tables.
+
+Reports throughput plus p50/p95/p99 latency, status codes and DynamoDB calls
+per request for every route, as sorted, indented JSON.
+
+Usage:
+    python benchmarks/load_test.py [--requests 2000] [--concurrency 8]
+                                   [--dataset 1000] [--latency-ms 0]
+                                   [--mix get=40,list=25,create=15,update=10,delete=5,claim=5]
+                                   [--output load_test.json]
+"""
+
+import argparse
+import base64
+import contextlib
+import gzip
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+os.environ.setdefault('TASKS_TABLE', 'tasks-load')
+os.environ.setdefault('META_TABLE', 'tasks-meta-load')
+os.environ.setdefault('CURSOR_SECRET', 'load-cursor-secret')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from cold_start import git_commit  # noqa: E402
+from local_aws.dynamodb import InMemoryTransactions, meta_table, tasks_table  # noqa: E402
+
+# Operation -> route label used in the report
+ROUTES = {
+    'get': 'GET /tasks/{id}',
+    'get_many': 'GET /tasks?ids=',
+    'list': 'GET /tasks',
+    'create': 'POST /tasks',
+    'batch': 'POST /tasks/batch',
+    'update': 'PUT /tasks/{id}',
+    'delete': 'DELETE /tasks/{id}',
+    'stats': 'GET /tasks/stats',
+    'claim': 'POST /tasks/claim',
+}
+DEFAULT_MIX = 'get=40,list=25,create=15,update=10,delete=5,claim=5'
+STATUSES = ('pending', 'in_progress', 'completed')
+PRIORITIES = ('low', 'medium', 'high')
+# Tasks per POST /tasks/batch and GET /tasks?ids= request
+BATCH_SIZE = 25
+
+
+class CallRecorder:
+    """
+    Table proxy counting DynamoDB calls made by the current thread.
+
+    Each worker runs one request at a time, so the thread-local count is the
+    number of calls made by that request. Recorders created with ``shared``
+    add to that recorder's count.
+    """
+
+    def __init__(self, table: Any, shared: Optional['CallRecorder'] = None) -> None:
+        self._table = table
+        self._local = shared._local if shared is not None else threading.local()
+
+    def reset(self) -> None:
+        self._local.count = 0
+
+    @property
+    def count(self) -> int:
+        return getattr(self._local, 'count', 0)
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._table, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            self._local.count = self.count + 1
+            return attribute(*args, **kwargs)
+        return call
+
+
+class TaskIds:
+    """Thread-safe pool of existing task ids for get/update/delete events."""
+
+    def __init__(self, ids: List[str], rng: random.Random) -> None:
+        self._ids = list(ids)
+        self._rng = rng
+        self._lock = threading.Lock()
+
+    def add(self, task_id: str) -> None:
+        with self._lock:
+            self._ids.append(task_id)
+
+    def pick(self) -> str:
+        with self._lock:
+            return self._rng.choice(self._ids) if self._ids else 'missing'
+
+    def take(self) -> str:
+        with self._lock:
+            if not self._ids:
+                return 'missing'
+            index = self._rng.randrange(len(self._ids))
+            self._ids[index], self._ids[-1] = self._ids[-1], self._ids[index]
+            return self._ids.pop()
+
+
+def parse_mix(value: str) -> List[Tuple[str, float]]:
+    """Parse ``op=weight,...`` into (operation, weight) pairs."""
+    mix = []
+    for part in value.split(','):
+        operation, _, weight = part.partition('=')
+        operation = operation.strip()
+        if operation not in ROUTES:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{operation}' (choose from {', '.join(ROUTES)})")
+        try:
+            mix.append((operation, float(weight)))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid weight for '{operation}': {weight!r}")
+    if not any(weight > 0 for _, weight in mix):
+        raise argparse.ArgumentTypeError('At least one operation needs a positive weight')
+    return mix
+
+
+def seed_tasks(count: int) -> List[Dict[str, Any]]:
+    """Tasks shaped like the ones create_task writes, already counted and queued."""
+    from utils.queue import queue_attributes
+
+    tasks = [
+        {
+            'id': f'task-{i:06d}',
+            'title': f'Task {i}',
+            'description': 'Load test task',
+            'status': STATUSES[i % 3],
+            'priority': PRIORITIES[i % 3],
+            'created_at': f'2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}.{i:06d}+00:00',
+            'updated_at': f'2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}.{i:06d}+00:00',
+            'version': 1,
+            'counted': True
+        }
+        for i in range(count)
+    ]
+    return [dict(task, **queue_attributes(task)) for task in tasks]
+
+
+def new_task(rng: random.Random) -> Dict[str, Any]:
+    return {
+        'title': f'Load task {rng.randrange(10 ** 6)}',
+        'description': 'Created by the load generator',
+        'status': rng.choice(STATUSES),
+        'priority': rng.choice(PRIORITIES)
+    }
+
+
+def build_event(operation: str, ids: TaskIds, rng: random.Random) -> Dict[str, Any]:
+    """Build an API Gateway proxy event for one operation."""
+    headers = {'Accept-Encoding': 'gzip, br'}
+    if operation == 'get':
+        return {'httpMethod': 'GET', 'headers': headers, 'pathParameters': {'id': ids.pick()}}
+    if operation == 'get_many':
+        ids_param = ','.join(ids.pick() for _ in range(BATCH_SIZE))
+        return {'httpMethod': 'GET', 'headers': headers, 'pathParameters': None, 'queryStringParameters': {'ids': ids_param}}
+    if operation == 'list':
+        params = {'limit': str(rng.choice((10, 25, 50)))}
+        if rng.random() < 0.5:
+            params['status'] = rng.choice(STATUSES)
+        return {'httpMethod': 'GET', 'headers': headers, 'pathParameters': None, 'queryStringParameters': params}
+    if operation == 'create':
+        return {'httpMethod': 'POST', 'headers': headers, 'body': json.dumps(new_task(rng))}
+    if operation == 'batch':
+        body = {'tasks': [new_task(rng) for _ in range(BATCH_SIZE)]}
+        return {'httpMethod': 'POST', 'resource': '/tasks/batch', 'headers': headers, 'body': json.dumps(body)}
+    if operation == 'update':
+        body = {'status': rng.choice(STATUSES)}
+        return {'httpMethod': 'PUT', 'headers': headers, 'pathParameters': {'id': ids.pick()}, 'body': json.dumps(body)}
+    if operation == 'claim':
+        body = {'worker': f'worker-{rng.randrange(16)}', 'lease_seconds': 60}
+        return {'httpMethod': 'POST', 'resource': '/tasks/claim', 'headers': headers, 'body': json.dumps(body)}
+    if operation == 'stats':
+        return {'httpMethod': 'GET', 'resource': '/tasks/stats', 'headers': headers, 'pathParameters': None}
+    return {'httpMethod': 'DELETE', 'headers': headers, 'pathParameters': {'id': ids.take()}}
+
+
+def response_json(response: Dict[str, Any]) -> Any:
+    """Decode a (possibly compressed) handler response body."""
+    body = response['body']
+    if response.get('isBase64Encoded'):
+        raw = base64.b64decode(body)
+        encoding = response['headers'].get('Content-Encoding')
+        if encoding == 'gzip':
+            raw = gzip.decompress(raw)
+        elif encoding == 'br':
+            import brotli
+            raw = brotli.decompress(raw)
+        body = raw.decode('utf-8')
+    return json.loads(body)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    return samples[max(0, math.ceil(fraction * len(samples)) - 1)]
+
+
+def summarize_route(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(result['ms'] for result in results)
+    return {
+        'requests': len(results),
+        'throughput_rps': round(len(results) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'max': round(latencies[-1], 3)
+        },
+        'dynamodb_calls_per_request': round(sum(result['calls'] for result in results) / len(results), 3),
+        'status_codes': dict(sorted(Counter(str(result['status']) for result in results).items()))
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # Set here rather than at import: pytest collects this module (it matches
+    # *_test.py) and the flag would leak into the test run
+    os.environ.setdefault('TASK_QUEUE', 'true')
+    from handlers import task_handler
+    from utils.stats import add_to_counters, counter_deltas, merge_deltas
+
+    rng = random.Random(args.seed)
+    options = {'latency_ms': args.latency_ms, 'throttle_rate': args.throttle_rate, 'seed': args.seed}
+    table = tasks_table(os.environ['TASKS_TABLE'], **options)
+    meta = meta_table(os.environ['META_TABLE'], **options)
+    seeded = seed_tasks(args.dataset)
+    table.seed(seeded)
+    add_to_counters(meta, merge_deltas(counter_deltas(None, task['status']) for task in seeded), shard=0)
+    recorder = CallRecorder(table)
+    task_handler.table = recorder
+    task_handler.meta_table = CallRecorder(meta, shared=recorder)
+    task_handler.transact_write = CallRecorder(InMemoryTransactions(table, meta), shared=recorder).transact_write
+    task_handler.task_cache.clear()
+
+    ids = TaskIds([task['id'] for task in seeded], rng)
+    operations, weights = zip(*args.mix)
+    # Events are built up front so that event construction is not timed
+    plan = [(operation, build_event(operation, ids, rng)) for operation in rng.choices(operations, weights, k=args.requests)]
+
+    def invoke(item: Tuple[str, Dict[str, Any]]) -> Dict[str, Any]:
+        operation, event = item
+        recorder.reset()
+        started = time.perf_counter()
+        response = task_handler.lambda_handler(event, None)
+        elapsed = (time.perf_counter() - started) * 1000
+        if operation == 'create' and response['statusCode'] == 201:
+            ids.add(response_json(response)['task']['id'])
+        elif operation == 'batch' and response['statusCode'] in (201, 207):
+            for result in response_json(response)['results']:
+                if result['status'] == 201:
+                    ids.add(result['task']['id'])
+        return {'operation': operation, 'ms': elapsed, 'status': response['statusCode'], 'calls': recorder.count}
+
+    # Handlers log with print(); keep that out of the JSON report
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(invoke, plan))
+    elapsed = time.perf_counter() - started
+
+    by_route: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        by_route.setdefault(ROUTES[result['operation']], []).append(result)
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'dataset': args.dataset,
+            'mix': dict(args.mix),
+            'latency_ms': args.latency_ms,
+            'throttle_rate': args.throttle_rate,
+            'seed': args.seed
+        },
+        'total': summarize_route(results, elapsed),
+        'routes': {route: summarize_route(route_results, elapsed) for route, route_results in by_route.items()}
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000, help='total requests to send')
+    parser.add_argument('--concurrency', type=int, default=8, help='worker threads')
+    parser.add_argument('--dataset', type=int, default=1000, help='tasks seeded into the stand-in')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f'operation weights (default {DEFAULT_MIX})')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='latency added to each DynamoDB call')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of DynamoDB calls throttled')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for the request mix')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args()
+
+    output = json.dumps(run(args), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
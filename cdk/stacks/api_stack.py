@@ -12,9 +12,13 @@ from aws_cdk import (
     CfnOutput,
     aws_apigateway as apigateway,
     aws_lambda as lambda_,
+    aws_lambda_event_sources as lambda_event_sources,
     aws_dynamodb as dynamodb,
     aws_iam as iam,
     aws_logs as logs,
+    aws_s3 as s3,
+    aws_secretsmanager as secretsmanager,
+    aws_sqs as sqs,
 )
 from constructs import Construct
 
@@ -35,6 +39,7 @@ class ApiStack(Stack):
         
         # Create infrastructure components
         self._create_database()
+        self._create_offload_bucket()
         self._create_lambda_functions()
         self._create_api_gateway()
         self._create_iam_roles()
@@ -55,7 +60,9 @@ class ApiStack(Stack):
             point_in_time_recovery_specification=dynamodb.PointInTimeRecoverySpecification(
                 point_in_time_recovery_enabled=True
             ),
-            time_to_live_attribute="ttl"
+            time_to_live_attribute="ttl",
+            # Consumed by the stream handler to maintain derived views
+            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES
         )
 
         # Add GSI for status queries
@@ -72,16 +79,151 @@ class ApiStack(Stack):
             projection_type=dynamodb.ProjectionType.ALL
         )
 
+        # Add GSI for priority queries
+        self.tasks_table.add_global_secondary_index(
+            index_name="PriorityIndex",
+            partition_key=dynamodb.Attribute(
+                name="priority",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="created_at",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.ALL
+        )
+
+        # Add GSI for newest-first listing. Every task is written to one of
+        # TASK_SHARDS partitions, so writes spread out and a listing merges a
+        # few sorted Query streams
+        self.tasks_table.add_global_secondary_index(
+            index_name="CreatedIndex",
+            partition_key=dynamodb.Attribute(
+                name="shard",
+                type=dynamodb.AttributeType.NUMBER
+            ),
+            sort_key=dynamodb.Attribute(
+                name="created_at",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.ALL
+        )
+
+        # Add GSI for status queries without a hot partition per status:
+        # status_shard is "<status>#<shard>", and reads merge all shards
+        self.tasks_table.add_global_secondary_index(
+            index_name="StatusShardIndex",
+            partition_key=dynamodb.Attribute(
+                name="status_shard",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="created_at",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.ALL
+        )
+
+        # Add GSI for delta sync: changes (tombstones included) in
+        # updated_at order, sharded like CreatedIndex
+        self.tasks_table.add_global_secondary_index(
+            index_name="UpdatedIndex",
+            partition_key=dynamodb.Attribute(
+                name="shard",
+                type=dynamodb.AttributeType.NUMBER
+            ),
+            sort_key=dynamodb.Attribute(
+                name="updated_at",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.ALL
+        )
+
+        # Add GSI for the work queue (sparse): pending tasks partitioned by
+        # "pending#<shard>" in priority-then-age order, claimed tasks by
+        # "leased#<shard>" in lease expiry order
+        self.tasks_table.add_global_secondary_index(
+            index_name="QueueIndex",
+            partition_key=dynamodb.Attribute(
+                name="queue_shard",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="queue_key",
+                type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.ALL
+        )
+
+        # Derived data kept next to the tasks (per-status counters); items
+        # are addressed by a generic pk/sk pair
+        self.meta_table = dynamodb.Table(
+            self, "TasksMetaTable",
+            table_name=f"tasks-meta-{self.env_name}",
+            partition_key=dynamodb.Attribute(
+                name="pk",
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="sk",
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY if self.env_name == "dev" else RemovalPolicy.RETAIN,
+            point_in_time_recovery_specification=dynamodb.PointInTimeRecoverySpecification(
+                point_in_time_recovery_enabled=True
+            )
+        )
+
+    def _create_offload_bucket(self):
+        """Create the bucket holding oversized API responses."""
+        
+        # Objects are content addressed and only served through short-lived
+        # presigned URLs, so they can expire quickly
+        self.offload_bucket = s3.Bucket(
+            self, "ResponseOffloadBucket",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            enforce_ssl=True,
+            removal_policy=RemovalPolicy.DESTROY if self.env_name == "dev" else RemovalPolicy.RETAIN,
+            auto_delete_objects=self.env_name == "dev",
+            lifecycle_rules=[
+                s3.LifecycleRule(
+                    id="ExpireOffloadedResponses",
+                    prefix="responses/",
+                    expiration=Duration.days(1),
+                    abort_incomplete_multipart_upload_after=Duration.days(1)
+                )
+            ],
+            # Browsers download offloaded responses directly from S3
+            cors=[
+                s3.CorsRule(
+                    allowed_methods=[s3.HttpMethods.GET],
+                    allowed_origins=["*"],
+                    allowed_headers=["*"],
+                    max_age=300
+                )
+            ]
+        )
+
     def _create_lambda_functions(self):
         """Create Lambda functions for API handlers."""
         
-        # Shared Lambda layer for common utilities
-        self.shared_layer = lambda_.LayerVersion(
-            self, "SharedLayer",
-            layer_version_name=f"task-api-shared-{self.env_name}",
-            code=lambda_.Code.from_asset("../src/utils"),
-            compatible_runtimes=[lambda_.Runtime.PYTHON_3_9],
-            description="Shared utilities for task API Lambda functions"
+        # Handlers and shared utilities are packaged together from src/ so
+        # that handlers can import ``utils.*`` directly
+        handler_code = lambda_.Code.from_asset(
+            "../src",
+            exclude=["requirements.txt", "**/__pycache__"]
+        )
+
+        # Signing key for opaque pagination cursors
+        self.cursor_secret = secretsmanager.Secret(
+            self, "CursorSigningSecret",
+            description="Signs pagination cursors returned by the task API",
+            generate_secret_string=secretsmanager.SecretStringGenerator(
+                exclude_punctuation=True,
+                password_length=48
+            )
         )
 
         # Task handler Lambda
@@ -89,26 +231,104 @@ class ApiStack(Stack):
             self, "TaskHandler",
             function_name=f"task-handler-{self.env_name}",
             runtime=lambda_.Runtime.PYTHON_3_9,
-            handler="task_handler.lambda_handler",
-            code=lambda_.Code.from_asset("../src/handlers"),
-            layers=[self.shared_layer],
+            handler="handlers.task_handler.lambda_handler",
+            code=handler_code,
             timeout=Duration.seconds(30),
             memory_size=256,
             environment={
                 "TASKS_TABLE": self.tasks_table.table_name,
-                "ENVIRONMENT": self.env_name
+                "META_TABLE": self.meta_table.table_name,
+                "ENVIRONMENT": self.env_name,
+                "CURSOR_SECRET_ARN": self.cursor_secret.secret_arn,
+                "TASK_CACHE_SIZE": "512",
+                "TASK_CACHE_TTL_SECONDS": "5",
+                "CACHE_STATS_INTERVAL": "100",
+                "COMPRESSION_MIN_BYTES": "1024",
+                "BATCH_MAX_TASKS": "1000",
+                "BATCH_WRITE_CONCURRENCY": "4",
+                "BATCH_GET_MAX_IDS": "100",
+                "BATCH_GET_CONCURRENCY": "4",
+                "BATCH_UPDATE_MAX_TASKS": "100",
+                "BATCH_UPDATE_CONCURRENCY": "8",
+                "EXPORT_MAX_BYTES": str(4 * 1024 * 1024),
+                "EXPORT_PAGE_SIZE": "500",
+                "OFFLOAD_BUCKET": self.offload_bucket.bucket_name,
+                "OFFLOAD_EXPIRY_DAYS": "1",
+                "OFFLOAD_URL_TTL_SECONDS": "900",
+                "LIST_OFFLOAD_BYTES": str(1024 * 1024),
+                "TASK_ID_FORMAT": "uuid7",
+                "TASK_SHARDS": "4",
+                # Off until scripts/backfill_shards.py has run against the
+                # table; deploy with --context list_from_created_index=true
+                "LIST_FROM_CREATED_INDEX": self._context_flag("list_from_created_index"),
+                # Off until the backfill has given older tasks status_shard;
+                # deploy with --context status_index_sharded=true
+                "STATUS_INDEX_SHARDED": self._context_flag("status_index_sharded"),
+                "TOMBSTONE_TTL_SECONDS": str(7 * 86400),
+                "SYNC_OVERLAP_SECONDS": "5",
+                "COUNTER_WRITE_ATTEMPTS": "3",
+                "STATS_SHARDS": "8",
+                "TRANSACT_MAX_ATTEMPTS": "4",
+                "RECENT_TASKS_SIZE": "100",
+                "SEARCH_PREFIX_LENGTH": "2",
+                "SEARCH_MAX_POSTINGS": "2000",
+                # Off until the backfill has put pending tasks in QueueIndex;
+                # deploy with --context task_queue=true
+                "TASK_QUEUE": self._context_flag("task_queue"),
+                "CLAIM_LEASE_SECONDS": "300",
+                "CLAIM_MAX_LEASE_SECONDS": "3600",
+                "CLAIM_CANDIDATES": "10",
+                "CLAIM_SPREAD": "4"
+            },
+            log_retention=logs.RetentionDays.ONE_WEEK
+        )
+
+        # Stream processor maintaining the recent tasks snapshot and the
+        # search postings
+        self.stream_handler = lambda_.Function(
+            self, "StreamHandler",
+            function_name=f"stream-handler-{self.env_name}",
+            runtime=lambda_.Runtime.PYTHON_3_9,
+            handler="handlers.stream_handler.lambda_handler",
+            code=handler_code,
+            timeout=Duration.seconds(30),
+            memory_size=256,
+            environment={
+                "META_TABLE": self.meta_table.table_name,
+                "ENVIRONMENT": self.env_name,
+                "RECENT_TASKS_SIZE": "100",
+                "SNAPSHOT_WRITE_ATTEMPTS": "5",
+                "SEARCH_PREFIX_LENGTH": "2",
+                "POSTINGS_WRITE_CONCURRENCY": "4"
             },
             log_retention=logs.RetentionDays.ONE_WEEK
         )
 
+        # Batches that keep failing are split to isolate the bad record, and
+        # records still failing after the retries are sent to a queue
+        self.stream_dlq = sqs.Queue(
+            self, "StreamHandlerDLQ",
+            queue_name=f"stream-handler-dlq-{self.env_name}",
+            retention_period=Duration.days(14)
+        )
+        self.stream_handler.add_event_source(lambda_event_sources.DynamoEventSource(
+            self.tasks_table,
+            starting_position=lambda_.StartingPosition.TRIM_HORIZON,
+            batch_size=100,
+            max_batching_window=Duration.seconds(1),
+            bisect_batch_on_error=True,
+            retry_attempts=5,
+            report_batch_item_failures=True,
+            on_failure=lambda_event_sources.SqsDlq(self.stream_dlq)
+        ))
+
         # Health check Lambda
         self.health_handler = lambda_.Function(
             self, "HealthHandler",
             function_name=f"health-handler-{self.env_name}",
             runtime=lambda_.Runtime.PYTHON_3_9,
-            handler="health_handler.lambda_handler",
-            code=lambda_.Code.from_asset("../src/handlers"),
-            layers=[self.shared_layer],
+            handler="handlers.health_handler.lambda_handler",
+            code=handler_code,
             timeout=Duration.seconds(10),
             memory_size=128,
             environment={
@@ -125,6 +345,10 @@ class ApiStack(Stack):
             self, "TaskAPI",
             rest_api_name=f"task-management-api-{self.env_name}",
             description="Serverless Task Management API",
+            # Lets handlers return gzip/brotli bodies as base64 with
+            # isBase64Encoded; request bodies arrive base64 encoded too.
+            # Preflight mocks are switched back to text further down
+            binary_media_types=["*/*"],
             default_cors_preflight_options=apigateway.CorsOptions(
                 allow_origins=apigateway.Cors.ALL_ORIGINS,
                 allow_methods=apigateway.Cors.ALL_METHODS,
@@ -183,6 +407,30 @@ class ApiStack(Stack):
         # GET /tasks - List tasks
         tasks_resource.add_method("GET", task_integration)
 
+        # GET /tasks/export - NDJSON export in bounded chunks
+        export_resource = tasks_resource.add_resource("export")
+        export_resource.add_method("GET", task_integration)
+
+        # GET /tasks/stats - Task counts per status
+        stats_resource = tasks_resource.add_resource("stats")
+        stats_resource.add_method("GET", task_integration)
+
+        # POST /tasks/claim - Take the next task of the work queue
+        claim_resource = tasks_resource.add_resource("claim")
+        claim_resource.add_method("POST", task_integration)
+
+        # GET /tasks/search - Keyword search
+        search_resource = tasks_resource.add_resource("search")
+        search_resource.add_method("GET", task_integration)
+
+        # POST /tasks/batch - Create many tasks
+        batch_resource = tasks_resource.add_resource("batch")
+        batch_resource.add_method("POST", task_integration)
+
+        # POST /tasks/batch-update - Update many tasks
+        batch_update_resource = tasks_resource.add_resource("batch-update")
+        batch_update_resource.add_method("POST", task_integration)
+
         # Individual task resource
         task_resource = tasks_resource.add_resource("{id}")
         
@@ -211,15 +459,47 @@ class ApiStack(Stack):
         health_resource = self.api.root.add_resource("health")
         health_resource.add_method("GET", health_integration)
 
+        self._convert_preflight_requests_to_text()
+
+    def _convert_preflight_requests_to_text(self):
+        """
+        Keep CORS preflights working with binary media types.
+
+        With "*/*" every payload counts as binary, including the OPTIONS
+        requests answered by the preflight mock integrations, whose request
+        template then never applies and the preflight fails.
+        CONVERT_TO_TEXT lets the template map them again.
+        """
+        for construct in self.api.node.find_all():
+            if isinstance(construct, apigateway.Method) and construct.http_method == "OPTIONS":
+                construct.node.default_child.add_property_override(
+                    "Integration.ContentHandling", "CONVERT_TO_TEXT"
+                )
+
     def _create_iam_roles(self):
         """Create IAM roles and policies for Lambda functions."""
         
         # Grant DynamoDB permissions to task handler
         self.tasks_table.grant_read_write_data(self.task_handler)
+        self.meta_table.grant_read_write_data(self.task_handler)
+        
+        # The event source grants the stream reads; the snapshot lives in the meta table
+        self.meta_table.grant_read_write_data(self.stream_handler)
+        
+        # Offloaded responses are written, checked for reuse and presigned
+        self.offload_bucket.grant_read_write(self.task_handler)
+        
+        # The cursor signing key is read at cold start
+        self.cursor_secret.grant_read(self.task_handler)
         
         # Grant read permissions to health handler (if needed)
         # self.tasks_table.grant_read_data(self.health_handler)
 
+    def _context_flag(self, key: str) -> str:
+        """Handler feature flag from CDK context (``--context key=true``), off by default."""
+        value = self.node.try_get_context(key)
+        return "true" if str(value).lower() == "true" else "false"
+
     def _create_outputs(self):
         """Create CloudFormation outputs for important resources."""
         
@@ -237,6 +517,20 @@ class ApiStack(Stack):
             export_name=f"{self.stack_name}-TasksTable"
         )
 
+        CfnOutput(
+            self, "TasksMetaTableName",
+            value=self.meta_table.table_name,
+            description="DynamoDB table for task counters",
+            export_name=f"{self.stack_name}-TasksMetaTable"
+        )
+
+        CfnOutput(
+            self, "ResponseOffloadBucketName",
+            value=self.offload_bucket.bucket_name,
+            description="S3 bucket for oversized API responses",
+            export_name=f"{self.stack_name}-ResponseOffloadBucket"
+        )
+
         CfnOutput(
             self, "TaskHandlerFunction",
             value=self.task_handler.function_name,
@@ -244,6 +538,13 @@ class ApiStack(Stack):
             export_name=f"{self.stack_name}-TaskHandler"
         )
 
+        CfnOutput(
+            self, "StreamHandlerFunction",
+            value=self.stream_handler.function_name,
+            description="Lambda function processing the tasks table stream",
+            export_name=f"{self.stack_name}-StreamHandler"
+        )
+
         CfnOutput(
             self, "HealthHandlerFunction",
             value=self.health_handler.function_name,
@@ -38,7 +38,15 @@ const TaskList: React.FC = () => {
   const [priorityFilter, setPriorityFilter] = useState<string>('all');
   const [searchTerm, setSearchTerm] = useState<string>('');
 
-  const { data: tasks = [], isLoading, error, refetch } = useTasks();
+  const {
+    data: tasks = [],
+    isLoading,
+    error,
+    refetch,
+    hasNextPage,
+    fetchNextPage,
+    isFetchingNextPage,
+  } = useTasks();
   const createTaskMutation = useCreateTask();
 
   const filteredTasks = tasks.filter((task: Task) => {
@@ -419,6 +427,18 @@ const TaskList: React.FC = () => {
             ))}
           </Box>
         )}
+
+        {hasNextPage && (
+          <Box display="flex" justifyContent="center" mt={3}>
+            <Button
+              variant="outlined"
+              onClick={() => fetchNextPage()}
+              disabled={isFetchingNextPage}
+            >
+              {isFetchingNextPage ? 'Loading...' : 'Load more tasks'}
+            </Button>
+          </Box>
+        )}
       </Box>
 
       {/* Create Task Dialog */}
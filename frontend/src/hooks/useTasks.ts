@@ -1,23 +1,110 @@
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
-import { apiService, Task, CreateTaskRequest, UpdateTaskRequest } from '../services/api';
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient, InfiniteData, QueryClient } from '@tanstack/react-query';
+import { isAxiosError } from 'axios';
+import { apiService, Task, TaskChangesResponse, TasksResponse, CreateTaskRequest, UpdateTaskRequest } from '../services/api';
 
 // Query keys
 export const taskKeys = {
   all: ['tasks'] as const,
   lists: () => [...taskKeys.all, 'list'] as const,
   list: (filters: string) => [...taskKeys.lists(), { filters }] as const,
+  changes: () => [...taskKeys.all, 'changes'] as const,
+  syncToken: () => [...taskKeys.all, 'sync-token'] as const,
   details: () => [...taskKeys.all, 'detail'] as const,
   detail: (id: string) => [...taskKeys.details(), id] as const,
 };
 
-// Hook for fetching all tasks
+// Number of tasks fetched per page
+const TASKS_PAGE_SIZE = 50;
+
+// How often the loaded list is brought up to date with GET /tasks?since=
+const TASKS_SYNC_INTERVAL = 30 * 1000;
+
+type TaskPages = InfiniteData<TasksResponse, string | undefined>;
+
+// Apply one batch of changes to the loaded pages: update tasks in place,
+// drop deleted ones and put tasks that are not loaded yet at the top
+const applyChanges = (data: TaskPages, changes: TaskChangesResponse): TaskPages => {
+  const changed = new Map(changes.tasks.map((task) => [task.id, task]));
+  const deleted = new Set(changes.deleted.map((entry) => entry.id));
+
+  const pages = data.pages.map((page) => ({
+    ...page,
+    tasks: page.tasks
+      .filter((task) => !deleted.has(task.id))
+      .map((task) => {
+        const update = changed.get(task.id);
+        changed.delete(task.id);
+        return update ?? task;
+      }),
+  }));
+
+  const added = Array.from(changed.values()).sort((a, b) => b.created_at.localeCompare(a.created_at));
+  if (added.length > 0 && pages.length > 0) {
+    pages[0] = { ...pages[0], tasks: [...added, ...pages[0].tasks] };
+  }
+  return { ...data, pages };
+};
+
+// Fetch everything changed since the stored checkpoint and merge it into the list
+const syncTaskList = async (queryClient: QueryClient): Promise<string | null> => {
+  let token = queryClient.getQueryData<string>(taskKeys.syncToken());
+  if (!token) {
+    return null;
+  }
+
+  try {
+    let changes: TaskChangesResponse;
+    do {
+      changes = await apiService.syncTasks(token);
+      const batch = changes;
+      queryClient.setQueryData<TaskPages>(taskKeys.lists(), (data) => (data ? applyChanges(data, batch) : data));
+      token = changes.next_token;
+    } while (changes.has_more);
+  } catch (error) {
+    if (isAxiosError(error) && error.response?.status === 410) {
+      // Checkpoint older than the server keeps deletes for: reload the list
+      queryClient.removeQueries({ queryKey: taskKeys.syncToken() });
+      await queryClient.invalidateQueries({ queryKey: taskKeys.lists() });
+      return null;
+    }
+    throw error;
+  }
+
+  queryClient.setQueryData(taskKeys.syncToken(), token);
+  return token;
+};
+
+// Hook for fetching tasks page by page; `data` is the flattened list loaded so far.
+// The loaded pages are kept current with delta syncs instead of being refetched.
 export const useTasks = () => {
-  return useQuery({
+  const queryClient = useQueryClient();
+
+  const tasks = useInfiniteQuery({
     queryKey: taskKeys.lists(),
-    queryFn: () => apiService.listTasks(),
-    staleTime: 5 * 60 * 1000, // 5 minutes
+    queryFn: async ({ pageParam }) => {
+      if (pageParam === undefined) {
+        // Take the checkpoint before reading, so changes made while the
+        // list loads are picked up by the next sync
+        const checkpoint = await apiService.syncTasks('');
+        queryClient.setQueryData(taskKeys.syncToken(), checkpoint.next_token);
+      }
+      return apiService.listTasks({ limit: TASKS_PAGE_SIZE, cursor: pageParam });
+    },
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
+    select: (data) => data.pages.flatMap((page) => page.tasks),
+    staleTime: Infinity, // kept current by the delta sync below
     gcTime: 10 * 60 * 1000, // 10 minutes (formerly cacheTime)
   });
+
+  useQuery({
+    queryKey: taskKeys.changes(),
+    queryFn: () => syncTaskList(queryClient),
+    enabled: tasks.isSuccess,
+    refetchInterval: TASKS_SYNC_INTERVAL,
+  });
+
+  return tasks;
 };
 
 // Hook for fetching a single task
@@ -38,8 +125,8 @@ export const useCreateTask = () => {
   return useMutation({
     mutationFn: (taskData: CreateTaskRequest) => apiService.createTask(taskData),
     onSuccess: (newTask: Task) => {
-      // Invalidate and refetch tasks list
-      queryClient.invalidateQueries({ queryKey: taskKeys.lists() });
+      // Fetch only what changed since the last sync
+      queryClient.invalidateQueries({ queryKey: taskKeys.changes() });
       
       // Add the new task to the cache
       queryClient.setQueryData(taskKeys.detail(newTask.id), newTask);
@@ -61,8 +148,8 @@ export const useUpdateTask = () => {
       // Update the task in the cache
       queryClient.setQueryData(taskKeys.detail(updatedTask.id), updatedTask);
       
-      // Invalidate and refetch tasks list
-      queryClient.invalidateQueries({ queryKey: taskKeys.lists() });
+      // Fetch only what changed since the last sync
+      queryClient.invalidateQueries({ queryKey: taskKeys.changes() });
     },
     onError: (error: Error) => {
       console.error('Failed to update', error);
@@ -80,8 +167,8 @@ export const useDeleteTask = () => {
       // Remove the task from the cache
       queryClient.removeQueries({ queryKey: taskKeys.detail(taskId) });
       
-      // Invalidate and refetch tasks list
-      queryClient.invalidateQueries({ queryKey: taskKeys.lists() });
+      // Fetch only what changed since the last sync
+      queryClient.invalidateQueries({ queryKey: taskKeys.changes() });
     },
     onError: (error: Error) => {
       console.error('Failed to delete task:', error);
@@ -42,6 +42,7 @@ export interface Task {
   created_at: string;
   updated_at: string;
   due_date?: string;
+  version?: number;
 }
 
 // Create task request interface
@@ -71,12 +72,81 @@ export interface ApiResponse<T> {
 export interface TasksResponse {
   tasks: Task[];
   count: number;
+  next_cursor: string | null;
+}
+
+// Oversized list pages are offloaded to S3 and returned as a download link
+export interface OffloadedTasksResponse {
+  count: number;
+  next_cursor: string | null;
+  download: {
+    url: string;
+    expires_in: number;
+    sha256: string;
+    size: number;
+  };
+}
+
+// List tasks request parameters
+export interface ListTasksParams {
+  limit?: number;
+  cursor?: string;
+  // Comma-separated attributes to return, e.g. 'title,status,priority'
+  fields?: string;
 }
 
 export interface TaskResponse {
   task: Task;
 }
 
+// One entry per requested id of GET /tasks?ids=
+export interface TaskLookupResult {
+  id: string;
+  status: number;
+  task?: Task;
+  error?: string;
+}
+
+export interface TasksByIdResponse {
+  results: TaskLookupResult[];
+  found: number;
+  missing: number;
+}
+
+// Changes since a checkpoint, from GET /tasks?since=
+export interface TaskChangesResponse {
+  tasks: Task[];
+  deleted: { id: string; deleted_at: string }[];
+  next_token: string;
+  has_more: boolean;
+}
+
+// Task counts from GET /tasks/stats
+export interface TaskStatsResponse {
+  total: number;
+  by_status: Partial<Record<Task['status'], number>>;
+}
+
+// One entry of POST /tasks/batch-update; if_match is an ETag such as '"v3"'
+export interface TaskBatchUpdate extends UpdateTaskRequest {
+  id: string;
+  if_match?: string;
+}
+
+export interface TaskBatchUpdateResult {
+  index: number;
+  id?: string;
+  status: number;
+  task?: Task;
+  error?: string;
+}
+
+export interface TaskBatchUpdateResponse {
+  updated: number;
+  failed: number;
+  results: TaskBatchUpdateResult[];
+}
+
 export interface MessageResponse {
   message: string;
   task?: Task;
@@ -116,9 +186,32 @@ class ApiService {
     return response.data.task;
   }
 
-  async listTasks(): Promise<Task[]> {
-    const response = await apiClient.get<TasksResponse>('/tasks');
-    return response.data.tasks;
+  async getTasks(taskIds: string[]): Promise<TasksByIdResponse> {
+    const response = await apiClient.get<TasksByIdResponse>('/tasks', {
+      params: { ids: taskIds.join(',') }
+    });
+    return response.data;
+  }
+
+  async listTasks(params: ListTasksParams = {}): Promise<TasksResponse> {
+    const response = await apiClient.get<TasksResponse | OffloadedTasksResponse>('/tasks', { params });
+    if ('download' in response.data) {
+      // Presigned S3 URL: fetch without the API client's base URL and headers
+      const offloaded = await axios.get<TasksResponse>(response.data.download.url);
+      return offloaded.data;
+    }
+    return response.data;
+  }
+
+  // An empty token returns no changes, only a checkpoint for the current time
+  async syncTasks(since: string, limit?: number): Promise<TaskChangesResponse> {
+    const response = await apiClient.get<TaskChangesResponse>('/tasks', { params: { since, limit } });
+    return response.data;
+  }
+
+  async getTaskStats(): Promise<TaskStatsResponse> {
+    const response = await apiClient.get<TaskStatsResponse>('/tasks/stats');
+    return response.data;
   }
 
   async updateTask(taskId: string, taskData: UpdateTaskRequest): Promise<Task> {
@@ -126,6 +219,12 @@ class ApiService {
     return response.data.task!;
   }
 
+  // Atomic unless atomic is false: either every update is applied or none is
+  async updateTasks(updates: TaskBatchUpdate[], atomic = true): Promise<TaskBatchUpdateResponse> {
+    const response = await apiClient.post<TaskBatchUpdateResponse>('/tasks/batch-update', { updates, atomic });
+    return response.data;
+  }
+
   async deleteTask(taskId: string): Promise<void> {
     await apiClient.delete(`/tasks/${taskId}`);
   }
@@ -0,0 +1,3 @@
+"""
+Local stand-ins for AWS services used by tests, benchmarks and load tests
+"""
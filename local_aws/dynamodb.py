@@ -0,0 +1,779 @@
+"""
+In-memory DynamoDB table stand-in
+
+Drop-in replacement for the handlers' ``table`` object (see
+utils.dynamodb.DynamoTable) so that tests, benchmarks and load tests can run
+fully offline. It models the behavior the handlers depend on:
+
+- get/put/update/delete with condition expressions and ReturnValues
+- scan and query with filter, key condition and projection expressions,
+  Limit, 1 MB pages, LastEvaluatedKey and parallel scan segments
+- global secondary indexes, including sparse ones
+- BatchWriteItem / BatchGetItem with UnprocessedItems / UnprocessedKeys
+- TransactWriteItems across tables (InMemoryTransactions)
+- DynamoDB Streams records (NEW_AND_OLD_IMAGES) of every change
+- consumed capacity, injected latency and throttling
+
+Items are copied on the way in and out, and numbers are stored as Decimal,
+as they would be by serialization over the wire.
+"""
+
+import bisect
+import contextlib
+import copy
+import math
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from decimal import Decimal
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple, Union
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from local_aws.expressions import (
+    MISSING,
+    Context,
+    ExpressionError,
+    apply_update,
+    evaluate_condition,
+    parse_condition,
+    parse_projection,
+    parse_update,
+    project,
+)
+
+DEFAULT_PAGE_SIZE_BYTES = 1024 * 1024
+MAX_BATCH_WRITE_ITEMS = 25
+MAX_BATCH_GET_KEYS = 100
+MAX_TRANSACTION_ITEMS = 100
+
+# Global secondary indexes of the tasks table (see cdk/stacks/api_stack.py)
+TASKS_TABLE_INDEXES = {
+    'StatusIndex': ('status', 'created_at'),
+    'PriorityIndex': ('priority', 'created_at'),
+    'CreatedIndex': ('shard', 'created_at'),
+    'StatusShardIndex': ('status_shard', 'created_at'),
+    'UpdatedIndex': ('shard', 'updated_at'),
+    'QueueIndex': ('queue_shard', 'queue_key'),
+}
+
+_EXPRESSION_PARAMS = {'ExpressionAttributeNames', 'ExpressionAttributeValues', 'ReturnConsumedCapacity'}
+_READ_PARAMS = _EXPRESSION_PARAMS | {
+    'ProjectionExpression', 'FilterExpression', 'Limit', 'ExclusiveStartKey',
+    'IndexName', 'ConsistentRead', 'Select'
+}
+SUPPORTED_PARAMS = {
+    'get_item': _EXPRESSION_PARAMS | {'ProjectionExpression', 'ConsistentRead'},
+    'put_item': _EXPRESSION_PARAMS | {'ConditionExpression', 'ReturnValues'},
+    'update_item': _EXPRESSION_PARAMS | {'UpdateExpression', 'ConditionExpression', 'ReturnValues'},
+    'delete_item': _EXPRESSION_PARAMS | {'ConditionExpression', 'ReturnValues'},
+    'scan': _READ_PARAMS | {'Segment', 'TotalSegments'},
+    'query': _READ_PARAMS | {'KeyConditionExpression', 'ScanIndexForward'},
+    'batch_write': set(),
+    'batch_get': {'ProjectionExpression', 'ExpressionAttributeNames', 'ConsistentRead'},
+    'transact_write': set(),
+    'describe': set(),
+}
+
+
+def client_error(code: str, message: str, operation: str) -> ClientError:
+    """Build the ClientError botocore raises for a DynamoDB error code."""
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+class _MaxKey:
+    """Sorts after every table key, for bisecting past a boundary."""
+
+    def __lt__(self, other: Any) -> bool:
+        return False
+
+    def __gt__(self, other: Any) -> bool:
+        return True
+
+
+MAX_KEY = _MaxKey()
+
+
+def _hash_order(key: tuple) -> tuple:
+    return (zlib.crc32(repr(key).encode('utf-8')), key)
+
+
+def normalize(value: Any) -> Any:
+    """Convert Python values to the types DynamoDB hands back."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalize(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return {normalize(item) for item in value}
+    return value
+
+
+def item_size(item: Dict[str, Any]) -> int:
+    """Approximate DynamoDB item size in bytes."""
+    return sum(len(name.encode('utf-8')) + _value_size(value) for name, value in item.items())
+
+
+def _value_size(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, bool) or value is None:
+        return 1
+    if isinstance(value, Decimal):
+        digits = len(value.as_tuple().digits)
+        return (digits + 1) // 2 + 1
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return 3 + sum(len(key.encode('utf-8')) + _value_size(item) + 1 for key, item in value.items())
+    if isinstance(value, (list, set, frozenset)):
+        return 3 + sum(_value_size(item) + 1 for item in value)
+    return len(str(value))
+
+
+class InMemoryTable:
+    """
+    Thread-safe, dict-backed DynamoDB table.
+
+    Args:
+        name: Table name (echoed in consumed capacity)
+        key: Partition key attribute
+        sort_key: Optional sort key attribute
+        indexes: Global secondary indexes as ``{name: (partition_key, sort_key)}``;
+            the sort key may be None
+        page_size_bytes: Size at which scans and queries stop a page
+        latency_ms: Delay added to every call, either a number or a callable
+            taking the operation name
+        throttle_rate: Probability that a call fails with
+            ProvisionedThroughputExceededException (batch calls instead leave
+            requests unprocessed)
+        unprocessed_rate: Probability that each request in a batch call is
+            returned as unprocessed
+        seed: Seed for the random number generator driving injection
+        stream: Record a stream record for every write that changes an item,
+            read with ``take_stream_records``
+
+    Every call is counted in ``calls`` so harnesses can report DynamoDB calls
+    per request.
+    """
+
+    def __init__(
+        self,
+        name: str = 'tasks',
+        key: str = 'id',
+        sort_key: Optional[str] = None,
+        indexes: Optional[Dict[str, Tuple[str, Optional[str]]]] = None,
+        page_size_bytes: int = DEFAULT_PAGE_SIZE_BYTES,
+        latency_ms: Union[float, Callable[[str], float]] = 0.0,
+        throttle_rate: float = 0.0,
+        unprocessed_rate: float = 0.0,
+        seed: Optional[int] = None,
+        stream: bool = False
+    ) -> None:
+        self.name = name
+        self.key = key
+        self.sort_key = sort_key
+        self.indexes = dict(indexes or {})
+        self.page_size_bytes = page_size_bytes
+        self.latency_ms = latency_ms
+        self.throttle_rate = throttle_rate
+        self.unprocessed_rate = unprocessed_rate
+        self.calls: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._items: Dict[tuple, Dict[str, Any]] = {}
+        self.stream = stream
+        self._stream_records: List[Dict[str, Any]] = []
+        self._sequence = 0
+        self._scan_entries: Optional[List[Tuple[tuple, tuple]]] = None
+        # index name (None for the table) -> partition value -> ordered table keys
+        self._partitions: Dict[Optional[str], Dict[Any, Dict[tuple, None]]] = {
+            name: {} for name in [None, *self.indexes]
+        }
+
+    # Setup helpers
+
+    def seed(self, items: Iterable[Dict[str, Any]]) -> None:
+        """Load items without counting calls or injecting faults."""
+        with self._lock:
+            for item in items:
+                self._store(normalize(copy.deepcopy(item)))
+
+    def reset_calls(self) -> None:
+        self.calls.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def items(self) -> List[Dict[str, Any]]:
+        """Snapshot of all stored items."""
+        with self._lock:
+            return copy.deepcopy(list(self._items.values()))
+
+    def take_stream_records(self) -> List[Dict[str, Any]]:
+        """
+        Stream records written since the last call, oldest first.
+
+        Records have the shape Lambda receives from a DynamoDB event source
+        (``{'Records': [...]}``), with images in attribute-value format.
+        """
+        with self._lock:
+            records, self._stream_records = self._stream_records, []
+            return records
+
+    # Internals
+
+    def _key_schema(self, index_name: Optional[str]) -> Tuple[str, Optional[str]]:
+        if index_name is None:
+            return self.key, self.sort_key
+        if index_name not in self.indexes:
+            raise client_error('ValidationException', f"Index {index_name} not found", 'Query')
+        return self.indexes[index_name]
+
+    def _table_key(self, item: Dict[str, Any]) -> tuple:
+        if self.sort_key:
+            return (item[self.key], item[self.sort_key])
+        return (item[self.key],)
+
+    def _key_from_request(self, key: Dict[str, Any], operation: str) -> tuple:
+        expected = {self.key, self.sort_key} - {None}
+        if set(key) != expected:
+            raise client_error(
+                'ValidationException',
+                'The provided key element does not match the schema',
+                operation
+            )
+        return self._table_key(normalize(key))
+
+    def _key_attributes(self, item: Dict[str, Any], index_name: Optional[str]) -> Dict[str, Any]:
+        names = [self.key, self.sort_key]
+        if index_name is not None:
+            names.extend(self.indexes[index_name])
+        return {name: item[name] for name in names if name and name in item}
+
+    def _store(self, item: Dict[str, Any]) -> None:
+        key = self._table_key(item)
+        if key in self._items:
+            self._unindex(key)
+        else:
+            self._scan_entries = None
+        self._items[key] = item
+        for index_name in self._partitions:
+            partition_key, sort_key = self._key_schema(index_name)
+            if partition_key in item and (sort_key is None or sort_key in item):
+                self._partitions[index_name].setdefault(item[partition_key], {})[key] = None
+
+    def _unstore(self, key: tuple) -> Optional[Dict[str, Any]]:
+        if key not in self._items:
+            return None
+        self._unindex(key)
+        self._scan_entries = None
+        return self._items.pop(key)
+
+    def _unindex(self, key: tuple) -> None:
+        old = self._items.get(key)
+        if old is not None:
+            for index_name, partitions in self._partitions.items():
+                partition_key = self._key_schema(index_name)[0]
+                bucket = partitions.get(old.get(partition_key))
+                if bucket is not None:
+                    bucket.pop(key, None)
+                    if not bucket:
+                        del partitions[old[partition_key]]
+
+    def _inject(self, operation: str, params: Dict[str, Any], batch: bool = False) -> bool:
+        """Apply latency and throttling. Returns True if a batch call is throttled."""
+        unsupported = set(params) - SUPPORTED_PARAMS.get(operation, set())
+        if unsupported:
+            # Fail loudly rather than silently ignoring behavior tests rely on
+            raise NotImplementedError(
+                f"InMemoryTable.{operation} does not support {', '.join(sorted(unsupported))}"
+            )
+        self.calls[operation] += 1
+        delay = self.latency_ms(operation) if callable(self.latency_ms) else self.latency_ms
+        if delay:
+            time.sleep(delay / 1000)
+        if self.throttle_rate and self._random.random() < self.throttle_rate:
+            if batch:
+                return True
+            raise client_error(
+                'ProvisionedThroughputExceededException',
+                'The level of configured provisioned throughput for the table was exceeded',
+                operation
+            )
+        return False
+
+    def _check_condition(
+        self,
+        params: Dict[str, Any],
+        item: Optional[Dict[str, Any]],
+        context: Context,
+        operation: str
+    ) -> None:
+        expression = params.get('ConditionExpression')
+        if not expression:
+            return
+        if not evaluate_condition(parse_condition(expression), item or {}, context):
+            raise client_error(
+                'ConditionalCheckFailedException',
+                'The conditional request failed',
+                operation
+            )
+
+    @staticmethod
+    def _context(params: Dict[str, Any]) -> Context:
+        return Context(
+            params.get('ExpressionAttributeNames'),
+            normalize(params.get('ExpressionAttributeValues') or {})
+        )
+
+    def _capacity(self, params: Dict[str, Any], units: float) -> Dict[str, Any]:
+        if params.get('ReturnConsumedCapacity') in ('TOTAL', 'INDEXES'):
+            return {'ConsumedCapacity': {'TableName': self.name, 'CapacityUnits': units}}
+        return {}
+
+    @staticmethod
+    def _write_units(*items: Optional[Dict[str, Any]]) -> float:
+        size = max([item_size(item) for item in items if item] or [0])
+        return float(max(1, math.ceil(size / 1024)))
+
+    @staticmethod
+    def _read_units(size: int, consistent: bool) -> float:
+        units = max(1, math.ceil(size / 4096))
+        return float(units if consistent else units / 2)
+
+    def _prepare_write(
+        self,
+        kind: str,
+        params: Dict[str, Any]
+    ) -> Tuple[tuple, Optional[Dict[str, Any]], Optional[Dict[str, Any]], set]:
+        """
+        Check a write's condition and compute its outcome without applying it.
+
+        Args:
+            kind: 'Put', 'Update', 'Delete' or 'ConditionCheck'
+            params: Request parameters (Item or Key plus expressions)
+
+        Returns:
+            Tuple of (table key, old item, new item or None when deleted,
+            attributes touched by an update)
+        """
+        operation = 'ConditionCheck' if kind == 'ConditionCheck' else f"{kind}Item"
+        context = self._context(params)
+        if kind == 'Put':
+            new = normalize(copy.deepcopy(params['Item']))
+            key = self._key_from_request(self._key_attributes(new, None), operation)
+        else:
+            key = self._key_from_request(params['Key'], operation)
+        old = self._items.get(key)
+        self._check_condition(params, old, context, operation)
+
+        touched: set = set()
+        if kind == 'Update':
+            base = copy.deepcopy(old) if old is not None else normalize(dict(params['Key']))
+            try:
+                new, touched = apply_update(parse_update(params['UpdateExpression']), base, context)
+            except ExpressionError as e:
+                raise client_error('ValidationException', str(e), operation)
+            if self._table_key(new) != key:
+                raise client_error('ValidationException', 'Cannot update attribute in the key', operation)
+        elif kind == 'Delete':
+            new = None
+        elif kind == 'ConditionCheck':
+            new = old
+        return key, old, new, touched
+
+    def _commit_write(self, key: tuple, new: Optional[Dict[str, Any]]) -> None:
+        old = self._items.get(key)
+        if new is None:
+            self._unstore(key)
+        else:
+            self._store(new)
+        if self.stream and old != new:
+            self._record_change(old, new)
+
+    def _record_change(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        serializer = TypeSerializer()
+        image = new if new is not None else old
+        self._sequence += 1
+        change = {
+            'ApproximateCreationDateTime': time.time(),
+            'Keys': {
+                name: serializer.serialize(image[name])
+                for name in (self.key, self.sort_key) if name
+            },
+            'SequenceNumber': f"{self._sequence:021d}",
+            'SizeBytes': item_size(image),
+            'StreamViewType': 'NEW_AND_OLD_IMAGES'
+        }
+        for name, item in (('NewImage', new), ('OldImage', old)):
+            if item is not None:
+                change[name] = {attribute: serializer.serialize(value) for attribute, value in item.items()}
+        self._stream_records.append({
+            'eventID': f"{self.name}-{self._sequence}",
+            'eventName': 'INSERT' if old is None else 'REMOVE' if new is None else 'MODIFY',
+            'eventSource': 'aws:dynamodb',
+            'eventSourceARN': f"arn:aws:dynamodb:local:000000000000:table/{self.name}/stream/local",
+            'dynamodb': change
+        })
+
+    # Single-item operations
+
+    def get_item(self, Key: Dict[str, Any], **params: Any) -> Dict[str, Any]:
+        self._inject('get_item', params)
+        with self._lock:
+            item = self._items.get(self._key_from_request(Key, 'GetItem'))
+            response = self._capacity(params, self._read_units(
+                item_size(item) if item else 0, params.get('ConsistentRead', False)
+            ))
+            if item is not None:
+                if params.get('ProjectionExpression'):
+                    item = project(item, parse_projection(params['ProjectionExpression']), self._context(params))
+                response['Item'] = copy.deepcopy(item)
+            return response
+
+    def put_item(self, Item: Dict[str, Any], **params: Any) -> Dict[str, Any]:
+        self._inject('put_item', params)
+        with self._lock:
+            key, old, item, _ = self._prepare_write('Put', dict(params, Item=Item))
+            self._commit_write(key, item)
+            response = self._capacity(params, self._write_units(old, item))
+            if params.get('ReturnValues') == 'ALL_OLD' and old is not None:
+                response['Attributes'] = copy.deepcopy(old)
+            return response
+
+    def update_item(self, Key: Dict[str, Any], **params: Any) -> Dict[str, Any]:
+        self._inject('update_item', params)
+        with self._lock:
+            key, old, new, touched = self._prepare_write('Update', dict(params, Key=Key))
+            self._commit_write(key, new)
+
+            response = self._capacity(params, self._write_units(old, new))
+            return_values = params.get('ReturnValues', 'NONE')
+            if return_values == 'ALL_NEW':
+                response['Attributes'] = copy.deepcopy(new)
+            elif return_values == 'ALL_OLD' and old is not None:
+                response['Attributes'] = copy.deepcopy(old)
+            elif return_values in ('UPDATED_NEW', 'UPDATED_OLD'):
+                source = new if return_values == 'UPDATED_NEW' else (old or {})
+                response['Attributes'] = {
+                    name: copy.deepcopy(source[name]) for name in touched if name in source
+                }
+            return response
+
+    def delete_item(self, Key: Dict[str, Any], **params: Any) -> Dict[str, Any]:
+        self._inject('delete_item', params)
+        with self._lock:
+            key, old, _, _ = self._prepare_write('Delete', dict(params, Key=Key))
+            self._commit_write(key, None)
+            response = self._capacity(params, self._write_units(old))
+            if params.get('ReturnValues') == 'ALL_OLD' and old is not None:
+                response['Attributes'] = copy.deepcopy(old)
+            return response
+
+    # Scans and queries
+
+    def _partition_value(self, node: tuple, partition_key: str, context: Context) -> Any:
+        """Find the ``partition_key = :value`` term of a key condition."""
+        if node[0] == 'and':
+            for child in node[1:]:
+                value = self._partition_value(child, partition_key, context)
+                if value is not MISSING:
+                    return value
+        elif node[0] == 'compare' and node[1] == '=':
+            left, right = node[2], node[3]
+            if left[0] == 'path' and context.resolve_path(left) == [partition_key] and right[0] == 'value':
+                return context.value(right[1])
+            if right[0] == 'path' and context.resolve_path(right) == [partition_key] and left[0] == 'value':
+                return context.value(left[1])
+        return MISSING
+
+    def _read_page(
+        self,
+        operation: str,
+        entries: List[Tuple[tuple, tuple]],
+        forward: bool,
+        order: Callable[[Dict[str, Any]], tuple],
+        index_name: Optional[str],
+        params: Dict[str, Any],
+        context: Context
+    ) -> Dict[str, Any]:
+        """
+        Evaluate one page of ``entries``: (order, table key) pairs sorted
+        ascending, read in reverse when ``forward`` is False.
+        """
+        if forward:
+            position, stop, step = 0, len(entries), 1
+        else:
+            position, stop, step = len(entries) - 1, -1, -1
+        if params.get('ExclusiveStartKey'):
+            try:
+                boundary = (order(normalize(params['ExclusiveStartKey'])),)
+            except KeyError:
+                raise client_error('ValidationException', 'The provided starting key is invalid', operation)
+            # The start item may have been deleted since, so locate its
+            # position by ordering instead of identity
+            if forward:
+                position = bisect.bisect_right(entries, boundary + (MAX_KEY,))
+            else:
+                position = bisect.bisect_left(entries, boundary) - 1
+
+        limit = params.get('Limit')
+        filter_node = parse_condition(params['FilterExpression']) if params.get('FilterExpression') else None
+        projection = parse_projection(params['ProjectionExpression']) if params.get('ProjectionExpression') else None
+
+        items: List[Dict[str, Any]] = []
+        scanned = 0
+        size = 0
+        last = None
+        while position != stop:
+            if (limit and scanned >= limit) or size >= self.page_size_bytes:
+                break
+            item = self._items[entries[position][1]]
+            last = item
+            position += step
+            scanned += 1
+            size += item_size(item)
+            if filter_node is not None and not evaluate_condition(filter_node, item, context):
+                continue
+            items.append(project(item, projection, context) if projection else item)
+
+        response: Dict[str, Any] = {'Count': len(items), 'ScannedCount': scanned}
+        if params.get('Select') != 'COUNT':
+            response['Items'] = copy.deepcopy(items)
+        if position != stop and last is not None:
+            response['LastEvaluatedKey'] = copy.deepcopy(self._key_attributes(last, index_name))
+        response.update(self._capacity(params, self._read_units(size, params.get('ConsistentRead', False))))
+        return response
+
+    def _scan_order(self) -> List[Tuple[tuple, tuple]]:
+        # Sorting the whole table per call would dominate parallel scans of
+        # large tables, so the order is kept until the key set changes
+        if self._scan_entries is None:
+            self._scan_entries = sorted((_hash_order(key), key) for key in self._items)
+        return self._scan_entries
+
+    def scan(self, **params: Any) -> Dict[str, Any]:
+        self._inject('scan', params)
+        context = self._context(params)
+        index_name = params.get('IndexName')
+        with self._lock:
+            partition_key, sort_key = self._key_schema(index_name)
+            # Like DynamoDB, scans walk items in hash order and parallel scan
+            # segments are contiguous hash ranges
+            entries = self._scan_order()
+            if 'TotalSegments' in params:
+                total, segment = params['TotalSegments'], params.get('Segment', 0)
+                low = bisect.bisect_left(entries, ((-(-(segment << 32) // total),),))
+                high = bisect.bisect_left(entries, ((-(-((segment + 1) << 32) // total),),))
+                entries = entries[low:high]
+            if index_name is not None:
+                entries = [
+                    entry for entry in entries
+                    if partition_key in self._items[entry[1]]
+                    and (sort_key is None or sort_key in self._items[entry[1]])
+                ]
+
+            def order(item: Dict[str, Any]) -> tuple:
+                return _hash_order(self._table_key(item))
+
+            return self._read_page('Scan', entries, True, order, index_name, params, context)
+
+    def query(self, **params: Any) -> Dict[str, Any]:
+        self._inject('query', params)
+        context = self._context(params)
+        index_name = params.get('IndexName')
+        with self._lock:
+            partition_key, sort_key = self._key_schema(index_name)
+            key_node = parse_condition(params['KeyConditionExpression'])
+            value = self._partition_value(key_node, partition_key, context)
+            if value is MISSING:
+                raise client_error(
+                    'ValidationException',
+                    'Query condition missed key schema element',
+                    'Query'
+                )
+
+            def order(item: Dict[str, Any]) -> tuple:
+                table_key = self._table_key(item)
+                return (item[sort_key], table_key) if sort_key else table_key
+
+            bucket = self._partitions[index_name].get(value, {})
+            entries = sorted(
+                (order(self._items[key]), key) for key in bucket
+                if evaluate_condition(key_node, self._items[key], context)
+            )
+            forward = params.get('ScanIndexForward', True) is not False
+            return self._read_page('Query', entries, forward, order, index_name, params, context)
+
+    # Batch operations
+
+    def batch_write(self, requests: List[Dict[str, Any]], **params: Any) -> Dict[str, Any]:
+        """
+        BatchWriteItem for this table.
+
+        Args:
+            requests: ``{'PutRequest': {'Item': ...}}`` or
+                ``{'DeleteRequest': {'Key': ...}}`` entries (at most 25)
+
+        Returns:
+            ``{'UnprocessedItems': [...]}`` with requests to retry
+        """
+        if not requests or len(requests) > MAX_BATCH_WRITE_ITEMS:
+            raise client_error(
+                'ValidationException',
+                f"BatchWriteItem accepts 1 to {MAX_BATCH_WRITE_ITEMS} requests",
+                'BatchWriteItem'
+            )
+        throttled = self._inject('batch_write', params, batch=True)
+        unprocessed = []
+        with self._lock:
+            for request in requests:
+                if throttled or (self.unprocessed_rate and self._random.random() < self.unprocessed_rate):
+                    unprocessed.append(request)
+                elif 'PutRequest' in request:
+                    item = normalize(copy.deepcopy(request['PutRequest']['Item']))
+                    self._commit_write(self._table_key(item), item)
+                else:
+                    self._commit_write(self._key_from_request(request['DeleteRequest']['Key'], 'BatchWriteItem'), None)
+        return {'UnprocessedItems': unprocessed}
+
+    def batch_get(self, keys: List[Dict[str, Any]], **params: Any) -> Dict[str, Any]:
+        """
+        BatchGetItem for this table.
+
+        Args:
+            keys: Primary keys to read (at most 100)
+            params: Optional ProjectionExpression / ExpressionAttributeNames
+
+        Returns:
+            ``{'Items': [...], 'UnprocessedKeys': [...]}``; items come back
+            in no particular order
+        """
+        if not keys or len(keys) > MAX_BATCH_GET_KEYS:
+            raise client_error(
+                'ValidationException',
+                f"BatchGetItem accepts 1 to {MAX_BATCH_GET_KEYS} keys",
+                'BatchGetItem'
+            )
+        throttled = self._inject('batch_get', params, batch=True)
+        context = self._context(params)
+        projection = parse_projection(params['ProjectionExpression']) if params.get('ProjectionExpression') else None
+        items, unprocessed = [], []
+        with self._lock:
+            for key in keys:
+                if throttled or (self.unprocessed_rate and self._random.random() < self.unprocessed_rate):
+                    unprocessed.append(key)
+                    continue
+                item = self._items.get(self._key_from_request(key, 'BatchGetItem'))
+                if item is not None:
+                    items.append(copy.deepcopy(project(item, projection, context) if projection else item))
+        self._random.shuffle(items)
+        return {'Items': items, 'UnprocessedKeys': unprocessed}
+
+    def describe(self) -> Dict[str, Any]:
+        self._inject('describe', {})
+        return {'TableName': self.name, 'TableStatus': 'ACTIVE', 'ItemCount': len(self._items)}
+
+
+_TRANSACT_PARAMS = {
+    'Put': {'Item', 'ConditionExpression', 'ExpressionAttributeNames', 'ExpressionAttributeValues'},
+    'Update': {'Key', 'UpdateExpression', 'ConditionExpression', 'ExpressionAttributeNames', 'ExpressionAttributeValues'},
+    'Delete': {'Key', 'ConditionExpression', 'ExpressionAttributeNames', 'ExpressionAttributeValues'},
+    'ConditionCheck': {'Key', 'ConditionExpression', 'ExpressionAttributeNames', 'ExpressionAttributeValues'},
+}
+
+
+class InMemoryTransactions:
+    """
+    TransactWriteItems over a set of in-memory tables.
+
+    Stands in for utils.dynamodb.transact_write: operations name their table
+    with ``TableName`` and hold plain Python values. Either every operation
+    is applied or, if a condition fails, none is and a
+    TransactionCanceledException carries one CancellationReason per
+    operation.
+    """
+
+    def __init__(self, *tables: InMemoryTable) -> None:
+        self.tables = {table.name: table for table in tables}
+
+    def transact_write(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if not items or len(items) > MAX_TRANSACTION_ITEMS:
+            raise client_error(
+                'ValidationException',
+                f"TransactWriteItems accepts 1 to {MAX_TRANSACTION_ITEMS} items",
+                'TransactWriteItems'
+            )
+
+        operations = []
+        for item in items:
+            (kind, params), = item.items()
+            unsupported = set(params) - _TRANSACT_PARAMS[kind] - {'TableName'}
+            if unsupported:
+                raise NotImplementedError(
+                    f"InMemoryTransactions {kind} does not support {', '.join(sorted(unsupported))}"
+                )
+            table = self.tables[params['TableName']]
+            operations.append((table, kind, {name: value for name, value in params.items() if name != 'TableName'}))
+
+        involved = sorted({table.name: table for table, _, _ in operations}.values(), key=lambda table: table.name)
+        for table in involved:
+            table._inject('transact_write', {})
+
+        with contextlib.ExitStack() as stack:
+            for table in involved:
+                stack.enter_context(table._lock)
+
+            prepared, reasons, seen = [], [], set()
+            for table, kind, params in operations:
+                try:
+                    key, _, new, _ = table._prepare_write(kind, params)
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+                    reasons.append({'Code': 'ConditionalCheckFailed', 'Message': 'The conditional request failed'})
+                    continue
+                if (table.name, key) in seen:
+                    raise client_error(
+                        'ValidationException',
+                        'Transaction request cannot include multiple operations on one item',
+                        'TransactWriteItems'
+                    )
+                seen.add((table.name, key))
+                reasons.append({'Code': 'None'})
+                if kind != 'ConditionCheck':
+                    prepared.append((table, key, new))
+
+            if any(reason['Code'] != 'None' for reason in reasons):
+                codes = ', '.join(reason['Code'] for reason in reasons)
+                raise ClientError({
+                    'Error': {
+                        'Code': 'TransactionCanceledException',
+                        'Message': f"Transaction cancelled, please refer cancellation reasons for specific reasons [{codes}]"
+                    },
+                    'CancellationReasons': reasons
+                }, 'TransactWriteItems')
+
+            for table, key, new in prepared:
+                table._commit_write(key, new)
+        return {}
+
+
+def tasks_table(name: str = 'tasks', **options: Any) -> InMemoryTable:
+    """Create an in-memory table shaped like the deployed tasks table."""
+    return InMemoryTable(name, key='id', indexes=TASKS_TABLE_INDEXES, **options)
+
+
+def meta_table(name: str = 'tasks-meta', **options: Any) -> InMemoryTable:
+    """Create an in-memory table shaped like the deployed tasks meta table."""
+    return InMemoryTable(name, key='pk', sort_key='sk', **options)
@@ -0,0 +1,498 @@
+"""
+DynamoDB expression evaluation for the in-memory stand-in
+
+Parses condition, filter, key condition, update and projection expressions
+into small ASTs (cached by expression text) and evaluates them against
+plain Python items.
+"""
+
+import copy
+import re
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions the stand-in cannot parse or evaluate."""
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return 'MISSING'
+
+
+MISSING = _Missing()
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<name>\#[A-Za-z0-9_]+)
+      | (?P<value>:[A-Za-z0-9_]+)
+      | (?P<number>\d+)
+      | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op><>|<=|>=|[=<>(),.\[\]+-])
+    )""", re.VERBOSE)
+
+_KEYWORDS = {'AND', 'OR', 'NOT', 'BETWEEN', 'IN', 'SET', 'REMOVE', 'ADD', 'DELETE'}
+_COMPARATORS = {'=', '<>', '<', '<=', '>', '>='}
+_BOOLEAN_FUNCTIONS = {'attribute_exists', 'attribute_not_exists', 'attribute_type', 'begins_with', 'contains'}
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise ExpressionError(f"Unexpected character in expression: {text[position:]!r}")
+        kind = match.lastgroup
+        token = match.group(kind)
+        if kind == 'ident' and token.upper() in _KEYWORDS:
+            kind, token = 'keyword', token.upper()
+        tokens.append((kind, token))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def peek(self, offset: int = 0) -> Tuple[Optional[str], Optional[str]]:
+        index = self.position + offset
+        if index < len(self.tokens):
+            return self.tokens[index]
+        return (None, None)
+
+    def take(self) -> Tuple[str, str]:
+        token = self.peek()
+        if token[0] is None:
+            raise ExpressionError(f"Unexpected end of expression: {self.text!r}")
+        self.position += 1
+        return token
+
+    def accept(self, token: str) -> bool:
+        if self.peek()[1] == token:
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, token: str) -> None:
+        if not self.accept(token):
+            raise ExpressionError(f"Expected {token!r} in expression: {self.text!r}")
+
+    def done(self) -> bool:
+        return self.position >= len(self.tokens)
+
+    # Paths and operands
+
+    def path(self) -> tuple:
+        kind, token = self.take()
+        if kind not in ('name', 'ident'):
+            raise ExpressionError(f"Expected attribute path, got {token!r}")
+        elements: List[tuple] = [(kind, token)]
+        while True:
+            if self.accept('.'):
+                kind, token = self.take()
+                if kind not in ('name', 'ident'):
+                    raise ExpressionError(f"Expected attribute name after '.', got {token!r}")
+                elements.append((kind, token))
+            elif self.accept('['):
+                kind, token = self.take()
+                if kind != 'number':
+                    raise ExpressionError(f"Expected list index, got {token!r}")
+                elements.append(('index', int(token)))
+                self.expect(']')
+            else:
+                return ('path', tuple(elements))
+
+    def operand(self) -> tuple:
+        kind, token = self.peek()
+        if kind == 'value':
+            self.take()
+            return ('value', token)
+        if kind == 'ident' and token == 'size' and self.peek(1)[1] == '(':
+            self.take()
+            self.expect('(')
+            path = self.path()
+            self.expect(')')
+            return ('size', path)
+        return self.path()
+
+    # Conditions
+
+    def condition(self) -> tuple:
+        node = self.and_condition()
+        while self.accept('OR'):
+            node = ('or', node, self.and_condition())
+        return node
+
+    def and_condition(self) -> tuple:
+        node = self.not_condition()
+        while self.accept('AND'):
+            node = ('and', node, self.not_condition())
+        return node
+
+    def not_condition(self) -> tuple:
+        if self.accept('NOT'):
+            return ('not', self.not_condition())
+        return self.primary_condition()
+
+    def primary_condition(self) -> tuple:
+        if self.accept('('):
+            node = self.condition()
+            self.expect(')')
+            return node
+
+        kind, token = self.peek()
+        if kind == 'ident' and token in _BOOLEAN_FUNCTIONS and self.peek(1)[1] == '(':
+            self.take()
+            self.expect('(')
+            args = [self.operand()]
+            while self.accept(','):
+                args.append(self.operand())
+            self.expect(')')
+            return ('function', token, tuple(args))
+
+        left = self.operand()
+        if self.accept('BETWEEN'):
+            low = self.operand()
+            self.expect('AND')
+            return ('between', left, low, self.operand())
+        if self.accept('IN'):
+            self.expect('(')
+            options = [self.operand()]
+            while self.accept(','):
+                options.append(self.operand())
+            self.expect(')')
+            return ('in', left, tuple(options))
+
+        kind, comparator = self.take()
+        if comparator not in _COMPARATORS:
+            raise ExpressionError(f"Expected comparator, got {comparator!r}")
+        return ('compare', comparator, left, self.operand())
+
+    # Update expressions
+
+    def update(self) -> List[tuple]:
+        actions: List[tuple] = []
+        while not self.done():
+            kind, clause = self.take()
+            if kind != 'keyword' or clause not in ('SET', 'REMOVE', 'ADD', 'DELETE'):
+                raise ExpressionError(f"Expected update clause, got {clause!r}")
+            while True:
+                if clause == 'SET':
+                    path = self.path()
+                    self.expect('=')
+                    actions.append(('SET', path, self.set_value()))
+                elif clause == 'REMOVE':
+                    actions.append(('REMOVE', self.path(), None))
+                else:
+                    path = self.path()
+                    actions.append((clause, path, self.operand()))
+                if not self.accept(','):
+                    break
+        return actions
+
+    def set_value(self) -> tuple:
+        node = self.set_operand()
+        if self.accept('+'):
+            return ('plus', node, self.set_operand())
+        if self.accept('-'):
+            return ('minus', node, self.set_operand())
+        return node
+
+    def set_operand(self) -> tuple:
+        kind, token = self.peek()
+        if kind == 'ident' and token in ('if_not_exists', 'list_append') and self.peek(1)[1] == '(':
+            self.take()
+            self.expect('(')
+            first = self.set_value()
+            self.expect(',')
+            second = self.set_value()
+            self.expect(')')
+            return (token, first, second)
+        return self.operand()
+
+
+@lru_cache(maxsize=512)
+def parse_condition(text: str) -> tuple:
+    """Parse a condition, filter or key condition expression."""
+    parser = _Parser(text)
+    node = parser.condition()
+    if not parser.done():
+        raise ExpressionError(f"Unexpected trailing tokens in expression: {text!r}")
+    return node
+
+
+@lru_cache(maxsize=512)
+def parse_update(text: str) -> tuple:
+    """Parse an update expression into a tuple of actions."""
+    return tuple(_Parser(text).update())
+
+
+@lru_cache(maxsize=512)
+def parse_projection(text: str) -> tuple:
+    """Parse a projection expression into a tuple of paths."""
+    parser = _Parser(text)
+    paths = [parser.path()]
+    while parser.accept(','):
+        paths.append(parser.path())
+    if not parser.done():
+        raise ExpressionError(f"Unexpected trailing tokens in projection: {text!r}")
+    return tuple(paths)
+
+
+class Context:
+    """Expression attribute names and values for one request."""
+
+    def __init__(
+        self,
+        names: Optional[Dict[str, str]] = None,
+        values: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.names = names or {}
+        self.values = values or {}
+
+    def resolve_path(self, path: tuple) -> List[Any]:
+        elements = []
+        for kind, token in path[1]:
+            if kind == 'name':
+                if token not in self.names:
+                    raise ExpressionError(f"Undefined expression attribute name {token}")
+                elements.append(self.names[token])
+            else:
+                elements.append(token)
+        return elements
+
+    def value(self, token: str) -> Any:
+        if token not in self.values:
+            raise ExpressionError(f"Undefined expression attribute value {token}")
+        return self.values[token]
+
+
+def get_path(item: Dict[str, Any], elements: List[Any]) -> Any:
+    current: Any = item
+    for element in elements:
+        if isinstance(element, int):
+            if not isinstance(current, list) or element >= len(current):
+                return MISSING
+            current = current[element]
+        else:
+            if not isinstance(current, dict) or element not in current:
+                return MISSING
+            current = current[element]
+    return current
+
+
+def set_path(item: Dict[str, Any], elements: List[Any], value: Any) -> None:
+    current: Any = item
+    for element in elements[:-1]:
+        current = current[element]
+    last = elements[-1]
+    if isinstance(last, int) and last >= len(current):
+        current.append(value)
+    else:
+        current[last] = value
+
+
+def remove_path(item: Dict[str, Any], elements: List[Any]) -> None:
+    parent = get_path(item, elements[:-1]) if len(elements) > 1 else item
+    last = elements[-1]
+    if isinstance(parent, dict):
+        parent.pop(last, None)
+    elif isinstance(parent, list) and isinstance(last, int) and last < len(parent):
+        del parent[last]
+
+
+def _operand(node: tuple, item: Dict[str, Any], context: Context) -> Any:
+    kind = node[0]
+    if kind == 'value':
+        return context.value(node[1])
+    if kind == 'path':
+        return get_path(item, context.resolve_path(node))
+    if kind == 'size':
+        value = _operand(node[1], item, context)
+        if value is MISSING:
+            return MISSING
+        if isinstance(value, str):
+            return Decimal(len(value.encode('utf-8')))
+        return Decimal(len(value))
+    raise ExpressionError(f"Unsupported operand {kind}")
+
+
+def _type_name(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'BOOL'
+    if value is None:
+        return 'NULL'
+    if isinstance(value, str):
+        return 'S'
+    if isinstance(value, (int, float, Decimal)):
+        return 'N'
+    if isinstance(value, (bytes, bytearray)):
+        return 'B'
+    if isinstance(value, dict):
+        return 'M'
+    if isinstance(value, list):
+        return 'L'
+    if isinstance(value, (set, frozenset)):
+        sample = next(iter(value), '')
+        return {'S': 'SS', 'N': 'NS', 'B': 'BS'}[_type_name(sample)]
+    raise ExpressionError(f"Unsupported attribute type {type(value).__name__}")
+
+
+def _comparable(left: Any, right: Any) -> bool:
+    if left is MISSING or right is MISSING:
+        return False
+    left_type, right_type = _type_name(left), _type_name(right)
+    return left_type == right_type and left_type in ('S', 'N', 'B')
+
+
+def _compare(comparator: str, left: Any, right: Any) -> bool:
+    if comparator == '=':
+        return left is not MISSING and right is not MISSING and left == right
+    if comparator == '<>':
+        return left is not MISSING and right is not MISSING and left != right
+    if not _comparable(left, right):
+        return False
+    if comparator == '<':
+        return left < right
+    if comparator == '<=':
+        return left <= right
+    if comparator == '>':
+        return left > right
+    return left >= right
+
+
+def evaluate_condition(node: tuple, item: Dict[str, Any], context: Context) -> bool:
+    """Evaluate a parsed condition against an item."""
+    kind = node[0]
+    if kind == 'and':
+        return evaluate_condition(node[1], item, context) and evaluate_condition(node[2], item, context)
+    if kind == 'or':
+        return evaluate_condition(node[1], item, context) or evaluate_condition(node[2], item, context)
+    if kind == 'not':
+        return not evaluate_condition(node[1], item, context)
+    if kind == 'compare':
+        return _compare(node[1], _operand(node[2], item, context), _operand(node[3], item, context))
+    if kind == 'between':
+        value = _operand(node[1], item, context)
+        low = _operand(node[2], item, context)
+        high = _operand(node[3], item, context)
+        return _comparable(value, low) and _comparable(value, high) and low <= value <= high
+    if kind == 'in':
+        value = _operand(node[1], item, context)
+        return value is not MISSING and any(value == _operand(option, item, context) for option in node[2])
+    if kind == 'function':
+        name, args = node[1], node[2]
+        value = _operand(args[0], item, context)
+        if name == 'attribute_exists':
+            return value is not MISSING
+        if name == 'attribute_not_exists':
+            return value is MISSING
+        if value is MISSING:
+            return False
+        argument = _operand(args[1], item, context)
+        if name == 'attribute_type':
+            return _type_name(value) == argument
+        if name == 'begins_with':
+            return isinstance(value, (str, bytes)) and type(value) is type(argument) and value.startswith(argument)
+        if name == 'contains':
+            if isinstance(value, str):
+                return isinstance(argument, str) and argument in value
+            if isinstance(value, (set, frozenset, list)):
+                return argument in value
+            return False
+    raise ExpressionError(f"Unsupported condition {kind}")
+
+
+def _set_value(node: tuple, item: Dict[str, Any], context: Context) -> Any:
+    kind = node[0]
+    if kind in ('plus', 'minus'):
+        left = _set_value(node[1], item, context)
+        right = _set_value(node[2], item, context)
+        if _type_name(left) != 'N' or _type_name(right) != 'N':
+            raise ExpressionError("Arithmetic requires number operands")
+        return left + right if kind == 'plus' else left - right
+    if kind == 'if_not_exists':
+        existing = _operand(node[1], item, context)
+        return existing if existing is not MISSING else _set_value(node[2], item, context)
+    if kind == 'list_append':
+        return list(_set_value(node[1], item, context)) + list(_set_value(node[2], item, context))
+    value = _operand(node, item, context)
+    if value is MISSING:
+        raise ExpressionError("The provided expression refers to an attribute that does not exist in the item")
+    return value
+
+
+def apply_update(
+    actions: tuple,
+    item: Dict[str, Any],
+    context: Context
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Apply parsed update actions.
+
+    All right-hand sides are evaluated against the item as it was before
+    the update, as DynamoDB does.
+
+    Returns:
+        Tuple of (updated copy of the item, top-level attributes touched)
+    """
+    updated = copy.deepcopy(item)
+    touched: List[str] = []
+    resolved = []
+    for action, path, operand in actions:
+        elements = context.resolve_path(path)
+        if action == 'SET':
+            value = _set_value(operand, item, context)
+        elif action == 'REMOVE':
+            value = None
+        else:
+            value = _operand(operand, item, context)
+        resolved.append((action, elements, value))
+        if elements[0] not in touched:
+            touched.append(elements[0])
+
+    for action, elements, value in resolved:
+        if action == 'SET':
+            set_path(updated, elements, copy.deepcopy(value))
+        elif action == 'REMOVE':
+            remove_path(updated, elements)
+        elif action == 'ADD':
+            current = get_path(updated, elements)
+            if current is MISSING:
+                set_path(updated, elements, copy.deepcopy(value))
+            elif isinstance(current, (set, frozenset)):
+                set_path(updated, elements, set(current) | set(value))
+            else:
+                set_path(updated, elements, current + value)
+        elif action == 'DELETE':
+            current = get_path(updated, elements)
+            if isinstance(current, (set, frozenset)):
+                remaining = set(current) - set(value)
+                if remaining:
+                    set_path(updated, elements, remaining)
+                else:
+                    remove_path(updated, elements)
+    return updated, touched
+
+
+def project(item: Dict[str, Any], paths: tuple, context: Context) -> Dict[str, Any]:
+    """Return the attributes of an item named by a projection."""
+    projected: Dict[str, Any] = {}
+    for path in paths:
+        elements = context.resolve_path(path)
+        value = get_path(item, elements)
+        if value is MISSING:
+            continue
+        if len(elements) == 1:
+            projected[elements[0]] = value
+        else:
+            # Nested projections keep the top-level attribute
+            projected.setdefault(elements[0], item[elements[0]])
+    return projected
@@ -0,0 +1,70 @@
+"""
+In-memory S3 stand-in
+
+Implements the client calls the handlers make (put_object, head_object,
+get_object, generate_presigned_url) so response offloading can be tested
+without AWS. Errors are raised as the same ClientError codes as S3.
+"""
+
+import io
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable
+from urllib.parse import quote
+
+from botocore.exceptions import ClientError
+
+
+class InMemoryS3:
+    """
+    Dict-backed S3 client.
+
+    Args:
+        now: Clock used for LastModified, overridable in tests
+
+    Stored objects are available as ``objects[(bucket, key)]`` and every call
+    is counted in ``calls``.
+    """
+
+    def __init__(self, now: Callable[[], datetime] = lambda: datetime.now(timezone.utc)) -> None:
+        self.objects: Dict[tuple, Dict[str, Any]] = {}
+        self.calls: Counter = Counter()
+        self._now = now
+        self._lock = threading.Lock()
+
+    def _get(self, operation: str, bucket: str, key: str) -> Dict[str, Any]:
+        obj = self.objects.get((bucket, key))
+        if obj is None:
+            # HeadObject has no body, so S3 reports a bare 404
+            code = '404' if operation == 'HeadObject' else 'NoSuchKey'
+            raise ClientError({'Error': {'Code': code, 'Message': 'Not Found'}}, operation)
+        return obj
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **params: Any) -> Dict[str, Any]:
+        self.calls['put_object'] += 1
+        data = Body.encode('utf-8') if isinstance(Body, str) else bytes(Body)
+        with self._lock:
+            self.objects[(Bucket, Key)] = dict(params, Body=data, LastModified=self._now())
+        return {}
+
+    def head_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        self.calls['head_object'] += 1
+        with self._lock:
+            obj = self._get('HeadObject', Bucket, Key)
+            head = {name: value for name, value in obj.items() if name != 'Body'}
+            head['ContentLength'] = len(obj['Body'])
+            return head
+
+    def get_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        self.calls['get_object'] += 1
+        with self._lock:
+            obj = self._get('GetObject', Bucket, Key)
+            return dict(obj, Body=io.BytesIO(obj['Body']), ContentLength=len(obj['Body']))
+
+    def generate_presigned_url(self, ClientMethod: str, Params: Dict[str, Any], ExpiresIn: int = 3600) -> str:
+        self.calls['generate_presigned_url'] += 1
+        return (
+            f"https://{Params['Bucket']}.s3.local/{quote(Params['Key'])}"
+            f"?X-Amz-Expires={ExpiresIn}&X-Amz-Signature=local"
+        )
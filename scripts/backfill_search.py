@@ -0,0 +1,48 @@
+"""
+Backfill the task search index
+
+The stream handler writes a task's search postings whenever the task
+changes, so tasks written before search was enabled are not found until
+they are edited. This writes the postings of every live task. It is safe to
+run while the API takes writes and to run again; tasks that change while it
+runs are read again and indexed as they are then.
+
+Usage:
+    python scripts/backfill_search.py --table tasks-dev --meta-table tasks-meta-dev
+                                      [--segments 8] [--capacity 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+
+from utils.search import index_tasks  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--table', default=os.environ.get('TASKS_TABLE'), help='tasks table name')
+    parser.add_argument('--meta-table', default=os.environ.get('META_TABLE'), help='search index table name')
+    parser.add_argument('--segments', type=int, default=8, help='parallel scan segments')
+    parser.add_argument('--capacity', type=float, help='read capacity units per second to spend')
+    args = parser.parse_args()
+    if not args.table or not args.meta_table:
+        parser.error('--table and --meta-table (or TASKS_TABLE and META_TABLE) are required')
+
+    from utils.dynamodb import DynamoTable
+
+    result = index_tasks(
+        DynamoTable(args.table),
+        DynamoTable(args.meta_table),
+        segments=args.segments,
+        capacity_per_second=args.capacity
+    )
+    print(json.dumps(result, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Backfill write shards on existing tasks
+
+Tasks created before CreatedIndex, StatusShardIndex and QueueIndex existed
+have no ``shard``, ``status_shard`` or ``queue_shard``/``queue_key``
+attributes and are missing from those indexes. Run this once against the
+table (with the same TASK_SHARDS as the deployed handler) before turning on
+LIST_FROM_CREATED_INDEX, STATUS_INDEX_SHARDED or TASK_QUEUE.
+
+Usage:
+    python scripts/backfill_shards.py --table tasks-dev [--segments 8]
+                                      [--capacity 200] [--shards 4]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+
+from utils.backfill import backfill  # noqa: E402
+from utils.queue import queue_attributes  # noqa: E402
+from utils.sharding import TASK_SHARDS, shard_for, sharded_value  # noqa: E402
+
+
+def derive_shards(item: dict, shards: int) -> dict:
+    """Shard and queue attributes a task should have."""
+    derived = {'shard': shard_for(item['id'], shards)}
+    if 'status' in item:
+        derived['status_shard'] = sharded_value(item['status'], item['id'], shards)
+    derived.update(queue_attributes(item, shards))
+    return derived
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--table', default=os.environ.get('TASKS_TABLE'), help='tasks table name')
+    parser.add_argument('--segments', type=int, default=8, help='parallel scan segments')
+    parser.add_argument('--capacity', type=float, help='read capacity units per second to spend')
+    parser.add_argument('--shards', type=int, default=TASK_SHARDS, help=f'write shards (default {TASK_SHARDS})')
+    args = parser.parse_args()
+    if not args.table:
+        parser.error('--table or TASKS_TABLE is required')
+
+    from utils.dynamodb import DynamoTable
+
+    result = backfill(
+        DynamoTable(args.table),
+        lambda item: derive_shards(item, args.shards),
+        [
+            'shard', 'status', 'status_shard', 'priority', 'created_at', 'deleted_at',
+            'lease_expires_at', 'queue_shard', 'queue_key'
+        ],
+        segments=args.segments,
+        capacity_per_second=args.capacity,
+        pinned=['version', 'status']
+    )
+    print(json.dumps(result, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Rebuild the materialized task counters
+
+The handler keeps the counter items in META_TABLE up to date on every write
+to a counted task, but tasks written before counters were enabled, or by a
+batch whose counter update failed, are not in them. This adds those tasks.
+It is safe to run while the API takes writes and to run again; tasks that
+kept changing while it ran are reported as uncounted for the next run.
+
+Usage:
+    python scripts/rebuild_stats.py --table tasks-dev --meta-table tasks-meta-dev
+                                    [--segments 8] [--capacity 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+
+from utils.stats import count_uncounted, read_stats  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--table', default=os.environ.get('TASKS_TABLE'), help='tasks table name')
+    parser.add_argument('--meta-table', default=os.environ.get('META_TABLE'), help='counters table name')
+    parser.add_argument('--segments', type=int, default=8, help='parallel scan segments')
+    parser.add_argument('--capacity', type=float, help='read capacity units per second to spend')
+    args = parser.parse_args()
+    if not args.table or not args.meta_table:
+        parser.error('--table and --meta-table (or TASKS_TABLE and META_TABLE) are required')
+
+    from utils.dynamodb import DynamoTable, transact_write
+
+    meta_table = DynamoTable(args.meta_table)
+    result = count_uncounted(
+        DynamoTable(args.table),
+        meta_table,
+        transact_write,
+        segments=args.segments,
+        capacity_per_second=args.capacity
+    )
+    result['stats'] = read_stats(meta_table)
+    print(json.dumps(result, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,18 @@ Health Check Handler Lambda Function
 Provides health check endpoint for API monitoring
 """
 
-import json
 import os
 from datetime import datetime, timezone
 from typing import Dict, Any
 
-import boto3
+from utils.dynamodb import DynamoTable
+from utils.response import API_HEADERS, json_response
+
+# Precomputed headers for the read-only health endpoint
+HEALTH_HEADERS = dict(API_HEADERS, **{
+    'Access-Control-Allow-Headers': 'Content-Type',
+    'Access-Control-Allow-Methods': 'GET,OPTIONS'
+})
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -35,11 +41,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Check DynamoDB connectivity (optional)
         try:
             if 'TASKS_TABLE' in os.environ:
-                dynamodb = boto3.resource('dynamodb')
-                table = dynamodb.Table(os.environ['TASKS_TABLE'])
+                table = DynamoTable(os.environ['TASKS_TABLE'])
                 
                 # Simple table description to test connectivity
-                table.load()
+                table.describe()
                 health_status['database'] = 'connected'
             else:
                 health_status['database'] = 'not_configured'
@@ -57,30 +62,12 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'remaining_time': context.get_remaining_time_in_millis()
             }
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Allow-Methods': 'GET,OPTIONS'
-            },
-            'body': json.dumps(health_status)
-        }
+        return json_response(200, health_status, base_headers=HEALTH_HEADERS)
         
     except Exception as e:
         # Return error response if health check fails
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Allow-Methods': 'GET,OPTIONS'
-            },
-            'body': json.dumps({
-                'status': 'unhealthy',
-                'error': str(e),
-                'timestamp': datetime.now(timezone.utc).isoformat()
-            })
-        } 
\ No newline at end of file
+        return json_response(500, {
+            'status': 'unhealthy',
+            'error': str(e),
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }, base_headers=HEALTH_HEADERS) 
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+Stream Handler Lambda Function
+Materializes derived views from the tasks table's DynamoDB stream
+"""
+
+import os
+from typing import Dict, Any, List, Optional
+
+from botocore.exceptions import ClientError
+
+from utils.batch import write_all
+from utils.dynamodb import DynamoTable, deserialize
+from utils.recent import RECENT_KEY, RecentTasks
+from utils.search import posting_changes
+
+# Table holding the materialized views
+meta_table = DynamoTable(os.environ['META_TABLE'])
+
+# Attempts at saving the snapshot when another invocation saved it first
+SNAPSHOT_WRITE_ATTEMPTS = int(os.environ.get('SNAPSHOT_WRITE_ATTEMPTS', '5'))
+
+# Concurrent BatchWriteItem calls per record's search postings
+POSTINGS_WRITE_CONCURRENCY = int(os.environ.get('POSTINGS_WRITE_CONCURRENCY', '4'))
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Apply a batch of stream records to the search index and the recent
+    tasks snapshot.
+    
+    Each record's search postings are written as it is processed; the
+    snapshot changes of the batch are saved with one conditional write. If a
+    record cannot be applied, the records before it are kept and its
+    sequence number is reported as the batch item failure, so Lambda retries
+    from there. Replayed records are no-ops (see utils.recent and
+    utils.search).
+    
+    Args:
+        event: DynamoDB stream event
+        context: Lambda context
+        
+    Returns:
+        ``{'batchItemFailures': [...]}`` for ReportBatchItemFailures
+    """
+    records = event.get('Records', [])
+    if not records:
+        return batch_response(None)
+    
+    failed = None
+    for position, record in enumerate(records):
+        try:
+            index_record(record)
+        except Exception as e:
+            print(f"Error indexing stream record {record_sequence(record)}: {str(e)}")
+            failed = record
+            records = records[:position]
+            break
+    if not records:
+        return batch_response(failed)
+    
+    for _ in range(SNAPSHOT_WRITE_ATTEMPTS):
+        snapshot = RecentTasks.from_item(
+            meta_table.get_item(Key=RECENT_KEY, ConsistentRead=True).get('Item')
+        )
+        snapshot_failed = failed
+        for record in records:
+            try:
+                snapshot.apply(*record_images(record))
+            except Exception as e:
+                print(f"Error applying stream record {record_sequence(record)}: {str(e)}")
+                snapshot_failed = record
+                break
+        
+        try:
+            if snapshot.changed:
+                save_snapshot(snapshot)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                continue
+            print(f"Error saving recent tasks: {str(e)}")
+            return batch_response(records[0])
+        return batch_response(snapshot_failed)
+    
+    print("Error saving recent tasks: too many concurrent writers")
+    return batch_response(records[0])
+
+
+def record_images(record: Dict[str, Any]) -> tuple:
+    """
+    Deserialized (new, old) images of a stream record.
+    
+    Raises:
+        ValueError: If the record carries no image (the stream must use
+            NEW_AND_OLD_IMAGES)
+    """
+    change = record.get('dynamodb') or {}
+    new = deserialize(change['NewImage']) if 'NewImage' in change else None
+    old = deserialize(change['OldImage']) if 'OldImage' in change else None
+    if new is None and old is None:
+        raise ValueError("Stream record has no images")
+    return new, old
+
+
+def index_record(record: Dict[str, Any]) -> None:
+    """
+    Update the search postings of the task a record changed.
+    
+    Raises:
+        RuntimeError: If postings were still unprocessed after retries
+    """
+    new, old = record_images(record)
+    task_id = (new if new is not None else old)['id']
+    requests = posting_changes(task_id, old, new)
+    if requests and write_all(meta_table, requests, max_workers=POSTINGS_WRITE_CONCURRENCY):
+        raise RuntimeError(f"Search postings of task {task_id} were not written")
+
+
+def save_snapshot(snapshot: RecentTasks) -> None:
+    """Write the snapshot, unless another invocation saved a newer revision."""
+    if snapshot.revision:
+        condition = {
+            'ConditionExpression': '#revision = :revision',
+            'ExpressionAttributeValues': {':revision': snapshot.revision}
+        }
+    else:
+        condition = {'ConditionExpression': 'attribute_not_exists(#revision)'}
+    meta_table.put_item(
+        Item=snapshot.to_item(),
+        ExpressionAttributeNames={'#revision': 'revision'},
+        **condition
+    )
+
+
+def record_sequence(record: Dict[str, Any]) -> Optional[str]:
+    """Sequence number identifying a record in batch item failures."""
+    return (record.get('dynamodb') or {}).get('SequenceNumber')
+
+
+def batch_response(failed: Optional[Dict[str, Any]]) -> Dict[str, List[Dict[str, str]]]:
+    """Report the first record to retry, if any."""
+    if failed is None:
+        return {'batchItemFailures': []}
+    return {'batchItemFailures': [{'itemIdentifier': record_sequence(failed)}]}
@@ -3,18 +3,108 @@ Task Handler Lambda Function
 Handles CRUD operations for tasks via API Gateway
 """
 
+import base64
 import json
-import uuid
 import os
-from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
 
-import boto3
 from botocore.exceptions import ClientError
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['TASKS_TABLE'])
+from utils.batch import get_all, write_all
+from utils.cache import LRUCache
+from utils.dynamodb import TRANSACT_MAX_ITEMS, DynamoTable, transact_write
+from utils.etag import (
+    collection_etag, etag_matches, parse_etag_list, task_etag, version_from_etag
+)
+from utils.export import NDJSON_CONTENT_TYPE, NDJSONWriter
+from utils.fields import TASK_FIELDS, fields_tag, parse_fields, projection_params, select_fields
+from utils.ids import new_task_id
+from utils.offload import response_store_from_env
+from utils.pagination import (
+    InvalidCursorError, encode_cursor, decode_cursor, get_cursor_secret, parse_limit
+)
+from utils.query_planner import plan_task_query, execute_page
+from utils.queue import (
+    CLAIMED, TASK_QUEUE, claim_candidates, is_queued_correctly, queue_attributes, queue_changes,
+    spread
+)
+from utils.recent import RECENT_KEY, RecentTasks
+from utils.request import get_body, get_header
+from utils.response import (
+    API_HEADERS, compress_response, json_response, negotiate_encoding, not_modified_response
+)
+from utils.search import parse_query, search
+from utils.sharding import TASK_SHARDS, merge_shard_queries, shard_for, sharded_value
+from utils.stats import (
+    COUNTED_ATTRIBUTE, add_to_counters, counter_update, is_counted, is_transaction_conflict, merge_deltas,
+    read_stats, task_deltas
+)
+
+# DynamoDB table; the underlying client is created on first use
+table = DynamoTable(os.environ['TASKS_TABLE'])
+
+# Table holding the per-status task counters; without it counters are not kept
+meta_table = DynamoTable(os.environ['META_TABLE']) if os.environ.get('META_TABLE') else None
+
+# Attempts at a counted write when the task changes between its read and write
+COUNTER_WRITE_ATTEMPTS = int(os.environ.get('COUNTER_WRITE_ATTEMPTS', '3'))
+
+# Work queue claims for POST /tasks/claim: default and longest lease, queue
+# candidates read per attempt, how many equally ranked candidates are
+# shuffled between workers that lost a race, and read attempts before giving up
+CLAIM_LEASE_SECONDS = int(os.environ.get('CLAIM_LEASE_SECONDS', '300'))
+CLAIM_MAX_LEASE_SECONDS = int(os.environ.get('CLAIM_MAX_LEASE_SECONDS', '3600'))
+CLAIM_CANDIDATES = int(os.environ.get('CLAIM_CANDIDATES', '10'))
+CLAIM_SPREAD = int(os.environ.get('CLAIM_SPREAD', '4'))
+CLAIM_ATTEMPTS = int(os.environ.get('CLAIM_ATTEMPTS', '3'))
+
+# Read cache shared by invocations on a warm container
+task_cache = LRUCache(
+    max_size=int(os.environ.get('TASK_CACHE_SIZE', '256')),
+    ttl_seconds=float(os.environ.get('TASK_CACHE_TTL_SECONDS', '5'))
+)
+
+# Cache counters are logged once per this many lookups, not on every read;
+# 0 turns the log off
+CACHE_STATS_INTERVAL = int(os.environ.get('CACHE_STATS_INTERVAL', '100'))
+
+# Bulk create limits for POST /tasks/batch
+BATCH_MAX_TASKS = int(os.environ.get('BATCH_MAX_TASKS', '1000'))
+BATCH_WRITE_CONCURRENCY = int(os.environ.get('BATCH_WRITE_CONCURRENCY', '4'))
+
+# NDJSON export chunking for GET /tasks/export. Responses are base64 encoded,
+# so 4 MB of output stays under Lambda's 6 MB response payload limit
+EXPORT_MAX_BYTES = int(os.environ.get('EXPORT_MAX_BYTES', str(4 * 1024 * 1024)))
+EXPORT_PAGE_SIZE = int(os.environ.get('EXPORT_PAGE_SIZE', '500'))
+
+# List responses larger than this are offloaded to S3 (when OFFLOAD_BUCKET is set)
+response_store = response_store_from_env()
+LIST_OFFLOAD_BYTES = int(os.environ.get('LIST_OFFLOAD_BYTES', str(1024 * 1024)))
+
+# Partial updates applied per POST /tasks/batch-update, and updates of a
+# non-atomic batch applied concurrently
+BATCH_UPDATE_MAX_TASKS = int(os.environ.get('BATCH_UPDATE_MAX_TASKS', '100'))
+BATCH_UPDATE_CONCURRENCY = int(os.environ.get('BATCH_UPDATE_CONCURRENCY', '8'))
+
+# Attributes a partial update may set
+UPDATABLE_FIELDS = ('title', 'description', 'status', 'priority', 'due_date')
+
+# Bulk read limits for GET /tasks?ids=. 100 UUIDs with URL-encoded commas
+# take about 3.9 KB, well inside API Gateway's 10 KB request line; 250 did not
+# fit once clients encoded the commas
+BATCH_GET_MAX_IDS = int(os.environ.get('BATCH_GET_MAX_IDS', '100'))
+BATCH_GET_CONCURRENCY = int(os.environ.get('BATCH_GET_CONCURRENCY', '4'))
+
+# Deleted tasks leave a tombstone that the table's TTL removes after this
+# long; delta sync tokens older than that can no longer see every delete
+TOMBSTONE_TTL_SECONDS = int(os.environ.get('TOMBSTONE_TTL_SECONDS', str(7 * 86400)))
+
+# Delta sync re-reads changes this far behind its checkpoint, so writes that
+# reach UpdatedIndex late (index lag, clock skew between writers) are not missed
+SYNC_OVERLAP_SECONDS = int(os.environ.get('SYNC_OVERLAP_SECONDS', '5'))
+SYNC_SCOPE = f"sync:{TASK_SHARDS}"
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -29,218 +119,1446 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         API Gateway response
     """
     try:
-        # Extract HTTP method and path
-        http_method = event.get('httpMethod', 'GET')
-        path_parameters = event.get('pathParameters', {})
-        
-        # Route to appropriate handler
-        if http_method == 'POST':
-            return create_task(event)
-        elif http_method == 'GET':
-            if path_parameters and 'id' in path_parameters:
-                return get_task(path_parameters['id'])
-            else:
-                return list_tasks()
-        elif http_method == 'PUT':
-            if path_parameters and 'id' in path_parameters:
-                return update_task(path_parameters['id'], event)
-            else:
-                return error_response(400, "Task ID is required for updates")
-        elif http_method == 'DELETE':
-            if path_parameters and 'id' in path_parameters:
-                return delete_task(path_parameters['id'])
-            else:
-                return error_response(400, "Task ID is required for deletion")
-        else:
-            return error_response(405, f"Method {http_method} not allowed")
-            
+        response = route_request(event)
     except Exception as e:
         print(f"Error in lambda_handler: {str(e)}")
-        return error_response(500, "Internal server error")
+        response = error_response(500, "Internal server error")
+    
+    return compress_response(response, get_header(event, 'Accept-Encoding'))
+
+
+def route_request(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Dispatch an API Gateway event to the matching task operation."""
+    # Extract HTTP method and path
+    http_method = event.get('httpMethod', 'GET')
+    path_parameters = event.get('pathParameters', {})
+    
+    # Route to appropriate handler
+    if http_method == 'POST':
+        if event.get('resource') == '/tasks/batch':
+            return create_tasks_batch(event)
+        if event.get('resource') == '/tasks/claim':
+            return claim_task(event)
+        if event.get('resource') == '/tasks/batch-update':
+            return update_tasks_batch(event)
+        return create_task(event)
+    elif http_method == 'GET':
+        if event.get('resource') == '/tasks/export':
+            return export_tasks(event)
+        if event.get('resource') == '/tasks/stats':
+            return get_task_stats()
+        if event.get('resource') == '/tasks/search':
+            return search_tasks(event)
+        if path_parameters and 'id' in path_parameters:
+            return get_task(path_parameters['id'], event)
+        else:
+            return list_tasks(event)
+    elif http_method == 'PUT':
+        if path_parameters and 'id' in path_parameters:
+            return update_task(path_parameters['id'], event)
+        else:
+            return error_response(400, "Task ID is required for updates")
+    elif http_method == 'DELETE':
+        if path_parameters and 'id' in path_parameters:
+            return delete_task(path_parameters['id'])
+        else:
+            return error_response(400, "Task ID is required for deletion")
+    else:
+        return error_response(405, f"Method {http_method} not allowed")
 
 
 def create_task(event: Dict[str, Any]) -> Dict[str, Any]:
     """Create a new task."""
     try:
         # Parse request body
-        body = json.loads(event.get('body', '{}'))
+        body = json.loads(get_body(event))
+        
+        try:
+            task_item = build_task_item(body)
+        except ValueError as e:
+            return error_response(400, str(e))
+        
+        # Save to DynamoDB, counting the task in the same transaction
+        if meta_table is not None:
+            task_item[COUNTED_ATTRIBUTE] = True
+            write_with_counters({'Put': {
+                'TableName': table.name,
+                'Item': task_item,
+                'ConditionExpression': 'attribute_not_exists(#id)',
+                'ExpressionAttributeNames': {'#id': 'id'}
+            }}, task_deltas(None, task_item['status']))
+        else:
+            table.put_item(Item=task_item)
+        task_cache.put(task_item['id'], task_item)
         
-        # Validate required fields
-        title = body.get('title')
-        if not title:
-            return error_response(400, "Title is required")
+        return success_response(201, {
+            'message': 'Task created successfully',
+            'task': select_fields(task_item, TASK_FIELDS)
+        }, headers=etag_headers(task_etag(task_item)))
         
-        # Create task item
-        task_id = str(uuid.uuid4())
+    except json.JSONDecodeError:
+        return error_response(400, "Invalid JSON in request body")
+    except ClientError as e:
+        if is_transaction_conflict(e):
+            # Counter shards stayed busy through every retry; nothing was written
+            return error_response(503, "Task counters are busy, retry")
+        print(f"Error creating task: {str(e)}")
+        return error_response(500, "Failed to create task")
+    except Exception as e:
+        print(f"Error creating task: {str(e)}")
+        return error_response(500, "Failed to create task")
+
+
+def build_task_item(body: Any, now: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validate a create request body and build the task item to store.
+    
+    Raises:
+        ValueError: If the body is not a valid task
+    """
+    if not isinstance(body, dict):
+        raise ValueError("Task must be a JSON object")
+    
+    # Validate required fields
+    title = body.get('title')
+    if not title:
+        raise ValueError("Title is required")
+    
+    # Create task item
+    task_id = new_task_id()
+    now = now or datetime.now(timezone.utc).isoformat()
+    
+    status = body.get('status', 'pending')
+    
+    task_item = {
+        'id': task_id,
+        'title': title,
+        'description': body.get('description', ''),
+        'status': status,
+        'priority': body.get('priority', 'medium'),
+        'created_at': now,
+        'updated_at': now,
+        'version': 1,
+        # Write shards for CreatedIndex and StatusShardIndex
+        'shard': shard_for(task_id),
+        'status_shard': sharded_value(status, task_id)
+    }
+    
+    # Add optional fields
+    if 'due_date' in body:
+        task_item['due_date'] = body['due_date']
+    
+    # Pending tasks enter the work queue (QueueIndex)
+    task_item.update(queue_attributes(task_item))
+    
+    return task_item
+
+
+def create_tasks_batch(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create many tasks in one request.
+    
+    Expects ``{"tasks": [...]}``. Each task is validated like ``create_task``
+    and valid ones are written with BatchWriteItem. The response reports a
+    result per input task, in request order: 201 with the task, 400 with the
+    validation error, or 503 if the write was still unprocessed after
+    retries. The status is 201 when every task was created, 207 otherwise.
+    """
+    try:
+        body = json.loads(get_body(event))
+    except json.JSONDecodeError:
+        return error_response(400, "Invalid JSON in request body")
+    
+    tasks = body.get('tasks') if isinstance(body, dict) else None
+    if not isinstance(tasks, list) or not tasks:
+        return error_response(400, "Body must contain a non-empty 'tasks' list")
+    if len(tasks) > BATCH_MAX_TASKS:
+        return error_response(400, f"At most {BATCH_MAX_TASKS} tasks can be created per request")
+    
+    try:
         now = datetime.now(timezone.utc).isoformat()
+        results = []
+        items = []
+        for index, task in enumerate(tasks):
+            try:
+                item = build_task_item(task, now)
+            except ValueError as e:
+                results.append({'index': index, 'status': 400, 'error': str(e)})
+                continue
+            results.append({'index': index, 'status': 201, 'task': item})
+            items.append(item)
         
-        task_item = {
-            'id': task_id,
-            'title': title,
-            'description': body.get('description', ''),
-            'status': body.get('status', 'pending'),
-            'priority': body.get('priority', 'medium'),
-            'created_at': now,
-            'updated_at': now
-        }
+        if meta_table is not None and items:
+            # BatchWriteItem cannot join a transaction, so the tasks are
+            # counted before they are written and marked as counted; tasks
+            # that are not written are taken off again below. If the count
+            # fails the tasks are written unmarked for rebuild_stats.py to add
+            # rather than failing a request that a retry would duplicate
+            deltas = merge_deltas(task_deltas(None, item['status']) for item in items)
+            try:
+                add_to_counters(meta_table, deltas)
+                for item in items:
+                    item[COUNTED_ATTRIBUTE] = True
+            except Exception as e:
+                print(f"Error counting created tasks, run rebuild_stats.py to add them: {str(e)}")
         
-        # Add optional fields
-        if 'due_date' in body:
-            task_item['due_date'] = body['due_date']
+        failed = write_all(
+            table,
+            [{'PutRequest': {'Item': item}} for item in items],
+            max_workers=BATCH_WRITE_CONCURRENCY
+        ) if items else []
         
-        # Save to DynamoDB
-        table.put_item(Item=task_item)
+        failed_ids = {request['PutRequest']['Item']['id'] for request in failed}
+        for result in results:
+            if result['status'] == 201 and result['task']['id'] in failed_ids:
+                result.update(status=503, error="Task was not written, retry later")
+                del result['task']
         
-        return success_response(201, {
-            'message': 'Task created successfully',
-            'task': task_item
+        uncreated = [item for item in items if item['id'] in failed_ids and is_counted(item)]
+        if uncreated:
+            deltas = merge_deltas(task_deltas(item, None) for item in uncreated)
+            try:
+                add_to_counters(meta_table, deltas)
+            except Exception as e:
+                print(f"Error uncounting tasks that were not written, counters are off by {deltas}: {str(e)}")
+        
+        created = sum(1 for result in results if result['status'] == 201)
+        return success_response(201 if created == len(results) else 207, {
+            'created': created,
+            'failed': len(results) - created,
+            'results': [
+                dict(result, task=select_fields(result['task'], TASK_FIELDS)) if 'task' in result else result
+                for result in results
+            ]
         })
         
+    except Exception as e:
+        print(f"Error creating tasks: {str(e)}")
+        return error_response(500, "Failed to create tasks")
+
+
+def claim_task(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Claim the next task of the work queue (``POST /tasks/claim``).
+    
+    Takes a task whose lease expired or else the highest-priority, oldest
+    pending task, and moves it to ``in_progress`` with ``claimed_by`` and
+    ``lease_expires_at``. Expects ``{"worker": "...", "lease_seconds": n}``
+    (``lease_seconds`` is optional). The worker ends the lease by updating
+    the task's status. The body's ``task`` is null when nothing can be
+    claimed.
+    """
+    if not TASK_QUEUE:
+        return error_response(501, "Task queue is not enabled")
+    
+    try:
+        body = json.loads(get_body(event))
     except json.JSONDecodeError:
         return error_response(400, "Invalid JSON in request body")
+    
+    worker = body.get('worker') if isinstance(body, dict) else None
+    if not isinstance(worker, str) or not worker or len(worker) > 128:
+        return error_response(400, "worker must be a string of 1 to 128 characters")
+    lease_seconds = body.get('lease_seconds', CLAIM_LEASE_SECONDS)
+    if not isinstance(lease_seconds, int) or isinstance(lease_seconds, bool) \
+            or not 0 < lease_seconds <= CLAIM_MAX_LEASE_SECONDS:
+        return error_response(400, f"lease_seconds must be between 1 and {CLAIM_MAX_LEASE_SECONDS}")
+    
+    try:
+        for _ in range(CLAIM_ATTEMPTS):
+            now = datetime.now(timezone.utc)
+            candidates = claim_candidates(table, now.isoformat(), CLAIM_CANDIDATES)
+            if not candidates:
+                return success_response(200, {'message': 'No task to claim', 'task': None})
+            
+            # Best candidate first; only after losing a race are the next
+            # equally ranked ones spread between the workers that lost
+            while candidates:
+                candidate = candidates.pop(0)
+                if not is_queued_correctly(candidate):
+                    repair_queue_entry(candidate)
+                    continue
+                task = claim_candidate(candidate, worker, now, lease_seconds)
+                if task is not None:
+                    return success_response(200, {
+                        'message': 'Task claimed successfully',
+                        'task': select_fields(task, TASK_FIELDS)
+                    }, headers=etag_headers(task_etag(task)))
+                candidates = spread(candidates, CLAIM_SPREAD)
+        
+        return error_response(409, "Every queued task was claimed concurrently, retry")
+        
     except Exception as e:
-        print(f"Error creating task: {str(e)}")
-        return error_response(500, "Failed to create task")
+        print(f"Error claiming task: {str(e)}")
+        return error_response(500, "Failed to claim task")
+
+
+def claim_candidate(
+    candidate: Dict[str, Any],
+    worker: str,
+    now: datetime,
+    lease_seconds: int
+) -> Optional[Dict[str, Any]]:
+    """
+    Take one queued task, unless another writer changed it first.
+    
+    The write is pinned to the version read from QueueIndex, so of all
+    workers racing for a task exactly one succeeds, and a stale index entry
+    is simply skipped. A write cancelled because another transaction held
+    the task or its counter shard is a lost race as well.
+    
+    Returns:
+        The claimed task, or None if the claim lost
+    """
+    lease_expires_at = (now + timedelta(seconds=lease_seconds)).isoformat()
+    changes = {
+        'status': CLAIMED,
+        'status_shard': sharded_value(CLAIMED, candidate['id']),
+        'claimed_by': worker,
+        'lease_expires_at': lease_expires_at
+    }
+    changes.update(queue_attributes(dict(candidate, **changes)))
+    
+    update = with_changes({
+        'Key': {'id': candidate['id']},
+        'UpdateExpression': (
+            "SET #updated_at = :updated_at, "
+            "#version = if_not_exists(#version, :zero) + :one"
+        ),
+        'ConditionExpression': "attribute_exists(#id) AND attribute_not_exists(#deleted_at)",
+        'ExpressionAttributeNames': {
+            '#id': 'id', '#deleted_at': 'deleted_at', '#updated_at': 'updated_at', '#version': 'version'
+        },
+        'ExpressionAttributeValues': {':updated_at': now.isoformat(), ':zero': 0, ':one': 1}
+    }, changes, [])
+    task_write = pinned_to(update, candidate)
+    deltas = task_deltas(candidate, CLAIMED)
+    try:
+        if meta_table is not None and deltas:
+            write_with_counters({'Update': dict(task_write, TableName=table.name)}, deltas)
+        else:
+            table.update_item(**task_write)
+    except ClientError as e:
+        if is_transaction_conflict(e) or is_conditional_check_failure(e):
+            return None
+        raise
+    
+    task = dict(candidate, **changes)
+    task['updated_at'] = now.isoformat()
+    task['version'] = candidate.get('version', 0) + 1
+    task_cache.put(task['id'], task)
+    return task
+
+
+def repair_queue_entry(task: Dict[str, Any]) -> None:
+    """Move a task whose QueueIndex entry is stale to where it belongs."""
+    sets, removes = queue_changes(task, task)
+    update = with_changes({
+        'Key': {'id': task['id']},
+        'UpdateExpression': "SET #version = if_not_exists(#version, :zero) + :one",
+        'ConditionExpression': "attribute_exists(#id)",
+        'ExpressionAttributeNames': {'#id': 'id', '#version': 'version'},
+        'ExpressionAttributeValues': {':zero': 0, ':one': 1}
+    }, sets, removes)
+    try:
+        table.update_item(**pinned_to(update, task))
+        task_cache.invalidate(task['id'])
+    except ClientError as e:
+        # Someone else changed the task; its next write or claim fixes it
+        if not is_conditional_check_failure(e):
+            raise
 
 
-def get_task(task_id: str) -> Dict[str, Any]:
-    """Get a specific task by ID."""
+def get_task(task_id: str, event: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get a specific task by ID.
+    
+    Honors If-None-Match: when the client already holds the current
+    version, a bodiless 304 is returned. Reads are served from the warm
+    container's cache when possible. A ``fields`` query parameter limits
+    the attributes read and returned.
+    """
+    event = event or {}
+    
     try:
-        response = table.get_item(Key={'id': task_id})
+        fields = parse_fields((event.get('queryStringParameters') or {}).get('fields'))
+    except ValueError as e:
+        return error_response(400, str(e))
+    
+    try:
+        task = task_cache.get(task_id)
+        if CACHE_STATS_INTERVAL > 0 and (task_cache.hits + task_cache.misses) % CACHE_STATS_INTERVAL == 0:
+            print(f"Task cache: {task_cache.stats()}")
         
-        if 'Item' not in response:
-            return error_response(404, "Task not found")
+        if task is None:
+            params: Dict[str, Any] = {'Key': {'id': task_id}}
+            if fields:
+                # Partial items are not cached, since the cache serves whole tasks
+                params.update(projection_params(set(fields) | {'version', 'deleted_at'}))
+            response = table.get_item(**params)
+            
+            if 'Item' not in response or is_tombstone(response['Item']):
+                return error_response(404, "Task not found")
+            
+            task = response['Item']
+            if not fields:
+                task_cache.put(task_id, task)
+        
+        etag = task_etag(task, fields_tag(fields))
+        if etag_matches(get_header(event, 'If-None-Match'), etag):
+            return not_modified_response(etag, etag_headers(etag))
         
-        return success_response(200, {'task': response['Item']})
+        return success_response(200, {'task': select_fields(task, fields)}, headers=etag_headers(etag))
         
     except Exception as e:
         print(f"Error getting task: {str(e)}")
         return error_response(500, "Failed to get task")
 
 
-def list_tasks() -> Dict[str, Any]:
-    """List all tasks."""
+def list_tasks(event: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    List one page of tasks, optionally filtered.
+    
+    Args:
+        event: API Gateway event; query string parameters ``limit``,
+            ``cursor``, ``status``, ``priority``, ``created_after``,
+            ``due_before`` and ``fields`` are honored, as is If-None-Match.
+            ``ids`` switches to a batch lookup (see get_tasks_batch),
+            ``since`` to a delta sync (see sync_tasks) and ``view=recent``
+            to the recent tasks snapshot (see list_recent_tasks)
+        
+    Returns:
+        API Gateway response with the page and an opaque ``next_cursor``
+    """
+    event = event or {}
+    query_params = event.get('queryStringParameters') or {}
+    
+    if 'ids' in query_params:
+        return get_tasks_batch(query_params['ids'], event)
+    if 'since' in query_params:
+        return sync_tasks(query_params)
+    if 'view' in query_params:
+        if query_params['view'] != 'recent':
+            return error_response(400, "view must be 'recent'")
+        return list_recent_tasks(event)
+    
     try:
-        # Get query parameters for filtering
-        # In a real app, you'd add pagination and filtering here
+        limit = parse_limit(query_params.get('limit'))
+        plan = plan_task_query(query_params)
+    except ValueError as e:
+        return error_response(400, str(e))
+    
+    start_key = None
+    if query_params.get('cursor'):
+        try:
+            start_key = decode_cursor(query_params['cursor'], get_cursor_secret(), scope=plan.scope)
+        except InvalidCursorError:
+            return error_response(400, "Invalid cursor")
+    
+    try:
+        tasks, last_key = execute_page(table, plan, limit, start_key)
         
-        response = table.scan()
-        tasks = response.get('Items', [])
+        # Index queries come back newest first; scanned pages need sorting
+        if not plan.sorted_by_index:
+            tasks.sort(key=lambda x: x.get('created_at', ''), reverse=True)
         
-        # Sort by creation date (newest first)
-        tasks.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        next_cursor = encode_cursor(last_key, get_cursor_secret(), scope=plan.scope) if last_key else None
         
-        return success_response(200, {
+        # Compare before encoding so unchanged pages skip serialization
+        etag = collection_etag(tasks, next_cursor, fields_tag(plan.fields))
+        if etag_matches(get_header(event, 'If-None-Match'), etag):
+            return not_modified_response(etag, etag_headers(etag))
+        
+        tasks = [select_fields(task, plan.fields) for task in tasks]
+        
+        return list_response({
             'tasks': tasks,
-            'count': len(tasks)
-        })
+            'count': len(tasks),
+            'next_cursor': next_cursor
+        }, etag)
         
     except Exception as e:
         print(f"Error listing tasks: {str(e)}")
         return error_response(500, "Failed to list tasks")
 
 
-def update_task(task_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
-    """Update an existing task."""
+def list_recent_tasks(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    List the newest tasks (``GET /tasks?view=recent``).
+    
+    Served with one GetItem from the snapshot the stream processor keeps in
+    the meta table. The snapshot trails writes by the stream's delay; when it
+    cannot answer (not configured, or too few tasks left after deletes) the
+    request is served like a plain listing.
+    """
+    query_params = event.get('queryStringParameters') or {}
+    fallback = dict(event, queryStringParameters={
+        name: value for name, value in query_params.items() if name != 'view'
+    })
+    if meta_table is None:
+        return list_tasks(fallback)
+    
     try:
-        # Parse request body
-        body = json.loads(event.get('body', '{}'))
+        limit = parse_limit(query_params.get('limit'))
+        fields = parse_fields(query_params.get('fields'))
+    except ValueError as e:
+        return error_response(400, str(e))
+    
+    try:
+        snapshot = RecentTasks.from_item(meta_table.get_item(Key=RECENT_KEY).get('Item'))
+        tasks = snapshot.newest(limit)
+        if tasks is None:
+            return list_tasks(fallback)
         
-        # Check if task exists
-        existing_response = table.get_item(Key={'id': task_id})
-        if 'Item' not in existing_response:
-            return error_response(404, "Task not found")
+        etag = collection_etag(tasks, fields_tag(fields))
+        if etag_matches(get_header(event, 'If-None-Match'), etag):
+            return not_modified_response(etag, etag_headers(etag))
+        
+        return list_response({
+            'tasks': [select_fields(task, fields) for task in tasks],
+            'count': len(tasks),
+            'next_cursor': None
+        }, etag)
+        
+    except Exception as e:
+        print(f"Error listing recent tasks: {str(e)}")
+        return error_response(500, "Failed to list tasks")
+
+
+def search_tasks(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Search tasks by keywords (``GET /tasks/search?q=``).
+    
+    Every word of ``q`` must match the start of a word in the task's title
+    or description. Matches come back best first, each with its ``score``,
+    and are read from the search postings the stream processor maintains,
+    so they trail writes by the stream delay.
+    """
+    if meta_table is None:
+        return error_response(501, "Task search is not enabled")
+    
+    query_params = event.get('queryStringParameters') or {}
+    try:
+        terms = parse_query(query_params.get('q'))
+        limit = parse_limit(query_params.get('limit'))
+        fields = parse_fields(query_params.get('fields'))
+    except ValueError as e:
+        return error_response(400, str(e))
+    
+    try:
+        ranked, truncated = search(meta_table, terms, read_stats(meta_table)['total'])
+        
+        # Postings can outlive a task briefly; read a few extra to fill the page
+        scores = dict(ranked[:limit * 2])
+        found, _ = get_all(
+            table,
+            [{'id': task_id} for task_id in scores],
+            max_workers=BATCH_GET_CONCURRENCY
+        ) if scores else ([], [])
+        tasks = sorted(
+            (task for task in found if not is_tombstone(task)),
+            key=lambda task: (scores[task['id']], task['id']),
+            reverse=True
+        )[:limit]
+        
+        return success_response(200, {
+            'tasks': [dict(select_fields(task, fields), score=round(scores[task['id']], 4)) for task in tasks],
+            'count': len(tasks),
+            'total_matches': len(ranked),
+            'truncated': truncated
+        }, headers={'Cache-Control': 'no-cache'})
+        
+    except Exception as e:
+        print(f"Error searching tasks: {str(e)}")
+        return error_response(500, "Failed to search tasks")
+
+
+def get_tasks_batch(ids_param: str, event: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get many tasks by ID (``GET /tasks?ids=a,b,c``).
+    
+    Cached tasks are served from the warm container; the rest are read with
+    BatchGetItem in 100-key chunks fetched concurrently. The response holds
+    one result per requested ID, in request order: 200 with the task (as
+    returned by ``get_task``, honoring ``fields``), 404 for a missing task,
+    or 503 if the read kept being throttled.
+    """
+    event = event or {}
+    ids = [task_id.strip() for task_id in (ids_param or '').split(',') if task_id.strip()]
+    if not ids:
+        return error_response(400, "ids must list at least one task ID")
+    unique_ids = list(dict.fromkeys(ids))
+    if len(unique_ids) > BATCH_GET_MAX_IDS:
+        return error_response(400, f"At most {BATCH_GET_MAX_IDS} tasks can be fetched per request")
+    try:
+        fields = parse_fields((event.get('queryStringParameters') or {}).get('fields'))
+    except ValueError as e:
+        return error_response(400, str(e))
+    
+    try:
+        tasks: Dict[str, Dict[str, Any]] = {}
+        for task_id in unique_ids:
+            task = task_cache.get(task_id)
+            if task is not None:
+                tasks[task_id] = task
         
-        existing_task = existing_response['Item']
-        
-        # Update fields
-        update_expression = "SET #updated_at = :updated_at"
-        expression_values = {':updated_at': datetime.now(timezone.utc).isoformat()}
-        expression_names = {'#updated_at': 'updated_at'}
-        
-        # Fields that can be updated
-        updatable_fields = ['title', 'description', 'status', 'priority', 'due_date']
-        
-        for field in updatable_fields:
-            if field in body:
-                # Use expression attribute names for reserved keywords
-                attr_name = f"#{field}"
-                attr_value = f":{field}"
-                update_expression += f", {attr_name} = {attr_value}"
-                expression_values[attr_value] = body[field]
-                expression_names[attr_name] = field
-        
-        # Update in DynamoDB
-        table.update_item(
-            Key={'id': task_id},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_values,
-            ExpressionAttributeNames=expression_names,
-            ReturnValues="ALL_NEW"
+        to_fetch = [{'id': task_id} for task_id in unique_ids if task_id not in tasks]
+        unprocessed_ids = set()
+        if to_fetch:
+            projection = projection_params(set(fields) | {'version', 'deleted_at'}) if fields else {}
+            items, unprocessed = get_all(table, to_fetch, max_workers=BATCH_GET_CONCURRENCY, **projection)
+            for item in items:
+                if is_tombstone(item):
+                    continue
+                tasks[item['id']] = item
+                if not fields:
+                    task_cache.put(item['id'], item)
+            unprocessed_ids = {key['id'] for key in unprocessed}
+        
+        results = []
+        for task_id in ids:
+            if task_id in tasks:
+                results.append({'id': task_id, 'status': 200, 'task': select_fields(tasks[task_id], fields)})
+            elif task_id in unprocessed_ids:
+                results.append({'id': task_id, 'status': 503, 'error': "Task could not be read, retry later"})
+            else:
+                results.append({'id': task_id, 'status': 404, 'error': "Task not found"})
+        
+        etag = collection_etag(
+            [tasks[result['id']] for result in results if result['status'] == 200],
+            fields_tag(fields),
+            *[f"{result['id']}:{result['status']}" for result in results if result['status'] != 200]
         )
+        if not unprocessed_ids and etag_matches(get_header(event, 'If-None-Match'), etag):
+            return not_modified_response(etag, etag_headers(etag))
+        
+        found = sum(1 for result in results if result['status'] == 200)
+        return success_response(200, {
+            'results': results,
+            'found': found,
+            'missing': len(results) - found
+        }, headers=etag_headers(etag))
+        
+    except Exception as e:
+        print(f"Error getting tasks: {str(e)}")
+        return error_response(500, "Failed to get tasks")
+
+
+def sync_tasks(query_params: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Return the tasks changed since a checkpoint (``GET /tasks?since=<token>``).
+    
+    An empty ``since`` returns no changes, only a token for the current
+    time; take it before the first listing. Later calls return the tasks
+    created or updated after the token's checkpoint, the ids of deleted
+    tasks (from their tombstones), and a ``next_token``. Changes are read
+    from UpdatedIndex by merging its shards in ``updated_at`` order, so the
+    work is proportional to the number of changes. While ``has_more`` is
+    true, call again with ``next_token`` to read the rest.
+    
+    Tokens whose checkpoint is older than the tombstone TTL are rejected
+    with 410, as deletes may have expired; clients then reload the list.
+    Changes near the checkpoint may be returned twice; apply them by id.
+    """
+    try:
+        limit = parse_limit(query_params.get('limit'))
+    except ValueError as e:
+        return error_response(400, str(e))
+    
+    now = datetime.now(timezone.utc)
+    token = query_params.get('since')
+    if not token:
+        return success_response(200, {
+            'tasks': [],
+            'deleted': [],
+            'next_token': encode_cursor({'since': now.isoformat()}, get_cursor_secret(), scope=SYNC_SCOPE),
+            'has_more': False
+        }, headers={'Cache-Control': 'no-store'})
+    
+    try:
+        state = decode_cursor(token, get_cursor_secret(), scope=SYNC_SCOPE)
+        since = state['since']
+        if 'positions' in state:
+            lower = state['from']
+        else:
+            lower = (
+                datetime.fromisoformat(since) - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+            ).isoformat()
+        expired = datetime.fromisoformat(lower) < now - timedelta(seconds=TOMBSTONE_TTL_SECONDS)
+    except (InvalidCursorError, KeyError, TypeError, ValueError):
+        return error_response(400, "Invalid since token")
+    if expired:
+        return error_response(410, "Sync token expired; reload the task list")
+    
+    try:
+        items, positions = merge_shard_queries(
+            table,
+            {
+                'IndexName': 'UpdatedIndex',
+                'KeyConditionExpression': '#shard = :shard AND #updated_at > :from',
+                'ExpressionAttributeNames': {'#shard': 'shard', '#updated_at': 'updated_at'},
+                'ExpressionAttributeValues': {':from': lower},
+                'ScanIndexForward': True
+            },
+            'shard',
+            'updated_at',
+            {str(shard): shard for shard in range(TASK_SHARDS)},
+            limit,
+            positions=state.get('positions')
+        )
+        
+        high_water = max([since] + [item['updated_at'] for item in items])
+        next_state: Dict[str, Any] = {'since': high_water}
+        if positions:
+            next_state.update({'from': lower, 'positions': positions})
+        
+        return success_response(200, {
+            'tasks': [select_fields(item, TASK_FIELDS) for item in items if not is_tombstone(item)],
+            'deleted': [
+                {'id': item['id'], 'deleted_at': item['deleted_at']}
+                for item in items if is_tombstone(item)
+            ],
+            'next_token': encode_cursor(next_state, get_cursor_secret(), scope=SYNC_SCOPE),
+            'has_more': positions is not None
+        }, headers={'Cache-Control': 'no-store'})
+        
+    except Exception as e:
+        print(f"Error syncing tasks: {str(e)}")
+        return error_response(500, "Failed to sync tasks")
+
+
+def export_tasks(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Export tasks as NDJSON (``GET /tasks/export``), one bounded chunk per request.
+    
+    Lambda's Python runtime cannot stream responses, so each request scans
+    page by page into an incrementally encoded (and, if accepted, gzip or
+    brotli compressed) body until EXPORT_MAX_BYTES is reached. Memory stays
+    bounded by the chunk size rather than the table size. When more tasks
+    remain, the ``X-Next-Cursor`` header carries the cursor for the next
+    chunk. ``segment`` and ``total_segments`` split the export into
+    independent streams that clients can fetch in parallel.
+    """
+    query_params = event.get('queryStringParameters') or {}
+    
+    try:
+        total_segments = int(query_params.get('total_segments', '1'))
+        segment = int(query_params.get('segment', '0'))
+    except ValueError:
+        return error_response(400, "segment and total_segments must be integers")
+    if not 1 <= total_segments <= 1000000 or not 0 <= segment < total_segments:
+        return error_response(400, "segment must be between 0 and total_segments - 1")
+    
+    scope = f"export:{segment}/{total_segments}"
+    start_key = None
+    if query_params.get('cursor'):
+        try:
+            start_key = decode_cursor(query_params['cursor'], get_cursor_secret(), scope=scope)
+        except InvalidCursorError:
+            return error_response(400, "Invalid cursor")
+    
+    try:
+        writer = NDJSONWriter(negotiate_encoding(get_header(event, 'Accept-Encoding')))
+        scan_params: Dict[str, Any] = {
+            'Limit': EXPORT_PAGE_SIZE,
+            'FilterExpression': 'attribute_not_exists(#deleted_at)',
+            'ExpressionAttributeNames': {'#deleted_at': 'deleted_at'}
+        }
+        if total_segments > 1:
+            scan_params.update(Segment=segment, TotalSegments=total_segments)
+        
+        largest_page = 0
+        while True:
+            if start_key:
+                scan_params['ExclusiveStartKey'] = start_key
+            response = table.scan(**scan_params)
+            size_before = writer.size
+            for item in response.get('Items', []):
+                writer.write(select_fields(item, TASK_FIELDS))
+            writer.flush()
+            start_key = response.get('LastEvaluatedKey')
+            
+            # Stop while the next page still fits under the response size limit
+            largest_page = max(largest_page, writer.size - size_before)
+            if not start_key or writer.size + largest_page > EXPORT_MAX_BYTES:
+                break
+        
+        headers = {'Content-Type': NDJSON_CONTENT_TYPE, 'Cache-Control': 'no-store'}
+        if writer.coding:
+            headers.update({'Content-Encoding': writer.coding, 'Vary': 'Accept-Encoding'})
+        if start_key:
+            headers['X-Next-Cursor'] = encode_cursor(start_key, get_cursor_secret(), scope=scope)
         
-        # Get updated item
-        updated_response = table.get_item(Key={'id': task_id})
+        # Always base64 so compress_response leaves the encoded body alone
+        return {
+            'statusCode': 200,
+            'headers': dict(API_HEADERS, **headers),
+            'body': base64.b64encode(writer.finish()).decode('ascii'),
+            'isBase64Encoded': True
+        }
+        
+    except Exception as e:
+        print(f"Error exporting tasks: {str(e)}")
+        return error_response(500, "Failed to export tasks")
+
+
+def list_response(body: Dict[str, Any], etag: str) -> Dict[str, Any]:
+    """
+    Create a list response, offloading it to S3 when it is too large.
+    
+    Bodies over LIST_OFFLOAD_BYTES are replaced by an envelope holding the
+    page metadata and a presigned ``download`` link to the full body.
+    """
+    body = dict(body, tasks=[select_fields(task, TASK_FIELDS) for task in body['tasks']])
+    response = success_response(200, body, headers=etag_headers(etag))
+    if response_store is None or len(response['body']) <= LIST_OFFLOAD_BYTES:
+        return response
+    
+    download = response_store.offload(response['body'].encode('utf-8'))
+    return success_response(200, {
+        'count': body['count'],
+        'next_cursor': body['next_cursor'],
+        'download': download
+    }, headers=etag_headers(etag))
+
+
+class TaskWriteError(Exception):
+    """
+    A task write refused for a reason the client has to act on.
+    
+    Args:
+        status_code: HTTP status to answer with (404, 409 or 412)
+        message: Error message
+    """
+    
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def update_task(task_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Update an existing task.
+    
+    Every update bumps the task's ``version``. When the request carries
+    If-Match, the write is conditional on the task still being at that
+    version, so concurrent editors get 412 instead of overwriting each other.
+    """
+    try:
+        # Parse request body
+        body = json.loads(get_body(event))
+        if not isinstance(body, dict):
+            return error_response(400, "Request body must be a JSON object")
+        
+        task = apply_task_update(task_id, body, parse_etag_list(get_header(event, 'If-Match')))
         
         return success_response(200, {
             'message': 'Task updated successfully',
-            'task': updated_response['Item']
-        })
+            'task': select_fields(task, TASK_FIELDS)
+        }, headers=etag_headers(task_etag(task)))
         
     except json.JSONDecodeError:
         return error_response(400, "Invalid JSON in request body")
+    except TaskWriteError as e:
+        return error_response(e.status_code, str(e))
     except Exception as e:
         print(f"Error updating task: {str(e)}")
         return error_response(500, "Failed to update task")
 
 
+def apply_task_update(task_id: str, body: Dict[str, Any], if_match: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Apply a partial update to a task.
+    
+    Args:
+        task_id: Task ID
+        body: Update request body; its updatable fields are set
+        if_match: Parsed If-Match entity tags, if any
+        
+    Returns:
+        The updated task
+        
+    Raises:
+        TaskWriteError: 404 for a missing task, 412 for a version If-Match
+            does not accept, 409 when concurrent writes outlasted the retries
+    """
+    update, changes, expected_versions = build_task_update(task_id, body, if_match)
+    if expected_versions == []:
+        raise TaskWriteError(412, "Task has been modified")
+    
+    counted = meta_table is not None and 'status' in changes
+    queued = TASK_QUEUE and ('status' in changes or 'priority' in changes)
+    if counted or queued:
+        return update_current_task(task_id, update, changes, expected_versions)
+    
+    try:
+        # Update in DynamoDB; the condition replaces a separate existence check
+        response = table.update_item(**update, ReturnValues="ALL_NEW")
+    except ClientError as e:
+        if not is_conditional_check_failure(e):
+            raise
+        task_cache.invalidate(task_id)
+        
+        # Only the failure path pays for telling a stale version from a missing task
+        if if_match:
+            current = table.get_item(Key={'id': task_id}).get('Item')
+            if current and not is_tombstone(current):
+                raise TaskWriteError(412, "Task has been modified")
+        raise TaskWriteError(404, "Task not found")
+    
+    task = response['Attributes']
+    task_cache.put(task_id, task)
+    return task
+
+
+def build_task_update(
+    task_id: str,
+    body: Dict[str, Any],
+    if_match: Optional[List[str]] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any], Optional[List[int]]]:
+    """
+    Build the UpdateItem parameters of a partial task update.
+    
+    Args:
+        task_id: Task ID
+        body: Update request body; its updatable fields are set
+        if_match: Parsed If-Match entity tags, if any
+        
+    Returns:
+        Tuple of (UpdateItem parameters, attributes the update sets, versions
+        accepted by If-Match or None). An empty list of versions means no
+        version can match and the update must be rejected with 412.
+    """
+    # Update fields
+    update_expression = (
+        "SET #updated_at = :updated_at, "
+        "#version = if_not_exists(#version, :zero) + :one"
+    )
+    expression_values = {
+        ':updated_at': datetime.now(timezone.utc).isoformat(),
+        ':zero': 0,
+        ':one': 1
+    }
+    expression_names = {
+        '#updated_at': 'updated_at', '#id': 'id', '#version': 'version', '#deleted_at': 'deleted_at'
+    }
+    condition_expression = "attribute_exists(#id) AND attribute_not_exists(#deleted_at)"
+    
+    expected_versions = None
+    if if_match and '*' not in if_match:
+        expected_versions = []
+        version_conditions = []
+        for i, tag in enumerate(if_match):
+            expected = version_from_etag(tag)
+            if expected == 0:
+                version_conditions.append("attribute_not_exists(#version)")
+            elif expected is not None:
+                expression_values[f':expected{i}'] = expected
+                version_conditions.append(f"#version = :expected{i}")
+            if expected is not None:
+                expected_versions.append(expected)
+        if version_conditions:
+            condition_expression += f" AND ({' OR '.join(version_conditions)})"
+    
+    # Fields that can be updated
+    changes = {field: body[field] for field in UPDATABLE_FIELDS if field in body}
+    if 'status' in changes:
+        # Keep the task in the matching StatusShardIndex partition
+        changes['status_shard'] = sharded_value(changes['status'], task_id)
+    
+    for field, value in changes.items():
+        # Use expression attribute names for reserved keywords
+        attr_name = f"#{field}"
+        attr_value = f":{field}"
+        update_expression += f", {attr_name} = {attr_value}"
+        expression_values[attr_value] = value
+        expression_names[attr_name] = field
+    
+    update = {
+        'Key': {'id': task_id},
+        'UpdateExpression': update_expression,
+        'ConditionExpression': condition_expression,
+        'ExpressionAttributeValues': expression_values,
+        'ExpressionAttributeNames': expression_names
+    }
+    return update, changes, expected_versions
+
+
+def update_current_task(
+    task_id: str,
+    update: Dict[str, Any],
+    changes: Dict[str, Any],
+    expected_versions: Optional[list]
+) -> Dict[str, Any]:
+    """
+    Apply an update that depends on the task's current state.
+    
+    Status changes move the task between counters, which are updated in
+    the same transaction, and status or priority changes move it in the work
+    queue. Both need the task as stored, so it is read first and the write
+    is pinned to the version and status read. If another writer changes the
+    task in between, the write is rejected and retried from a fresh read.
+    Transactions cannot return the written item, so it is built from the
+    read and the changes.
+    
+    Args:
+        task_id: Task ID
+        update: UpdateItem parameters built by ``build_task_update``
+        changes: Attributes the update sets
+        expected_versions: Versions accepted by If-Match, or None
+        
+    Returns:
+        The updated task
+        
+    Raises:
+        TaskWriteError: As for ``apply_task_update``
+    """
+    for _ in range(COUNTER_WRITE_ATTEMPTS):
+        current = table.get_item(Key={'id': task_id}, ConsistentRead=True).get('Item')
+        if not current or is_tombstone(current):
+            task_cache.invalidate(task_id)
+            raise TaskWriteError(404, "Task not found")
+        if expected_versions is not None and current.get('version', 0) not in expected_versions:
+            task_cache.invalidate(task_id)
+            raise TaskWriteError(412, "Task has been modified")
+        
+        task_write, task, deltas = update_of_current(current, update, changes)
+        try:
+            if meta_table is not None and deltas:
+                write_with_counters({'Update': dict(task_write, TableName=table.name)}, deltas)
+            else:
+                table.update_item(**task_write)
+        except ClientError as e:
+            if is_transaction_conflict(e) or is_conditional_check_failure(e):
+                continue
+            raise
+        
+        task_cache.put(task_id, task)
+        return task
+    
+    task_cache.invalidate(task_id)
+    raise TaskWriteError(409, "Task is being modified concurrently, retry")
+
+
+def update_of_current(
+    current: Dict[str, Any],
+    update: Dict[str, Any],
+    changes: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, int]]:
+    """
+    Pin an update to the task as read.
+    
+    Args:
+        current: Task as stored
+        update: UpdateItem parameters built by ``build_task_update``
+        changes: Attributes the update sets
+        
+    Returns:
+        Tuple of (UpdateItem parameters pinned to the read version and
+        status, including queue changes; the task as the write leaves it;
+        counter deltas of the update)
+    """
+    sets, removes = queue_changes(current, dict(current, **changes)) if TASK_QUEUE else ({}, [])
+    task_write = pinned_to(with_changes(update, sets, removes), current)
+    deltas = task_deltas(current, changes.get('status', current.get('status')))
+    
+    task = dict(current, **changes, **sets)
+    for name in removes:
+        del task[name]
+    task['updated_at'] = update['ExpressionAttributeValues'][':updated_at']
+    task['version'] = current.get('version', 0) + 1
+    return task_write, task, deltas
+
+
+def update_tasks_batch(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply partial updates to many tasks in one request.
+    
+    Expects ``{"updates": [{"id": ..., "if_match": ..., <fields>}, ...]}``,
+    where ``if_match`` is an optional ETag and the fields are those of
+    ``PUT /tasks/{id}``. By default the batch is atomic: every task is read
+    with one consistent BatchGetItem and all updates, with their counter
+    changes, are written in one TransactWriteItems call, so either all of
+    them are applied or none is. With ``"atomic": false`` each update is
+    applied on its own like ``update_task``, BATCH_UPDATE_CONCURRENCY at a
+    time.
+    
+    The response reports a result per update, in request order: 200 with
+    the task, or 400, 404, 409, 412 or 503 with the error. When an atomic
+    batch fails, the updates that did not cause it get 424. The status is
+    200 when every update was applied, 207 otherwise.
+    """
+    try:
+        body = json.loads(get_body(event))
+    except json.JSONDecodeError:
+        return error_response(400, "Invalid JSON in request body")
+    
+    updates = body.get('updates') if isinstance(body, dict) else None
+    if not isinstance(updates, list) or not updates:
+        return error_response(400, "Body must contain a non-empty 'updates' list")
+    if len(updates) > BATCH_UPDATE_MAX_TASKS:
+        return error_response(400, f"At most {BATCH_UPDATE_MAX_TASKS} tasks can be updated per request")
+    atomic = body.get('atomic', True)
+    if not isinstance(atomic, bool):
+        return error_response(400, "atomic must be true or false")
+    
+    ids = [entry.get('id') for entry in updates if isinstance(entry, dict) and isinstance(entry.get('id'), str)]
+    duplicates = sorted({task_id for task_id in ids if ids.count(task_id) > 1})
+    if duplicates:
+        return error_response(400, f"Each task can be updated once per request: {', '.join(duplicates)}")
+    if atomic:
+        # One transaction holds every update, plus the counter shard when statuses change
+        counted = meta_table is not None and any(isinstance(entry, dict) and 'status' in entry for entry in updates)
+        atomic_limit = TRANSACT_MAX_ITEMS - 1 if counted else TRANSACT_MAX_ITEMS
+        if len(updates) > atomic_limit:
+            return error_response(400, (
+                f"An atomic batch {'changing statuses ' if counted else ''}can update at most "
+                f"{atomic_limit} tasks; send \"atomic\": false to update more"
+            ))
+    
+    try:
+        results: List[Dict[str, Any]] = []
+        requests = []
+        for index, entry in enumerate(updates):
+            try:
+                requests.append((index, *parse_batch_update(entry)))
+            except ValueError as e:
+                results.append({'index': index, 'status': 400, 'error': str(e)})
+        
+        if not atomic:
+            with ThreadPoolExecutor(max_workers=min(BATCH_UPDATE_CONCURRENCY, len(requests) or 1)) as pool:
+                results.extend(pool.map(lambda request: apply_batch_update(*request), requests))
+        elif results:
+            results.extend(not_applied(index, task_id) for index, task_id, _, _ in requests)
+        else:
+            results = update_tasks_atomically(requests)
+        results.sort(key=lambda result: result['index'])
+        
+        updated = sum(1 for result in results if result['status'] == 200)
+        return success_response(200 if updated == len(results) else 207, {
+            'updated': updated,
+            'failed': len(results) - updated,
+            'results': results
+        })
+        
+    except Exception as e:
+        print(f"Error updating tasks: {str(e)}")
+        return error_response(500, "Failed to update tasks")
+
+
+def parse_batch_update(entry: Any) -> Tuple[str, Dict[str, Any], Optional[str]]:
+    """
+    Validate one entry of a batch update.
+    
+    Returns:
+        Tuple of (task ID, update fields, If-Match value or None)
+    
+    Raises:
+        ValueError: If the entry is not a valid update
+    """
+    if not isinstance(entry, dict):
+        raise ValueError("Update must be a JSON object")
+    task_id = entry.get('id')
+    if not isinstance(task_id, str) or not task_id:
+        raise ValueError("id is required")
+    if_match = entry.get('if_match')
+    if if_match is not None and not isinstance(if_match, str):
+        raise ValueError("if_match must be an ETag string")
+    fields = {field: entry[field] for field in UPDATABLE_FIELDS if field in entry}
+    return task_id, fields, if_match
+
+
+def apply_batch_update(index: int, task_id: str, fields: Dict[str, Any], if_match: Optional[str]) -> Dict[str, Any]:
+    """Apply one update of a non-atomic batch exactly as ``PUT /tasks/{id}`` would."""
+    result: Dict[str, Any] = {'index': index, 'id': task_id}
+    try:
+        result.update(status=200, task=select_fields(
+            apply_task_update(task_id, fields, parse_etag_list(if_match)), TASK_FIELDS
+        ))
+    except TaskWriteError as e:
+        result.update(status=e.status_code, error=str(e))
+    except Exception as e:
+        print(f"Error updating task: {str(e)}")
+        result.update(status=500, error="Failed to update task")
+    return result
+
+
+def update_tasks_atomically(requests: List[Tuple[int, str, Dict[str, Any], Optional[str]]]) -> List[Dict[str, Any]]:
+    """
+    Apply a batch of updates in one transaction.
+    
+    Like ``update_current_task``, each write is pinned to the version and
+    status read, and the whole batch is read again and retried if another
+    writer changed one of the tasks in between.
+    
+    Args:
+        requests: (index, task ID, update fields, If-Match value) per update
+    
+    Returns:
+        Result per update
+    """
+    prepared = []
+    for index, task_id, fields, if_match in requests:
+        update, changes, expected_versions = build_task_update(task_id, fields, parse_etag_list(if_match))
+        prepared.append((index, task_id, update, changes, expected_versions))
+    keys = [{'id': task_id} for _, task_id, _, _, _ in prepared]
+    
+    failures: Dict[int, Tuple[int, str]] = {}
+    for _ in range(COUNTER_WRITE_ATTEMPTS):
+        items, unprocessed = get_all(table, keys, ConsistentRead=True)
+        stored = {item['id']: item for item in items}
+        unread = {key['id'] for key in unprocessed}
+        
+        failures = {}
+        writes, tasks, deltas = [], [], []
+        for index, task_id, update, changes, expected_versions in prepared:
+            current = stored.get(task_id)
+            if task_id in unread:
+                failures[index] = (503, "Task could not be read, retry later")
+            elif not current or is_tombstone(current):
+                failures[index] = (404, "Task not found")
+            elif expected_versions is not None and current.get('version', 0) not in expected_versions:
+                failures[index] = (412, "Task has been modified")
+            else:
+                task_write, task, task_deltas = update_of_current(current, update, changes)
+                writes.append({'Update': dict(task_write, TableName=table.name)})
+                tasks.append(task)
+                deltas.append(task_deltas)
+        if failures:
+            break
+        
+        counters = merge_deltas(deltas) if meta_table is not None else {}
+        if counters:
+            writes.append(counter_update(meta_table.name, counters))
+        try:
+            transact_write(writes)
+        except ClientError as e:
+            if not is_transaction_conflict(e):
+                raise
+            # Task writes come first, in request order
+            reasons = e.response.get('CancellationReasons', [])
+            failures = {
+                index: (409, "Task is being modified concurrently, retry")
+                for (index, _, _, _, _), reason in zip(prepared, reasons)
+                if reason.get('Code') in ('ConditionalCheckFailed', 'TransactionConflict')
+            }
+            continue
+        
+        results = []
+        for (index, task_id, _, _, _), task in zip(prepared, tasks):
+            task_cache.put(task_id, task)
+            results.append({'index': index, 'id': task_id, 'status': 200, 'task': select_fields(task, TASK_FIELDS)})
+        return results
+    
+    for _, task_id, _, _, _ in prepared:
+        task_cache.invalidate(task_id)
+    failures = failures or {
+        index: (409, "Task is being modified concurrently, retry") for index, _, _, _, _ in prepared
+    }
+    return [
+        {'index': index, 'id': task_id, 'status': failures[index][0], 'error': failures[index][1]}
+        if index in failures else not_applied(index, task_id)
+        for index, task_id, _, _, _ in prepared
+    ]
+
+
+def not_applied(index: int, task_id: str) -> Dict[str, Any]:
+    """Result of an update left out because another update of its atomic batch failed."""
+    return {'index': index, 'id': task_id, 'status': 424, 'error': "Not applied: another update in the batch failed"}
+
+
 def delete_task(task_id: str) -> Dict[str, Any]:
-    """Delete a task."""
+    """
+    Delete a task.
+    
+    The item is replaced by a tombstone so delta syncs can report the
+    delete: its content and the attributes the listing indexes are keyed on
+    are removed, ``deleted_at`` and ``updated_at`` record the delete, and the
+    ``ttl`` attribute lets DynamoDB remove it after TOMBSTONE_TTL_SECONDS.
+    """
     try:
-        # Check if task exists
-        existing_response = table.get_item(Key={'id': task_id})
-        if 'Item' not in existing_response:
-            return error_response(404, "Task not found")
+        now = datetime.now(timezone.utc)
+        # The condition replaces a separate existence check
+        delete = {
+            'Key': {'id': task_id},
+            'UpdateExpression': (
+                "SET #deleted_at = :now, #updated_at = :now, #ttl = :ttl, "
+                "#version = if_not_exists(#version, :zero) + :one "
+                "REMOVE #title, #description, #status, #priority, #due_date, #created_at, #status_shard, "
+                "#queue_shard, #queue_key, #claimed_by, #lease_expires_at, #counted"
+            ),
+            'ConditionExpression': "attribute_exists(#id) AND attribute_not_exists(#deleted_at)",
+            'ExpressionAttributeNames': {
+                '#id': 'id', '#deleted_at': 'deleted_at', '#updated_at': 'updated_at', '#ttl': 'ttl',
+                '#version': 'version', '#title': 'title', '#description': 'description',
+                '#status': 'status', '#priority': 'priority', '#due_date': 'due_date',
+                '#created_at': 'created_at', '#status_shard': 'status_shard',
+                '#queue_shard': 'queue_shard', '#queue_key': 'queue_key',
+                '#claimed_by': 'claimed_by', '#lease_expires_at': 'lease_expires_at',
+                '#counted': COUNTED_ATTRIBUTE
+            },
+            'ExpressionAttributeValues': {
+                ':now': now.isoformat(),
+                ':ttl': int(now.timestamp()) + TOMBSTONE_TTL_SECONDS,
+                ':zero': 0,
+                ':one': 1
+            }
+        }
+        if meta_table is not None:
+            return delete_counted_task(task_id, delete)
         
-        # Delete from DynamoDB
-        table.delete_item(Key={'id': task_id})
+        response = table.update_item(**delete, ReturnValues="ALL_OLD")
+        task_cache.invalidate(task_id)
         
         return success_response(200, {
             'message': 'Task deleted successfully',
-            'task_id': task_id
+            'task_id': task_id,
+            'task': select_fields(response.get('Attributes', {}), TASK_FIELDS)
         })
         
+    except ClientError as e:
+        if is_conditional_check_failure(e):
+            task_cache.invalidate(task_id)
+            return error_response(404, "Task not found")
+        print(f"Error deleting task: {str(e)}")
+        return error_response(500, "Failed to delete task")
     except Exception as e:
         print(f"Error deleting task: {str(e)}")
         return error_response(500, "Failed to delete task")
 
 
-def success_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a successful API Gateway response."""
+def delete_counted_task(task_id: str, delete: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Write a delete tombstone together with the counter update.
+    
+    Like ``update_current_task``, the task is read first and the write is
+    pinned to the version and status read, retrying if they changed in
+    between.
+    """
+    task_cache.invalidate(task_id)
+    for _ in range(COUNTER_WRITE_ATTEMPTS):
+        current = table.get_item(Key={'id': task_id}, ConsistentRead=True).get('Item')
+        if not current or is_tombstone(current):
+            return error_response(404, "Task not found")
+        
+        task_write = pinned_to(delete, current)
+        try:
+            write_with_counters(
+                {'Update': dict(task_write, TableName=table.name)},
+                task_deltas(current, None)
+            )
+        except ClientError as e:
+            if is_transaction_conflict(e):
+                continue
+            raise
+        
+        return success_response(200, {
+            'message': 'Task deleted successfully',
+            'task_id': task_id,
+            'task': select_fields(current, TASK_FIELDS)
+        })
+    
+    return error_response(409, "Task is being modified concurrently, retry")
+
+
+def pinned_to(write: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Make a task write conditional on the task's version, status and counted
+    state being unchanged.
+    """
+    names = dict(write['ExpressionAttributeNames'], **{
+        '#version': 'version', '#status': 'status', '#counted': COUNTED_ATTRIBUTE
+    })
+    values = dict(write['ExpressionAttributeValues'])
+    conditions = [write['ConditionExpression']]
+    for name, placeholder in (
+        ('version', ':read_version'), ('status', ':read_status'), (COUNTED_ATTRIBUTE, ':read_counted')
+    ):
+        if name in current:
+            conditions.append(f"#{name} = {placeholder}")
+            values[placeholder] = current[name]
+        else:
+            conditions.append(f"attribute_not_exists(#{name})")
+    return dict(
+        write,
+        ConditionExpression=' AND '.join(conditions),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values
+    )
+
+
+def with_changes(write: Dict[str, Any], sets: Dict[str, Any], removes: List[str]) -> Dict[str, Any]:
+    """Add attribute assignments and removals to an UpdateItem's SET expression."""
+    if not sets and not removes:
+        return write
+    expression = write['UpdateExpression']
+    names = dict(write['ExpressionAttributeNames'])
+    values = dict(write['ExpressionAttributeValues'])
+    for name, value in sets.items():
+        expression += f", #{name} = :{name}"
+        names[f"#{name}"] = name
+        values[f":{name}"] = value
+    if removes:
+        expression += " REMOVE " + ", ".join(f"#{name}" for name in removes)
+        names.update({f"#{name}": name for name in removes})
+    return dict(write, UpdateExpression=expression, ExpressionAttributeNames=names, ExpressionAttributeValues=values)
+
+
+def write_with_counters(task_write: Dict[str, Any], deltas: Dict[str, int]) -> None:
+    """Apply a task write and its counter deltas in one transaction."""
+    items = [task_write]
+    if deltas:
+        items.append(counter_update(meta_table.name, deltas))
+    transact_write(items)
+
+
+def get_task_stats() -> Dict[str, Any]:
+    """
+    Get task counts in total and per status.
+    
+    The counters are maintained by every task write, so this is a single
+    Query over the counter shards however many tasks there are.
+    """
+    if meta_table is None:
+        return error_response(501, "Task statistics are not enabled")
+    
+    try:
+        return success_response(200, read_stats(meta_table), headers={'Cache-Control': 'no-cache'})
+    except Exception as e:
+        print(f"Error getting task stats: {str(e)}")
+        return error_response(500, "Failed to get task stats")
+
+
+def is_tombstone(item: Dict[str, Any]) -> bool:
+    """Check whether an item is the tombstone of a deleted task."""
+    return 'deleted_at' in item
+
+
+def is_conditional_check_failure(error: ClientError) -> bool:
+    """Check whether a DynamoDB error was caused by a failed ConditionExpression."""
+    return error.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """Headers that publish an ETag and make browsers revalidate with it."""
     return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
-        'body': json.dumps(body)
+        'ETag': etag,
+        'Cache-Control': 'no-cache'
     }
 
 
+def success_response(
+    status_code: int,
+    body: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """Create a successful API Gateway response."""
+    return json_response(status_code, body, headers=headers)
+
+
 def error_response(status_code: int, message: str) -> Dict[str, Any]:
     """Create an error API Gateway response."""
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
-        'body': json.dumps({
-            'error': message,
-            'status_code': status_code
-        })
-    } 
\ No newline at end of file
+    return json_response(status_code, {
+        'error': message,
+        'status_code': status_code
+    })
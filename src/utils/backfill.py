@@ -0,0 +1,129 @@
+"""
+Backfills of derived attributes
+
+Attributes that only new writes set (write shards, for example) have to be
+added to existing items before an index built on them is complete. A
+backfill reads the table with a ParallelScan and updates each item whose
+derived values differ from what is stored.
+"""
+
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+from botocore.exceptions import ClientError
+
+from utils.scan import ParallelScan, DEFAULT_SEGMENTS
+
+
+def backfill(
+    table: Any,
+    derive: Callable[[Dict[str, Any]], Dict[str, Any]],
+    attributes: Iterable[str],
+    segments: int = DEFAULT_SEGMENTS,
+    capacity_per_second: Optional[float] = None,
+    pinned: Iterable[str] = (),
+    attempts: int = 3
+) -> Dict[str, Any]:
+    """
+    Set derived attributes on every item of a table.
+
+    Updates are conditional on the item still existing, so items deleted
+    while the backfill runs are not recreated, and on the ``pinned``
+    attributes still holding the values scanned, so an item written in
+    between does not get attributes derived from its older state: it is
+    read again and derived anew. Running it again only rewrites items that
+    changed in between.
+
+    Args:
+        table: DynamoDB Table
+        derive: Returns the attributes an item should have
+        attributes: Attributes ``derive`` reads plus those it sets; only
+            these (and ``id``) are scanned
+        segments: Parallel scan segments
+        capacity_per_second: Optional read-capacity budget for the scan
+        pinned: Attributes every write changes (a version, say) that an
+            update must find as scanned
+        attempts: Updates per item before an item that keeps changing is
+            skipped
+
+    Returns:
+        Counts of ``scanned``, ``updated`` and ``skipped`` items, plus the
+        scan's stats
+    """
+    pinned = sorted(set(pinned))
+    read = sorted(set(attributes) | set(pinned) | {'id'})
+    projection = {
+        'ProjectionExpression': ', '.join(f"#{name}" for name in read),
+        'ExpressionAttributeNames': {f"#{name}": name for name in read}
+    }
+    scan = ParallelScan(
+        table,
+        segments=segments,
+        projection_expression=projection['ProjectionExpression'],
+        expression_attribute_names=projection['ExpressionAttributeNames'],
+        capacity_per_second=capacity_per_second
+    )
+
+    counts = {'scanned': 0, 'updated': 0, 'skipped': 0}
+    for item in scan:
+        counts['scanned'] += 1
+        outcome = _backfill_item(table, item, derive, pinned, projection, attempts)
+        if outcome is not None:
+            counts[outcome] += 1
+
+    return dict(counts, scan=scan.stats)
+
+
+def _backfill_item(
+    table: Any,
+    item: Dict[str, Any],
+    derive: Callable[[Dict[str, Any]], Dict[str, Any]],
+    pinned: List[str],
+    projection: Dict[str, Any],
+    attempts: int
+) -> Optional[str]:
+    """Update one item, deriving again from a fresh read after a concurrent write."""
+    for _ in range(attempts):
+        changes = {
+            name: value for name, value in derive(item).items()
+            if item.get(name) != value
+        }
+        if not changes:
+            return None
+        if _update_derived(table, item, changes, pinned):
+            return 'updated'
+        item = table.get_item(Key={'id': item['id']}, ConsistentRead=True, **projection).get('Item')
+        if item is None:
+            return 'skipped'
+    return 'skipped'
+
+
+def _update_derived(table: Any, item: Dict[str, Any], changes: Dict[str, Any], pinned: List[str]) -> bool:
+    """Write derived attributes unless the item is gone or a pinned attribute changed."""
+    names = {'#id': 'id'}
+    values = {}
+    assignments = []
+    for i, (name, value) in enumerate(sorted(changes.items())):
+        names[f"#a{i}"] = name
+        values[f":v{i}"] = value
+        assignments.append(f"#a{i} = :v{i}")
+    conditions = ['attribute_exists(#id)']
+    for i, name in enumerate(pinned):
+        names[f"#p{i}"] = name
+        if name in item:
+            values[f":p{i}"] = item[name]
+            conditions.append(f"#p{i} = :p{i}")
+        else:
+            conditions.append(f"attribute_not_exists(#p{i})")
+    try:
+        table.update_item(
+            Key={'id': item['id']},
+            UpdateExpression='SET ' + ', '.join(assignments),
+            ConditionExpression=' AND '.join(conditions),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+    return True
@@ -0,0 +1,140 @@
+"""
+Batch read and write helpers for DynamoDB
+
+BatchWriteItem takes at most 25 requests and BatchGetItem at most 100 keys,
+and either may process only part of a call, returning the rest as
+UnprocessedItems / UnprocessedKeys (typically when a partition is being
+throttled). write_all and get_all chunk their input, retry the unprocessed
+part with exponential backoff and full jitter, and report what could not be
+processed.
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_BASE_DELAY = 0.05
+DEFAULT_MAX_DELAY = 2.0
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    """Split a list into consecutive chunks of at most ``size`` items."""
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Exponential backoff with full jitter for a 1-based retry attempt."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def write_chunk(
+    table: Any,
+    requests: List[Dict[str, Any]],
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    base_delay: float = DEFAULT_BASE_DELAY,
+    max_delay: float = DEFAULT_MAX_DELAY,
+    sleep: Optional[Callable[[float], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Write up to 25 requests, retrying UnprocessedItems.
+
+    Returns:
+        Requests still unprocessed after ``max_attempts`` calls
+    """
+    pending = requests
+    for attempt in range(1, max_attempts + 1):
+        pending = table.batch_write(pending)['UnprocessedItems']
+        if not pending:
+            break
+        if attempt < max_attempts:
+            (sleep or time.sleep)(backoff_delay(attempt, base_delay, max_delay))
+    return pending
+
+
+def write_all(
+    table: Any,
+    requests: List[Dict[str, Any]],
+    max_workers: int = 1,
+    **retry: Any
+) -> List[Dict[str, Any]]:
+    """
+    Write any number of put/delete requests in 25-request chunks.
+
+    Args:
+        table: Table exposing ``batch_write`` (see utils.dynamodb.DynamoTable)
+        requests: ``{'PutRequest': ...}`` / ``{'DeleteRequest': ...}`` entries
+        max_workers: Chunks written concurrently
+        retry: Overrides for write_chunk's retry settings
+
+    Returns:
+        Requests that could not be written
+    """
+    chunks = chunked(requests, BATCH_WRITE_SIZE)
+    if max_workers <= 1 or len(chunks) <= 1:
+        results = [write_chunk(table, chunk, **retry) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+            results = list(pool.map(lambda chunk: write_chunk(table, chunk, **retry), chunks))
+    return [request for failed in results for request in failed]
+
+
+def get_chunk(
+    table: Any,
+    keys: List[Dict[str, Any]],
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    base_delay: float = DEFAULT_BASE_DELAY,
+    max_delay: float = DEFAULT_MAX_DELAY,
+    sleep: Optional[Callable[[float], None]] = None,
+    **params: Any
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Read up to 100 keys, retrying UnprocessedKeys.
+
+    Returns:
+        (items found, keys still unprocessed after ``max_attempts`` calls)
+    """
+    items: List[Dict[str, Any]] = []
+    pending = keys
+    for attempt in range(1, max_attempts + 1):
+        response = table.batch_get(pending, **params)
+        items.extend(response['Items'])
+        pending = response['UnprocessedKeys']
+        if not pending:
+            break
+        if attempt < max_attempts:
+            (sleep or time.sleep)(backoff_delay(attempt, base_delay, max_delay))
+    return items, pending
+
+
+def get_all(
+    table: Any,
+    keys: List[Dict[str, Any]],
+    max_workers: int = 1,
+    **options: Any
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Read any number of keys in 100-key chunks.
+
+    Args:
+        table: Table exposing ``batch_get`` (see utils.dynamodb.DynamoTable)
+        keys: Primary keys; must not contain duplicates
+        max_workers: Chunks fetched concurrently
+        options: Overrides for get_chunk's retry settings, plus BatchGetItem
+            parameters such as ProjectionExpression
+
+    Returns:
+        (items found in no particular order, keys that could not be read)
+    """
+    chunks = chunked(keys, BATCH_GET_SIZE)
+    if max_workers <= 1 or len(chunks) <= 1:
+        results = [get_chunk(table, chunk, **options) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+            results = list(pool.map(lambda chunk: get_chunk(table, chunk, **options), chunks))
+    items = [item for found, _ in results for item in found]
+    unprocessed = [key for _, failed in results for key in failed]
+    return items, unprocessed
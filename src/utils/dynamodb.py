@@ -0,0 +1,241 @@
+"""
+DynamoDB access for Lambda handlers
+
+Uses a lazily created, module-cached low-level client instead of the
+boto3 resource layer, which is slow to import and adds per-call overhead.
+Items are converted with TypeSerializer/TypeDeserializer, so callers keep
+working with plain Python values.
+"""
+
+import os
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+from botocore.exceptions import ClientError
+
+from utils.batch import backoff_delay
+
+_client = None
+_serializer = None
+_deserializer = None
+
+# Request parameters carrying Python values that must be serialized
+_ITEM_PARAMS = ('Key', 'Item', 'ExclusiveStartKey')
+_VALUES_PARAM = 'ExpressionAttributeValues'
+
+# Operations per TransactWriteItems call
+TRANSACT_MAX_ITEMS = 100
+
+# Calls per transaction when it is cancelled by a conflicting transaction,
+# with exponential backoff and full jitter in between
+TRANSACT_MAX_ATTEMPTS = int(os.environ.get('TRANSACT_MAX_ATTEMPTS', '4'))
+TRANSACT_BASE_DELAY = 0.02
+TRANSACT_MAX_DELAY = 0.5
+
+# Response fields carrying DynamoDB-typed values that must be deserialized
+_ITEM_FIELDS = ('Item', 'Attributes', 'LastEvaluatedKey')
+_ITEMS_FIELD = 'Items'
+
+
+def get_client() -> Any:
+    """
+    Return the shared low-level DynamoDB client, creating it on first use.
+
+    boto3 is imported here rather than at module import so that it is only
+    paid for by invocations that touch DynamoDB.
+    """
+    global _client
+    if _client is None:
+        import boto3
+        from botocore.config import Config
+
+        _client = boto3.client('dynamodb', config=Config(
+            max_pool_connections=int(os.environ.get('DYNAMODB_MAX_POOL_CONNECTIONS', '25')),
+            tcp_keepalive=True,
+            connect_timeout=2,
+            read_timeout=5,
+            retries={
+                'mode': 'adaptive',
+                'max_attempts': int(os.environ.get('DYNAMODB_MAX_ATTEMPTS', '5'))
+            }
+        ))
+    return _client
+
+
+def _converters() -> tuple:
+    global _serializer, _deserializer
+    if _serializer is None:
+        from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+        _serializer = TypeSerializer()
+        _deserializer = TypeDeserializer()
+    return _serializer, _deserializer
+
+
+def serialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Python dict to DynamoDB attribute values."""
+    serializer = _converters()[0]
+    return {key: serializer.serialize(value) for key, value in item.items()}
+
+
+def deserialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert DynamoDB attribute values to a Python dict."""
+    deserializer = _converters()[1]
+    return {key: deserializer.deserialize(value) for key, value in item.items()}
+
+
+class DynamoTable:
+    """
+    Table facade over the low-level client.
+
+    Mirrors the parts of the boto3 ``Table`` resource the handlers use:
+    parameters and results hold plain Python values, and expressions are
+    passed as strings.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    @property
+    def client(self) -> Any:
+        return get_client()
+
+    def _call(self, operation: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        request = dict(params, TableName=self.name)
+        for name in _ITEM_PARAMS:
+            if name in request:
+                request[name] = serialize(request[name])
+        if _VALUES_PARAM in request:
+            request[_VALUES_PARAM] = serialize(request[_VALUES_PARAM])
+
+        response = getattr(self.client, operation)(**request)
+
+        for name in _ITEM_FIELDS:
+            if name in response:
+                response[name] = deserialize(response[name])
+        if _ITEMS_FIELD in response:
+            response[_ITEMS_FIELD] = [deserialize(item) for item in response[_ITEMS_FIELD]]
+        return response
+
+    def get_item(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._call('get_item', kwargs)
+
+    def put_item(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._call('put_item', kwargs)
+
+    def update_item(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._call('update_item', kwargs)
+
+    def delete_item(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._call('delete_item', kwargs)
+
+    def query(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._call('query', kwargs)
+
+    def scan(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._call('scan', kwargs)
+
+    def batch_write(self, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Write up to 25 put/delete requests (BatchWriteItem).
+
+        Args:
+            requests: ``{'PutRequest': {'Item': ...}}`` or
+                ``{'DeleteRequest': {'Key': ...}}`` entries
+
+        Returns:
+            ``{'UnprocessedItems': [...]}`` holding requests in the same shape
+        """
+        request_items = [
+            {kind: {name: serialize(value) for name, value in body.items()}}
+            for request in requests
+            for kind, body in request.items()
+        ]
+        response = self.client.batch_write_item(RequestItems={self.name: request_items})
+        unprocessed = response.get('UnprocessedItems', {}).get(self.name, [])
+        return {
+            'UnprocessedItems': [
+                {kind: {name: deserialize(value) for name, value in body.items()}}
+                for request in unprocessed
+                for kind, body in request.items()
+            ]
+        }
+
+    def batch_get(self, keys: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        """
+        Read up to 100 items by key (BatchGetItem).
+
+        Args:
+            keys: Primary keys
+            kwargs: Optional ProjectionExpression, ExpressionAttributeNames
+                and ConsistentRead
+
+        Returns:
+            ``{'Items': [...], 'UnprocessedKeys': [...]}``; items are not
+            returned in request order
+        """
+        request = dict(kwargs, Keys=[serialize(key) for key in keys])
+        response = self.client.batch_get_item(RequestItems={self.name: request})
+        unprocessed = response.get('UnprocessedKeys', {}).get(self.name, {}).get('Keys', [])
+        return {
+            'Items': [deserialize(item) for item in response.get('Responses', {}).get(self.name, [])],
+            'UnprocessedKeys': [deserialize(key) for key in unprocessed]
+        }
+
+    def describe(self) -> Dict[str, Any]:
+        """Return the table description (DescribeTable)."""
+        return self.client.describe_table(TableName=self.name)['Table']
+
+
+def transact_write(
+    items: List[Dict[str, Any]],
+    max_attempts: int = TRANSACT_MAX_ATTEMPTS,
+    sleep: Optional[Callable[[float], None]] = None
+) -> Dict[str, Any]:
+    """
+    Apply up to 100 writes atomically (TransactWriteItems).
+
+    A transaction cancelled only because another transaction was writing one
+    of its items (``TransactionConflict``) can succeed unchanged, so it is
+    retried with backoff. Failed conditions are not retried: the caller has
+    to read again.
+
+    Args:
+        items: ``{'Put' | 'Update' | 'Delete' | 'ConditionCheck': {...}}``
+            operations; each names its ``TableName`` and holds plain Python
+            values like DynamoTable parameters
+        max_attempts: Calls before a conflicting transaction gives up
+        sleep: Replaces time.sleep between attempts
+
+    Raises:
+        ClientError: TransactionCanceledException, with one entry per
+            operation in ``CancellationReasons``, if any condition failed or
+            conflicts outlasted the attempts
+    """
+    request = []
+    for item in items:
+        for kind, params in item.items():
+            params = dict(params)
+            for name in ('Key', 'Item'):
+                if name in params:
+                    params[name] = serialize(params[name])
+            if _VALUES_PARAM in params:
+                params[_VALUES_PARAM] = serialize(params[_VALUES_PARAM])
+            request.append({kind: params})
+    attempt = 1
+    while True:
+        try:
+            return get_client().transact_write_items(TransactItems=request)
+        except ClientError as e:
+            if attempt >= max_attempts or not _only_conflicts(e):
+                raise
+        (sleep or time.sleep)(backoff_delay(attempt, TRANSACT_BASE_DELAY, TRANSACT_MAX_DELAY))
+        attempt += 1
+
+
+def _only_conflicts(error: ClientError) -> bool:
+    """Check whether a transaction was cancelled by conflicts alone, with no failed condition."""
+    if error.response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+        return False
+    codes = {reason.get('Code') for reason in error.response.get('CancellationReasons', [])}
+    return 'TransactionConflict' in codes and codes <= {'TransactionConflict', 'None'}
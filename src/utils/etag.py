@@ -0,0 +1,87 @@
+"""
+ETag helpers for conditional requests
+"""
+
+import hashlib
+from typing import Dict, Any, Iterable, List, Optional
+
+
+def item_version(item: Dict[str, Any]) -> int:
+    """Return an item's version, treating items written before versioning as 0."""
+    return int(item.get('version', 0))
+
+
+def task_etag(item: Dict[str, Any], variant: Optional[str] = None) -> str:
+    """
+    Strong ETag for a single task, derived from its version.
+
+    Args:
+        item: Task item
+        variant: Identifies a partial representation (see utils.fields);
+            appended as ``-<variant>`` so it never matches the full task's tag
+    """
+    if variant:
+        return f'"v{item_version(item)}-{variant}"'
+    return f'"v{item_version(item)}"'
+
+
+def collection_etag(items: Iterable[Dict[str, Any]], *extra: Optional[str]) -> str:
+    """
+    Strong ETag for a list of tasks.
+
+    Built from each item's id and version (or ``updated_at`` for unversioned
+    items) so it can be computed without serializing the response body.
+
+    Args:
+        items: Tasks in response order
+        extra: Additional values that shape the response, e.g. the next cursor
+
+    Returns:
+        Quoted ETag string
+    """
+    digest = hashlib.sha1()
+    for item in items:
+        marker = item.get('version', item.get('updated_at', ''))
+        digest.update(f"{item.get('id')}:{marker}\n".encode('utf-8'))
+    for value in extra:
+        digest.update(f"{value or ''}\n".encode('utf-8'))
+    return f'"{digest.hexdigest()}"'
+
+
+def parse_etag_list(header: Optional[str]) -> List[str]:
+    """
+    Split an If-Match / If-None-Match header into opaque tags.
+
+    Weak indicators are dropped so that callers compare opaque tags only.
+    Returns ``['*']`` for the wildcard.
+    """
+    if not header:
+        return []
+
+    tags = []
+    for part in header.split(','):
+        tag = part.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag:
+            tags.append(tag)
+    return tags
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    tags = parse_etag_list(header)
+    if etag.startswith('W/'):
+        etag = etag[2:]
+    return '*' in tags or etag in tags
+
+
+def version_from_etag(tag: str) -> Optional[int]:
+    """Extract the version number from a task ETag, or None if it is not one."""
+    tag = tag.strip('"')
+    if not tag.startswith('v'):
+        return None
+    try:
+        return int(tag[1:].split('-', 1)[0])
+    except ValueError:
+        return None
@@ -0,0 +1,76 @@
+"""
+Incremental NDJSON encoding for exports
+
+Items are encoded one line at a time and, when requested, fed straight into
+a gzip or brotli compressor, so an export holds only its (compressed) output
+rather than the items it was built from.
+"""
+
+import zlib
+from typing import Dict, Any, List, Optional
+
+from utils.response import brotli, to_json
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+class NDJSONWriter:
+    """
+    Accumulates items as newline-delimited JSON.
+
+    Args:
+        coding: None, 'gzip' or 'br'
+    """
+
+    def __init__(self, coding: Optional[str] = None) -> None:
+        if coding == 'br' and brotli is None:
+            raise ValueError("brotli is not installed")
+        if coding not in (None, 'gzip', 'br'):
+            raise ValueError(f"Unsupported content coding: {coding}")
+        self.coding = coding
+        self.items = 0
+        self._chunks: List[bytes] = []
+        self._size = 0
+        if coding == 'gzip':
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        elif coding == 'br':
+            self._compressor = brotli.Compressor(quality=5)
+        else:
+            self._compressor = None
+
+    @property
+    def size(self) -> int:
+        """Output bytes produced so far (compressed, if compressing)."""
+        return self._size
+
+    def _emit(self, data: bytes) -> None:
+        if data:
+            self._chunks.append(data)
+            self._size += len(data)
+
+    def write(self, item: Dict[str, Any]) -> None:
+        line = (to_json(item) + '\n').encode('utf-8')
+        self.items += 1
+        if self._compressor is None:
+            self._emit(line)
+        elif self.coding == 'gzip':
+            self._emit(self._compressor.compress(line))
+        else:
+            self._emit(self._compressor.process(line))
+
+    def flush(self) -> None:
+        """Flush compressor state so ``size`` reflects everything written."""
+        if self.coding == 'gzip':
+            self._emit(self._compressor.flush(zlib.Z_SYNC_FLUSH))
+        elif self.coding == 'br':
+            self._emit(self._compressor.flush())
+
+    def finish(self) -> bytes:
+        """Close the stream and return the encoded output."""
+        if self.coding == 'gzip':
+            self._emit(self._compressor.flush(zlib.Z_FINISH))
+        elif self.coding == 'br':
+            self._emit(self._compressor.finish())
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
@@ -0,0 +1,83 @@
+"""
+Sparse fieldsets (``?fields=``)
+
+Clients can ask for a subset of task attributes. The selection is validated
+against the known attributes and turned into a ProjectionExpression, so
+DynamoDB returns, and the API serializes, only what is needed.
+"""
+
+import hashlib
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+# Attributes a task can have
+TASK_FIELDS = (
+    'id', 'title', 'description', 'status', 'priority', 'due_date',
+    'created_at', 'updated_at', 'version', 'claimed_by', 'lease_expires_at'
+)
+
+# Always returned, so results can be addressed and revalidated
+REQUIRED_FIELDS = ('id',)
+
+
+def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a comma-separated ``fields`` parameter.
+
+    Args:
+        value: Raw parameter; None or empty selects whole items
+
+    Returns:
+        Sorted, de-duplicated attribute names including ``id``, or None
+
+    Raises:
+        ValueError: If an unknown attribute is requested
+    """
+    if value is None or not value.strip():
+        return None
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = sorted(requested - set(TASK_FIELDS))
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. Valid fields: {', '.join(TASK_FIELDS)}"
+        )
+    return tuple(sorted(requested | set(REQUIRED_FIELDS)))
+
+
+def projection_params(fields: Iterable[str], names: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Build ProjectionExpression parameters for a set of attributes.
+
+    Args:
+        fields: Attributes to read
+        names: Existing ExpressionAttributeNames to merge with; placeholders
+            follow the ``#attribute`` convention, so shared ones coincide
+
+    Returns:
+        ``ProjectionExpression`` and ``ExpressionAttributeNames`` parameters
+    """
+    attributes = sorted(set(fields))
+    merged = dict(names or {})
+    merged.update({f"#{name}": name for name in attributes})
+    return {
+        'ProjectionExpression': ', '.join(f"#{name}" for name in attributes),
+        'ExpressionAttributeNames': merged
+    }
+
+
+def select_fields(item: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """
+    Return only the requested attributes of an item (every task attribute
+    when fields is None).
+
+    Attributes outside TASK_FIELDS (write shards, queue keys, the counters'
+    mark) are storage details and never returned, so every response builds
+    its tasks with this.
+    """
+    return {name: item[name] for name in (TASK_FIELDS if fields is None else fields) if name in item}
+
+
+def fields_tag(fields: Optional[Iterable[str]]) -> Optional[str]:
+    """Short, stable identifier of a field selection for ETags."""
+    if fields is None:
+        return None
+    return hashlib.sha1(','.join(sorted(fields)).encode('utf-8')).hexdigest()[:8]
@@ -0,0 +1,74 @@
+"""
+Task ID generation
+
+Random (UUIDv4) ids spread writes evenly but carry no order. UUIDv7 ids start
+with a millisecond Unix timestamp, so they sort by creation time and keep
+related writes close together. Both are 36-character UUID strings, so either
+format resolves through the same ``id`` key.
+"""
+
+import os
+import secrets
+import threading
+import time
+import uuid
+from typing import Optional
+
+ID_FORMATS = ('uuid4', 'uuid7')
+
+# Format used for new tasks
+TASK_ID_FORMAT = os.environ.get('TASK_ID_FORMAT', 'uuid4')
+
+_lock = threading.Lock()
+_last_ms = 0
+_last_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a time-ordered UUIDv7 (RFC 9562).
+
+    The 48-bit millisecond timestamp is followed by a 12-bit counter seeded
+    randomly each millisecond, so ids generated by one process within the
+    same millisecond still sort in generation order.
+    """
+    global _last_ms, _last_counter
+
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _last_counter = secrets.randbits(11)
+        else:
+            # Same millisecond (or the clock went back): keep counting
+            _last_counter += 1
+            if _last_counter > 0xFFF:
+                _last_ms += 1
+                _last_counter = secrets.randbits(11)
+        timestamp, counter = _last_ms, _last_counter
+
+    value = (timestamp & 0xFFFFFFFFFFFF) << 80
+    value |= 0x7 << 76
+    value |= counter << 64
+    value |= 0b10 << 62
+    value |= secrets.randbits(62)
+    return uuid.UUID(int=value)
+
+
+def new_task_id(id_format: Optional[str] = None) -> str:
+    """
+    Generate an id for a new task.
+
+    Args:
+        id_format: 'uuid4' or 'uuid7'; defaults to TASK_ID_FORMAT
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    id_format = id_format or TASK_ID_FORMAT
+    if id_format == 'uuid4':
+        return str(uuid.uuid4())
+    if id_format == 'uuid7':
+        return str(uuid7())
+    raise ValueError(f"Unknown task id format: {id_format}. Valid formats: {', '.join(ID_FORMATS)}")
+
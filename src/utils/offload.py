@@ -0,0 +1,137 @@
+"""
+Offloading of oversized responses to S3
+
+Lambda responses are capped at 6 MB. Bodies above a threshold are stored,
+gzip compressed, under a key derived from their SHA-256 and replaced by a
+small envelope with a presigned download URL. Identical bodies map to the
+same key, so repeat requests for unchanged data reuse the stored object.
+"""
+
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Optional
+
+_client = None
+
+
+def get_s3_client() -> Any:
+    """
+    Return the shared S3 client, creating it on first use.
+
+    Like utils.dynamodb.get_client, boto3 is only imported when needed.
+    """
+    global _client
+    if _client is None:
+        import boto3
+        from botocore.config import Config
+
+        _client = boto3.client('s3', config=Config(
+            signature_version='s3v4',
+            tcp_keepalive=True,
+            connect_timeout=2,
+            read_timeout=10,
+            retries={'mode': 'standard', 'max_attempts': 3}
+        ))
+    return _client
+
+
+class ResponseStore:
+    """
+    Content-addressed store for response bodies.
+
+    Args:
+        bucket: S3 bucket name
+        client: S3 client; the shared lazy client by default
+        prefix: Key prefix for stored bodies
+        url_ttl_seconds: Lifetime of presigned URLs
+        max_reuse_seconds: Objects older than this are rewritten rather than
+            reused, so a lifecycle rule cannot expire them while a URL handed
+            out for them is still valid
+        now: Clock returning an aware datetime, overridable in tests
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        client: Optional[Any] = None,
+        prefix: str = 'responses/',
+        url_ttl_seconds: int = 900,
+        max_reuse_seconds: Optional[int] = None,
+        now: Callable[[], datetime] = lambda: datetime.now(timezone.utc)
+    ) -> None:
+        self.bucket = bucket
+        self._client = client
+        self.prefix = prefix
+        self.url_ttl_seconds = url_ttl_seconds
+        self.max_reuse_seconds = max_reuse_seconds
+        self._now = now
+
+    @property
+    def client(self) -> Any:
+        return self._client if self._client is not None else get_s3_client()
+
+    def _is_reusable(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        if self.max_reuse_seconds is None:
+            return True
+        age = (self._now() - head['LastModified']).total_seconds()
+        return age < self.max_reuse_seconds
+
+    def offload(self, body: bytes, content_type: str = 'application/json') -> Dict[str, Any]:
+        """
+        Store a body (unless an identical one is already stored) and describe it.
+
+        Returns:
+            Envelope with the presigned ``url``, its ``expires_in`` seconds,
+            the body's ``sha256`` and uncompressed ``size``, and whether an
+            existing object was ``reused``
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        key = f"{self.prefix}{digest}.json.gz"
+
+        reused = self._is_reusable(key)
+        if not reused:
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=key,
+                Body=gzip.compress(body, compresslevel=6, mtime=0),
+                ContentType=content_type,
+                ContentEncoding='gzip'
+            )
+
+        url = self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': key},
+            ExpiresIn=self.url_ttl_seconds
+        )
+        return {
+            'url': url,
+            'expires_in': self.url_ttl_seconds,
+            'sha256': digest,
+            'size': len(body),
+            'reused': reused
+        }
+
+
+def response_store_from_env() -> Optional[ResponseStore]:
+    """ResponseStore configured from OFFLOAD_* settings, or None if disabled."""
+    bucket = os.environ.get('OFFLOAD_BUCKET')
+    if not bucket:
+        return None
+    url_ttl = int(os.environ.get('OFFLOAD_URL_TTL_SECONDS', '900'))
+    expiry_days = int(os.environ.get('OFFLOAD_EXPIRY_DAYS', '1'))
+    return ResponseStore(
+        bucket,
+        url_ttl_seconds=url_ttl,
+        # Leave an hour of slack on top of the URL lifetime
+        max_reuse_seconds=expiry_days * 86400 - url_ttl - 3600
+    )
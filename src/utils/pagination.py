@@ -0,0 +1,163 @@
+"""
+Pagination utilities for cursor-based listing
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+from typing import Dict, Any, Optional
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+# Cursor signing secret, loaded by get_cursor_secret on first use
+_cursor_secret: Optional[str] = None
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a continuation token is malformed or has been tampered with."""
+
+
+def get_cursor_secret() -> str:
+    """
+    Return the cursor signing secret, loading it on first use.
+
+    Only requests that sign or verify a cursor need the secret, so loading
+    it here rather than at import keeps the Secrets Manager call (and the
+    boto3 import) off every other cold start.
+    """
+    global _cursor_secret
+    if _cursor_secret is None:
+        _cursor_secret = cursor_secret_from_env()
+    return _cursor_secret
+
+
+def cursor_secret_from_env(client: Optional[Any] = None) -> str:
+    """
+    Load the cursor signing secret.
+
+    The deployed handler gets the secret's ARN in CURSOR_SECRET_ARN and reads
+    the value from Secrets Manager (through get_cursor_secret, once per
+    container), so the key never appears in the function configuration. CURSOR_SECRET, when non-empty,
+    takes precedence for tests and local runs.
+
+    Args:
+        client: Secrets Manager client; created on demand by default
+
+    Raises:
+        RuntimeError: If neither setting yields a non-empty secret, since
+            cursors signed with an empty key can be forged
+    """
+    secret = os.environ.get('CURSOR_SECRET', '')
+    secret_arn = os.environ.get('CURSOR_SECRET_ARN', '')
+    if not secret and secret_arn:
+        if client is None:
+            import boto3
+            client = boto3.client('secretsmanager')
+        secret = client.get_secret_value(SecretId=secret_arn).get('SecretString', '')
+    if not secret:
+        raise RuntimeError("No cursor signing secret: set CURSOR_SECRET_ARN (or CURSOR_SECRET locally)")
+    return secret
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(payload: str, secret: str, scope: str) -> str:
+    message = f"{scope}\n{payload}".encode('utf-8')
+    digest = hmac.new(secret.encode('utf-8'), message, hashlib.sha256).digest()
+    return _b64encode(digest[:16])
+
+
+def encode_cursor(last_key: Dict[str, Any], secret: str, scope: str = '') -> str:
+    """
+    Turn a DynamoDB LastEvaluatedKey into an opaque, signed continuation token.
+
+    Args:
+        last_key: LastEvaluatedKey returned by a scan or query
+        secret: HMAC signing secret
+        scope: Identifies the listing the key belongs to, so a token
+            issued for one query cannot be replayed against another
+
+    Returns:
+        URL-safe continuation token
+    """
+    payload = _b64encode(
+        json.dumps(last_key, separators=(',', ':'), sort_keys=True, default=str).encode('utf-8')
+    )
+    return f"{payload}.{_sign(payload, secret, scope)}"
+
+
+def decode_cursor(token: str, secret: str, scope: str = '') -> Dict[str, Any]:
+    """
+    Verify a continuation token and return the ExclusiveStartKey it carries.
+
+    Args:
+        token: Token previously produced by encode_cursor
+        secret: HMAC signing secret
+        scope: Scope the token must have been issued for
+
+    Returns:
+        ExclusiveStartKey for the next scan or query
+
+    Raises:
+        InvalidCursorError: If the token is malformed or the signature does not match
+    """
+    try:
+        payload, signature = token.split('.', 1)
+    except (AttributeError, ValueError):
+        raise InvalidCursorError("Malformed cursor")
+
+    if not hmac.compare_digest(signature, _sign(payload, secret, scope)):
+        raise InvalidCursorError("Cursor signature mismatch")
+
+    try:
+        last_key = json.loads(_b64decode(payload))
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursorError("Malformed cursor")
+
+    if not isinstance(last_key, dict):
+        raise InvalidCursorError("Malformed cursor")
+
+    return last_key
+
+
+def parse_limit(
+    value: Optional[str],
+    default: int = DEFAULT_PAGE_SIZE,
+    maximum: int = MAX_PAGE_SIZE
+) -> int:
+    """
+    Parse and validate a page size query parameter.
+
+    Args:
+        value: Raw ``limit`` query string value (may be None)
+        default: Page size used when no value is given
+        maximum: Largest page size a client may request
+
+    Returns:
+        Page size between 1 and ``maximum``
+
+    Raises:
+        ValueError: If the value is not an integer in the allowed range
+    """
+    if value is None or value == '':
+        return default
+
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+
+    if limit < 1 or limit > maximum:
+        raise ValueError(f"limit must be between 1 and {maximum}")
+
+    return limit
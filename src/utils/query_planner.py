@@ -0,0 +1,298 @@
+"""
+Query planner for filtered task listing
+
+Turns list filters into the cheapest DynamoDB read: a Query against the
+secondary index whose keys match the filters (merging one Query per shard
+for write-sharded indexes), or a filtered Scan when no index applies.
+"""
+
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.fields import parse_fields, projection_params
+from utils.sharding import SHARD_PLACEHOLDER, TASK_SHARDS, merge_shard_queries, shard_partition
+
+# Maximum number of DynamoDB round trips spent filling one page
+MAX_PAGE_ROUNDS = 5
+
+# Attributes read with every sparse fieldset: ETags and newest-first
+# ordering are computed from them
+ALWAYS_READ_FIELDS = ('version', 'updated_at', 'created_at')
+
+# Serve unindexed listings from CreatedIndex instead of a Scan. Items written
+# before the index existed need scripts/backfill_shards.py first
+LIST_FROM_CREATED_INDEX = os.environ.get('LIST_FROM_CREATED_INDEX', 'false').lower() == 'true'
+
+# Serve status filters from StatusShardIndex instead of StatusIndex, again
+# only once existing items have been backfilled
+STATUS_INDEX_SHARDED = os.environ.get('STATUS_INDEX_SHARDED', 'false').lower() == 'true'
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """
+    A global secondary index the planner may use.
+
+    Sharded indexes (``shards`` > 0) are read by merging one Query per
+    shard. Their partition key is either the shard number, or, when
+    ``filter_attribute`` is set, ``<value>#<shard>`` for an equality filter
+    on that attribute.
+    """
+    name: str
+    partition_key: str
+    sort_key: str
+    shards: int = 0
+    filter_attribute: Optional[str] = None
+
+    @property
+    def selector(self) -> str:
+        """Attribute an equality filter must be on for this index to apply."""
+        return self.filter_attribute or self.partition_key
+
+
+# Indexes provisioned by ApiStack._create_database, in order of preference
+TASK_INDEXES = (
+    IndexSpec('StatusIndex', partition_key='status', sort_key='created_at'),
+    IndexSpec('PriorityIndex', partition_key='priority', sort_key='created_at'),
+)
+
+# Every task, newest first, spread over TASK_SHARDS partitions
+CREATED_INDEX = IndexSpec('CreatedIndex', partition_key='shard', sort_key='created_at', shards=TASK_SHARDS)
+
+# StatusIndex with each status spread over TASK_SHARDS partitions
+STATUS_SHARD_INDEX = IndexSpec(
+    'StatusShardIndex', partition_key='status_shard', sort_key='created_at',
+    shards=TASK_SHARDS, filter_attribute='status'
+)
+
+# Filter name -> (attribute, comparison operator)
+SUPPORTED_FILTERS = {
+    'status': ('status', '='),
+    'priority': ('priority', '='),
+    'created_after': ('created_at', '>'),
+    'due_before': ('due_date', '<'),
+}
+
+DATE_FILTERS = ('created_after', 'due_before')
+
+
+@dataclass
+class QueryPlan:
+    """How a filtered listing will be read from DynamoDB."""
+    operation: str
+    index: Optional[IndexSpec] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+    filters: Dict[str, str] = field(default_factory=dict)
+    fields: Optional[Tuple[str, ...]] = None
+    # Shard label -> partition key value, for merged reads
+    partitions: Optional[Dict[str, Any]] = None
+
+    @property
+    def key_attributes(self) -> Tuple[str, ...]:
+        """Attributes that make up a LastEvaluatedKey for this read."""
+        if self.index:
+            return ('id', self.index.partition_key, self.index.sort_key)
+        return ('id',)
+
+    @property
+    def sorted_by_index(self) -> bool:
+        """Whether results already come back newest first."""
+        return self.index is not None
+
+    @property
+    def scope(self) -> str:
+        """Canonical description used to bind pagination cursors to this plan."""
+        parts = [self.index.name if self.index else 'scan']
+        if self.index and self.index.shards:
+            # Resume positions are per shard, so they only fit the same layout
+            parts[0] += f"/{self.index.shards}"
+        parts.extend(f"{name}={value}" for name, value in sorted(self.filters.items()))
+        return '&'.join(parts)
+
+
+def _validate_filters(query_params: Dict[str, str]) -> Dict[str, str]:
+    filters = {}
+    for name in SUPPORTED_FILTERS:
+        value = query_params.get(name)
+        if value is None or value == '':
+            continue
+        if name in DATE_FILTERS:
+            try:
+                parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                raise ValueError(f"{name} must be an ISO 8601 date or timestamp")
+            if parsed.tzinfo is not None:
+                # Stored timestamps are UTC with a +00:00 suffix and compared
+                # as strings, so bounds with an offset must be in that form too
+                value = parsed.astimezone(timezone.utc).isoformat()
+        filters[name] = value
+    return filters
+
+
+def _choose_index(filters: Dict[str, str]) -> Optional[IndexSpec]:
+    """Pick the index with an equality filter on its partition key, preferring
+    one whose sort key can also absorb a range filter."""
+    filtered_attributes = {
+        SUPPORTED_FILTERS[name][0]: SUPPORTED_FILTERS[name][1] for name in filters
+    }
+
+    indexes = TASK_INDEXES
+    if STATUS_INDEX_SHARDED:
+        indexes = tuple(STATUS_SHARD_INDEX if index.name == 'StatusIndex' else index for index in indexes)
+
+    best, best_score = None, 0
+    for index in indexes:
+        if filtered_attributes.get(index.selector) != '=':
+            continue
+        score = 2
+        if filtered_attributes.get(index.sort_key) in ('<', '>'):
+            score += 1
+        if score > best_score:
+            best, best_score = index, score
+    return best
+
+
+def plan_task_query(query_params: Dict[str, str]) -> QueryPlan:
+    """
+    Build a read plan for the given list filters.
+
+    Args:
+        query_params: Query string parameters; unknown keys are ignored.
+            ``fields`` selects a sparse fieldset (see utils.fields)
+
+    Returns:
+        QueryPlan describing the Query, merged shard Queries or Scan to run
+
+    Raises:
+        ValueError: If a filter value or field is invalid
+    """
+    filters = _validate_filters(query_params)
+    fields = parse_fields(query_params.get('fields'))
+    index = _choose_index(filters)
+    if index is None and LIST_FROM_CREATED_INDEX:
+        index = CREATED_INDEX
+
+    names: Dict[str, str] = {}
+    values: Dict[str, Any] = {}
+    key_conditions: List[str] = []
+    filter_conditions: List[str] = []
+    partitions = None
+
+    if index and index.shards:
+        names[f"#{index.partition_key}"] = index.partition_key
+        key_conditions.append(f"#{index.partition_key} = {SHARD_PLACEHOLDER}")
+        partitions = {str(shard): shard for shard in range(index.shards)}
+
+    for name, value in sorted(filters.items()):
+        attribute, operator = SUPPORTED_FILTERS[name]
+        if index and index.filter_attribute == attribute:
+            # Implied by the shard partitions
+            partitions = {str(shard): shard_partition(value, shard) for shard in range(index.shards)}
+            continue
+        names[f"#{attribute}"] = attribute
+        values[f":{name}"] = value
+        condition = f"#{attribute} {operator} :{name}"
+
+        if index and attribute in (index.partition_key, index.sort_key):
+            key_conditions.append(condition)
+        else:
+            filter_conditions.append(condition)
+
+    if index is None:
+        # Deleted tasks are kept as tombstones, which the indexes leave out
+        names['#deleted_at'] = 'deleted_at'
+        filter_conditions.append('attribute_not_exists(#deleted_at)')
+
+    params: Dict[str, Any] = {}
+    if index:
+        params['IndexName'] = index.name
+        params['KeyConditionExpression'] = ' AND '.join(key_conditions)
+        params['ScanIndexForward'] = False
+    if filter_conditions:
+        params['FilterExpression'] = ' AND '.join(filter_conditions)
+    if names:
+        params['ExpressionAttributeNames'] = names
+    if values:
+        params['ExpressionAttributeValues'] = values
+
+    if index is None:
+        operation = 'scan'
+    else:
+        operation = 'merge' if index.shards else 'query'
+    plan = QueryPlan(
+        operation=operation,
+        index=index,
+        params=params,
+        filters=filters,
+        fields=fields,
+        partitions=partitions
+    )
+    if fields:
+        # Resume keys, newest-first sorting and ETags need these even when
+        # the client did not ask for them; the handler strips them again
+        read = set(fields) | set(plan.key_attributes) | set(ALWAYS_READ_FIELDS)
+        params.update(projection_params(read, names))
+    return plan
+
+
+def execute_page(
+    table: Any,
+    plan: QueryPlan,
+    limit: int,
+    exclusive_start_key: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Read up to ``limit`` items for a plan.
+
+    A FilterExpression is applied after DynamoDB's Limit, so filtered reads
+    may need several round trips to fill a page. Reads stop after
+    MAX_PAGE_ROUNDS and return a short page with a continuation key.
+    Merged plans continue from, and return, a resume position per shard
+    (see utils.sharding.merge_shard_queries).
+
+    Args:
+        table: DynamoDB Table
+        plan: Plan from plan_task_query
+        limit: Maximum number of items to return
+        exclusive_start_key: Key to resume from
+
+    Returns:
+        Tuple of (items, last evaluated key or None)
+    """
+    if plan.operation == 'merge':
+        index = plan.index
+        return merge_shard_queries(
+            table,
+            plan.params,
+            index.partition_key,
+            index.sort_key,
+            plan.partitions,
+            limit,
+            positions=exclusive_start_key,
+            max_extra_rounds=MAX_PAGE_ROUNDS
+        )
+
+    read = table.query if plan.operation == 'query' else table.scan
+    items: List[Dict[str, Any]] = []
+    start_key = exclusive_start_key
+
+    for _ in range(MAX_PAGE_ROUNDS):
+        kwargs = dict(plan.params, Limit=limit)
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+
+        response = read(**kwargs)
+        items.extend(response.get('Items', []))
+        start_key = response.get('LastEvaluatedKey')
+
+        if not start_key or len(items) >= limit:
+            break
+
+    if len(items) > limit:
+        # Resume right after the last item we return
+        items = items[:limit]
+        start_key = {name: items[-1][name] for name in plan.key_attributes}
+
+    return items, start_key
@@ -0,0 +1,168 @@
+"""
+Task work queue
+
+Claimable tasks are kept in the sparse QueueIndex. Pending tasks sit in
+``pending#<shard>`` partitions sorted by ``<priority rank>#<created_at>``, so
+the first item of a shard is its highest-priority, oldest task. Claimed tasks
+move to ``leased#<shard>`` sorted by lease expiry, which makes expired leases
+a range query. A claim is a conditional write pinned to the version read
+from the index, so concurrent workers never take the same task.
+"""
+
+import os
+import random
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.sharding import TASK_SHARDS, merge_shard_queries, shard_for, shard_partition
+
+# Maintain queue attributes on updates and serve POST /tasks/claim; enable
+# once existing tasks are backfilled (scripts/backfill_shards.py)
+TASK_QUEUE = os.environ.get('TASK_QUEUE', 'false').lower() == 'true'
+
+QUEUE_INDEX = 'QueueIndex'
+QUEUE_PARTITION = 'queue_shard'
+QUEUE_SORT = 'queue_key'
+
+# Attributes a claim sets and that end with the lease
+LEASE_ATTRIBUTES = ('claimed_by', 'lease_expires_at')
+
+PENDING = 'pending'
+CLAIMED = 'in_progress'
+
+# Queue order of priorities; unknown priorities go last
+PRIORITY_RANKS = {'high': 0, 'medium': 1, 'low': 2}
+
+
+def queue_attributes(task: Dict[str, Any], shards: int = TASK_SHARDS) -> Dict[str, str]:
+    """
+    QueueIndex attributes a task should have.
+
+    Args:
+        task: Task item
+        shards: Number of queue shards
+
+    Returns:
+        ``queue_shard`` and ``queue_key`` for pending tasks and leased
+        claimed tasks; empty for tasks that are not in the queue
+    """
+    if 'deleted_at' in task:
+        return {}
+    shard = shard_for(task['id'], shards)
+    if task.get('status') == PENDING and 'created_at' in task:
+        rank = PRIORITY_RANKS.get(task.get('priority'), len(PRIORITY_RANKS))
+        return {
+            QUEUE_PARTITION: shard_partition(PENDING, shard),
+            QUEUE_SORT: f"{rank}#{task['created_at']}"
+        }
+    if task.get('status') == CLAIMED and 'lease_expires_at' in task:
+        return {
+            QUEUE_PARTITION: shard_partition('leased', shard),
+            QUEUE_SORT: task['lease_expires_at']
+        }
+    return {}
+
+
+def queue_changes(current: Dict[str, Any], updated: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Attribute changes keeping a task's queue entry in step with an update.
+
+    Args:
+        current: Task as stored
+        updated: Task with the update applied
+
+    Returns:
+        Tuple of (attributes to set, attributes to remove)
+    """
+    target = queue_attributes(updated)
+    sets = {name: value for name, value in target.items() if current.get(name) != value}
+    stale = [QUEUE_PARTITION, QUEUE_SORT]
+    if updated.get('status') != CLAIMED:
+        # Leaving in_progress ends the lease
+        stale.extend(LEASE_ATTRIBUTES)
+    removes = [name for name in stale if name in current and name not in target]
+    return sets, removes
+
+
+def claim_candidates(table: Any, now: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Tasks a claim may take, best first.
+
+    Expired leases come first, oldest expiry first, then pending tasks by
+    priority and age. Both are read with a merge across the queue shards.
+
+    Args:
+        table: Tasks table
+        now: Current time (ISO 8601); leases expiring at or before it are
+            reclaimable
+        limit: Maximum number of candidates of each kind
+    """
+    names = {'#pk': QUEUE_PARTITION, '#sk': QUEUE_SORT}
+    expired, _ = merge_shard_queries(
+        table,
+        {
+            'IndexName': QUEUE_INDEX,
+            'KeyConditionExpression': '#pk = :shard AND #sk <= :now',
+            'ExpressionAttributeNames': names,
+            'ExpressionAttributeValues': {':now': now}
+        },
+        QUEUE_PARTITION,
+        QUEUE_SORT,
+        {str(shard): shard_partition('leased', shard) for shard in range(TASK_SHARDS)},
+        limit
+    )
+    pending, _ = merge_shard_queries(
+        table,
+        {
+            'IndexName': QUEUE_INDEX,
+            'KeyConditionExpression': '#pk = :shard',
+            'ExpressionAttributeNames': names
+        },
+        QUEUE_PARTITION,
+        QUEUE_SORT,
+        {str(shard): shard_partition(PENDING, shard) for shard in range(TASK_SHARDS)},
+        limit
+    )
+    return expired + pending
+
+
+def is_queued_correctly(task: Dict[str, Any]) -> bool:
+    """
+    Check whether a task's QueueIndex entry matches its state.
+
+    Writes made while TASK_QUEUE was off leave tasks that are no longer
+    pending in the queue; claims skip and repair those.
+    """
+    current = {name: task[name] for name in (QUEUE_PARTITION, QUEUE_SORT) if name in task}
+    return current == queue_attributes(task)
+
+
+def queue_rank(task: Dict[str, Any]) -> Tuple[str, ...]:
+    """
+    Order class of a queue entry.
+
+    Expired leases form one class and pending tasks one class per priority;
+    within a class, candidates only differ by age.
+    """
+    kind = task.get(QUEUE_PARTITION, '').split('#', 1)[0]
+    if kind == PENDING:
+        return kind, task.get(QUEUE_SORT, '').split('#', 1)[0]
+    return (kind,)
+
+
+def spread(candidates: List[Dict[str, Any]], width: int, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+    """
+    Shuffle the first ``width`` candidates of the best order class.
+
+    Used after a claim lost a race: the workers that lost with it would
+    otherwise all race for the next candidate too. Only candidates as good
+    as the first are shuffled, so a lower priority is never taken ahead of
+    a higher one; within the priority, strict age order gives way to
+    spreading the workers.
+    """
+    rank = queue_rank(candidates[0]) if candidates else None
+    size = 0
+    while size < min(width, len(candidates)) and queue_rank(candidates[size]) == rank:
+        size += 1
+    head = candidates[:size]
+    (rng or random).shuffle(head)
+    return head + candidates[size:]
@@ -0,0 +1,136 @@
+"""
+Recent tasks snapshot
+
+The stream processor keeps the newest tasks, by ``created_at``, in one
+document of the meta table, so ``GET /tasks?view=recent`` is a single
+GetItem instead of a scan plus sort. Changes are applied per task version,
+which makes replaying stream records (Lambda retries a batch from the first
+failed record) a no-op.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from utils.fields import TASK_FIELDS
+
+# Key of the snapshot document in the meta table
+RECENT_KEY = {'pk': 'RECENT', 'sk': 'tasks'}
+
+# Number of newest tasks the snapshot holds
+RECENT_TASKS_SIZE = int(os.environ.get('RECENT_TASKS_SIZE', '100'))
+
+# Serialized size the snapshot is trimmed to, below DynamoDB's 400 KB item limit
+RECENT_MAX_BYTES = int(os.environ.get('RECENT_MAX_BYTES', str(350 * 1024)))
+
+# Attributes stored per task; write shards and queue keys are internal to
+# the indexes
+RECENT_FIELDS = TASK_FIELDS
+
+
+class RecentTasks:
+    """
+    Bounded, newest-first list of tasks.
+
+    A task that falls off the end is forgotten, so once that has happened
+    (``evicted``) deletes can leave fewer tasks than were requested, and the
+    reader has to fall back to the table.
+
+    Args:
+        tasks: Tasks, newest first
+        evicted: Whether tasks were ever dropped off the end
+        revision: Revision of the stored document, for optimistic locking
+        size: Number of tasks kept
+    """
+
+    def __init__(
+        self,
+        tasks: Optional[List[Dict[str, Any]]] = None,
+        evicted: bool = False,
+        revision: int = 0,
+        size: int = RECENT_TASKS_SIZE
+    ) -> None:
+        self.tasks = list(tasks or [])
+        self.evicted = evicted
+        self.revision = revision
+        self.size = size
+        self._loaded = (list(self.tasks), evicted)
+
+    @property
+    def changed(self) -> bool:
+        """Whether applied changes altered the snapshot (replays do not)."""
+        return (self.tasks, self.evicted) != self._loaded
+
+    @classmethod
+    def from_item(cls, item: Optional[Dict[str, Any]], size: int = RECENT_TASKS_SIZE) -> 'RecentTasks':
+        """Load the snapshot from its meta table item (None when not written yet)."""
+        item = item or {}
+        return cls(
+            tasks=item.get('tasks'),
+            # Tasks written before the snapshot existed are not in it
+            evicted=bool(item.get('evicted', True)),
+            revision=int(item.get('revision', 0)),
+            size=size
+        )
+
+    def to_item(self) -> Dict[str, Any]:
+        """Meta table item for the next revision of the snapshot."""
+        return dict(
+            RECENT_KEY,
+            tasks=self.tasks,
+            evicted=self.evicted,
+            revision=self.revision + 1,
+            updated_at=datetime.now(timezone.utc).isoformat()
+        )
+
+    def apply(self, new: Optional[Dict[str, Any]], old: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Apply one change of a task.
+
+        Args:
+            new: Task after the change; None or a tombstone for a delete
+            old: Task before the change, used to identify removed items
+        """
+        task = new if new is not None else old
+        if task is None or 'id' not in task:
+            raise ValueError("Change does not identify a task")
+
+        index = next((i for i, entry in enumerate(self.tasks) if entry['id'] == task['id']), None)
+        current = self.tasks[index] if index is not None else None
+
+        # Task ids are never reused, so a delete is final
+        if new is None or 'deleted_at' in new or 'created_at' not in new:
+            if current is not None:
+                del self.tasks[index]
+            return
+
+        if current is not None and int(current.get('version', 0)) >= int(new.get('version', 0)):
+            # Already applied: a replayed or out-of-date record
+            return
+
+        entry = {name: new[name] for name in RECENT_FIELDS if name in new}
+        if current is not None:
+            del self.tasks[index]
+        self.tasks.append(entry)
+        self.tasks.sort(key=lambda item: (item.get('created_at', ''), item['id']), reverse=True)
+        self._trim()
+
+    def newest(self, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        The newest ``limit`` tasks.
+
+        Returns:
+            Tasks newest first, or None when the snapshot cannot tell (tasks
+            beyond its end were evicted and it holds fewer than ``limit``)
+        """
+        if self.evicted and len(self.tasks) < limit:
+            return None
+        return self.tasks[:limit]
+
+    def _trim(self) -> None:
+        while len(self.tasks) > self.size or (
+            len(self.tasks) > 1 and len(json.dumps(self.tasks, default=str)) > RECENT_MAX_BYTES
+        ):
+            self.tasks.pop()
+            self.evicted = True
@@ -0,0 +1,48 @@
+"""
+Request utilities for API Gateway proxy events
+"""
+
+import base64
+from typing import Dict, Any, Optional
+
+
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """
+    Look up a request header case-insensitively.
+
+    Args:
+        event: API Gateway event
+        name: Header name
+
+    Returns:
+        Header value, or None if the header is absent
+    """
+    headers = event.get('headers') or {}
+    lowered = name.lower()
+    for key, value in headers.items():
+        if key.lower() == lowered:
+            return value
+    return None
+
+
+def get_body(event: Dict[str, Any], default: str = '{}') -> str:
+    """
+    Return the request body as text.
+
+    With binary media types enabled on the API, API Gateway base64 encodes
+    request bodies and sets ``isBase64Encoded``.
+
+    Args:
+        event: API Gateway event
+        default: Value used when the event has no body (API Gateway sends
+            ``"body": null`` for requests without one)
+
+    Returns:
+        Decoded request body
+    """
+    body = event.get('body')
+    if body is None:
+        return default
+    if event.get('isBase64Encoded'):
+        return base64.b64decode(body).decode('utf-8')
+    return body
@@ -2,14 +2,143 @@
 Response utilities for standardized API responses
 """
 
+import base64
+import gzip
 import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
 from typing import Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:  # optional dependency; falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+
+# Precomputed headers, copied per response instead of rebuilt
+API_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,If-Match,If-None-Match',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+    'Access-Control-Expose-Headers': 'ETag,X-Next-Cursor'
+}
+
+
+def _encode_default(obj: Any) -> Any:
+    """Convert values the JSON encoders do not handle natively."""
+    if isinstance(obj, Decimal):
+        # DynamoDB returns every number as Decimal
+        if obj == obj.to_integral_value():
+            return int(obj)
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        try:
+            return sorted(obj)
+        except TypeError:
+            return list(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, bytes):
+        return base64.b64encode(obj).decode('ascii')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_json(data: Any) -> str:
+    """
+    Serialize data to compact JSON.
+    
+    Uses orjson when it is installed and the standard library otherwise.
+    Decimals (as returned by DynamoDB), sets, datetimes and bytes are
+    supported by both backends.
+    
+    Args:
+        data: Value to serialize
+        
+    Returns:
+        JSON text
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_encode_default).decode('utf-8')
+    return json.dumps(data, default=_encode_default, separators=(',', ':'))
+
+
+def json_response(
+    status_code: int,
+    body: Any,
+    headers: Optional[Dict[str, str]] = None,
+    base_headers: Dict[str, str] = API_HEADERS,
+    accept_encoding: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Create an API Gateway response with a JSON body.
+    
+    Args:
+        status_code: HTTP status code
+        body: Value to serialize as the response body
+        headers: Extra headers for this response
+        base_headers: Precomputed headers the response starts from
+        accept_encoding: Request Accept-Encoding header used to negotiate compression
+        
+    Returns:
+        API Gateway response dictionary
+    """
+    response_headers = dict(base_headers)
+    if headers:
+        response_headers.update(headers)
+    
+    response = {
+        'statusCode': status_code,
+        'headers': response_headers,
+        'body': to_json(body)
+    }
+    if accept_encoding:
+        response = compress_response(response, accept_encoding)
+    return response
+
+
+def not_modified_response(
+    etag: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Create a bodiless 304 response for a matching If-None-Match.
+    
+    Args:
+        etag: Current ETag of the resource
+        headers: Extra headers, e.g. Cache-Control
+        
+    Returns:
+        API Gateway response dictionary
+    """
+    response_headers = {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Expose-Headers': 'ETag',
+        'ETag': etag
+    }
+    if headers:
+        response_headers.update(headers)
+    
+    return {
+        'statusCode': 304,
+        'headers': response_headers,
+        'body': ''
+    }
+
 
 def success_response(
     status_code: int = 200, 
     data: Any = None, 
-    message: str = "Success"
+    message: str = "Success",
+    accept_encoding: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Create a standardized success response.
@@ -18,6 +147,7 @@ def success_response(
         status_code: HTTP status code
         data: Response data
         message: Success message
+        accept_encoding: Request Accept-Encoding header used to negotiate compression
         
     Returns:
         API Gateway response dictionary
@@ -28,22 +158,14 @@ def success_response(
         'data': data
     }
     
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
-        'body': json.dumps(body)
-    }
+    return json_response(status_code, body, accept_encoding=accept_encoding)
 
 
 def error_response(
     status_code: int = 400, 
     message: str = "Bad Request",
-    error_code: Optional[str] = None
+    error_code: Optional[str] = None,
+    accept_encoding: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Create a standardized error response.
@@ -52,6 +174,7 @@ def error_response(
         status_code: HTTP status code
         message: Error message
         error_code: Optional error code
+        accept_encoding: Request Accept-Encoding header used to negotiate compression
         
     Returns:
         API Gateway response dictionary
@@ -64,16 +187,7 @@ def error_response(
         }
     }
     
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        },
-        'body': json.dumps(body)
-    }
+    return json_response(status_code, body, accept_encoding=accept_encoding)
 
 
 def validation_error_response(errors: list) -> Dict[str, Any]:
@@ -90,4 +204,92 @@ def validation_error_response(errors: list) -> Dict[str, Any]:
         status_code=400,
         message="Validation failed",
         error_code="VALIDATION_ERROR"
-    ) 
\ No newline at end of file
+    )
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header.
+    
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+        
+    Returns:
+        'br', 'gzip', or None when the body should be sent uncompressed
+    """
+    if not accept_encoding:
+        return None
+    
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if coding:
+            weights[coding] = weight
+    
+    wildcard = weights.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_weight = None, 0.0
+    for coding in candidates:
+        weight = weights.get(coding, wildcard)
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress_response(
+    response: Dict[str, Any],
+    accept_encoding: Optional[str],
+    min_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Compress an API Gateway response body when the client accepts it.
+    
+    Bodies below ``min_size`` bytes are left as-is. Compressed bodies are
+    base64 encoded with ``isBase64Encoded`` set, which API Gateway decodes
+    because binary media types are enabled on the API.
+    
+    Args:
+        response: API Gateway response dictionary
+        accept_encoding: Request Accept-Encoding header
+        min_size: Smallest body to compress (defaults to COMPRESSION_MIN_BYTES)
+        
+    Returns:
+        API Gateway response dictionary
+    """
+    body = response.get('body')
+    if not body or response.get('isBase64Encoded'):
+        return response
+    
+    headers = dict(response.get('headers') or {})
+    headers['Vary'] = 'Accept-Encoding'
+    response = dict(response, headers=headers)
+    
+    raw = body.encode('utf-8') if isinstance(body, str) else body
+    threshold = COMPRESSION_MIN_BYTES if min_size is None else min_size
+    coding = negotiate_encoding(accept_encoding)
+    if coding is None or len(raw) < threshold:
+        return response
+    
+    if coding == 'br':
+        compressed = brotli.compress(raw, quality=5)
+    else:
+        compressed = gzip.compress(raw, compresslevel=6, mtime=0)
+    
+    headers['Content-Encoding'] = coding
+    # The compressed bytes are a different representation, so only a weak
+    # validator still holds
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        headers['ETag'] = f'W/{etag}'
+    
+    response['body'] = base64.b64encode(compressed).decode('ascii')
+    response['isBase64Encoded'] = True
+    return response
@@ -0,0 +1,208 @@
+"""
+Parallel segmented scans
+
+Whole-table jobs (exports, backfills, audits) read every item. A single
+sequential Scan is bounded by one round trip at a time, so ParallelScan runs
+one worker per Scan segment, each following its own LastEvaluatedKey, and
+streams items to the caller as pages arrive. An optional read-capacity budget
+keeps such jobs from starving live traffic.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterator, Optional
+
+DEFAULT_SEGMENTS = 4
+# Pages buffered per segment before workers wait for the consumer
+DEFAULT_BUFFERED_PAGES = 2
+
+_DONE = object()
+
+
+class RateLimiter:
+    """
+    Token bucket over read capacity units.
+
+    Consumed capacity is only known after a call, so callers wait for a
+    non-negative balance before reading and are charged afterwards; a large
+    page may take the balance negative and delay the next reads.
+
+    Args:
+        units_per_second: Sustained capacity budget
+        burst: Bucket size; defaults to one second of budget
+        clock: Monotonic clock, overridable in tests
+        sleep: Sleep function, overridable in tests
+    """
+
+    def __init__(
+        self,
+        units_per_second: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        if units_per_second <= 0:
+            raise ValueError("units_per_second must be positive")
+        self.rate = units_per_second
+        self.burst = burst if burst is not None else units_per_second
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait(self) -> float:
+        """Block until the balance is non-negative. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 0:
+                    return waited
+                delay = -self._tokens / self.rate
+            self._sleep(delay)
+            waited += delay
+
+    def charge(self, units: float) -> None:
+        """Deduct consumed capacity."""
+        with self._lock:
+            self._refill()
+            self._tokens -= units
+
+
+class ParallelScan:
+    """
+    Iterable over every item of a table (or index), read by parallel segments.
+
+    Items are yielded in no particular order. Stopping iteration early (or
+    closing the iterator) stops the workers after their in-flight page.
+
+    Args:
+        table: Table exposing ``scan`` (see utils.dynamodb.DynamoTable)
+        segments: TotalSegments, one worker thread each
+        projection_expression: Optional ProjectionExpression
+        filter_expression: Optional FilterExpression
+        expression_attribute_names: Names used by the expressions
+        expression_attribute_values: Values used by the filter
+        index_name: Scan a secondary index instead of the table
+        page_limit: Optional Limit per Scan call
+        capacity_per_second: Optional read-capacity budget shared by all
+            segments
+        consistent_read: Use strongly consistent reads
+
+    After iteration, ``stats`` holds pages, items, scanned count, consumed
+    capacity and time spent waiting on the rate limiter.
+    """
+
+    def __init__(
+        self,
+        table: Any,
+        segments: int = DEFAULT_SEGMENTS,
+        projection_expression: Optional[str] = None,
+        filter_expression: Optional[str] = None,
+        expression_attribute_names: Optional[Dict[str, str]] = None,
+        expression_attribute_values: Optional[Dict[str, Any]] = None,
+        index_name: Optional[str] = None,
+        page_limit: Optional[int] = None,
+        capacity_per_second: Optional[float] = None,
+        consistent_read: bool = False
+    ) -> None:
+        if segments < 1:
+            raise ValueError("segments must be at least 1")
+        self.table = table
+        self.segments = segments
+        self.limiter = RateLimiter(capacity_per_second) if capacity_per_second else None
+
+        params: Dict[str, Any] = {'ReturnConsumedCapacity': 'TOTAL'}
+        if projection_expression:
+            params['ProjectionExpression'] = projection_expression
+        if filter_expression:
+            params['FilterExpression'] = filter_expression
+        if expression_attribute_names:
+            params['ExpressionAttributeNames'] = expression_attribute_names
+        if expression_attribute_values:
+            params['ExpressionAttributeValues'] = expression_attribute_values
+        if index_name:
+            params['IndexName'] = index_name
+        if page_limit:
+            params['Limit'] = page_limit
+        if consistent_read:
+            params['ConsistentRead'] = True
+        self.params = params
+
+        self.stats = {'pages': 0, 'items': 0, 'scanned': 0, 'consumed_capacity': 0.0, 'throttled_seconds': 0.0}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, response: Dict[str, Any], waited: float) -> None:
+        units = response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+        if self.limiter:
+            self.limiter.charge(units)
+        with self._stats_lock:
+            self.stats['pages'] += 1
+            self.stats['items'] += response.get('Count', len(response.get('Items', [])))
+            self.stats['scanned'] += response.get('ScannedCount', 0)
+            self.stats['consumed_capacity'] += units
+            self.stats['throttled_seconds'] += waited
+
+    def _scan_segment(self, segment: int, pages: queue.Queue, stop: threading.Event) -> None:
+        try:
+            start_key = None
+            while not stop.is_set():
+                waited = self.limiter.wait() if self.limiter else 0.0
+                kwargs = dict(self.params, Segment=segment, TotalSegments=self.segments)
+                if start_key:
+                    kwargs['ExclusiveStartKey'] = start_key
+                response = self.table.scan(**kwargs)
+                self._record(response, waited)
+                if response.get('Items') and not self._put(pages, response['Items'], stop):
+                    return
+                start_key = response.get('LastEvaluatedKey')
+                if not start_key:
+                    break
+            self._put(pages, _DONE, stop)
+        except Exception as e:
+            self._put(pages, e, stop)
+
+    @staticmethod
+    def _put(pages: queue.Queue, value: Any, stop: threading.Event) -> bool:
+        # Bounded put that gives up once the consumer has gone away
+        while not stop.is_set():
+            try:
+                pages.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        pages: queue.Queue = queue.Queue(maxsize=self.segments * DEFAULT_BUFFERED_PAGES)
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.segments)
+        try:
+            for segment in range(self.segments):
+                pool.submit(self._scan_segment, segment, pages, stop)
+
+            remaining = self.segments
+            while remaining:
+                page = pages.get()
+                if page is _DONE:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield from page
+        finally:
+            stop.set()
+            pool.shutdown(wait=True)
+
+
+def parallel_scan(table: Any, **options: Any) -> Iterator[Dict[str, Any]]:
+    """Stream every item of a table using a ParallelScan."""
+    return iter(ParallelScan(table, **options))
@@ -0,0 +1,281 @@
+"""
+Inverted-index task search
+
+Every token of a task's title and description has a posting item in the
+meta table: partition ``SEARCH#<first letters>``, sort key
+``<token>#<task id>``. A query term is then one Query with ``begins_with``
+on the sort key, which also matches longer tokens (prefix search). Terms are
+ANDed and matches ranked by a tf-idf score, so a search reads one postings
+page per term plus the top tasks, however large the table is.
+"""
+
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.batch import get_all, write_all
+from utils.scan import ParallelScan
+
+# Letters of a token that select its postings partition; query terms must be
+# at least this long
+SEARCH_PREFIX_LENGTH = int(os.environ.get('SEARCH_PREFIX_LENGTH', '2'))
+
+# Longest indexed token; longer words are truncated
+SEARCH_MAX_TOKEN_LENGTH = int(os.environ.get('SEARCH_MAX_TOKEN_LENGTH', '40'))
+
+# Postings read per query term; rarer terms carry AND queries below this
+SEARCH_MAX_POSTINGS = int(os.environ.get('SEARCH_MAX_POSTINGS', '2000'))
+
+# Query terms per search
+SEARCH_MAX_TERMS = int(os.environ.get('SEARCH_MAX_TERMS', '5'))
+
+# Token weight per indexed attribute
+FIELD_WEIGHTS = {'title': 3, 'description': 1}
+
+# Weight of a term matching only the start of a token
+PREFIX_MATCH_FACTOR = 0.5
+
+POSTING_PREFIX = 'SEARCH#'
+
+# Tasks per index_tasks batch (postings written, then the tasks read again)
+INDEX_BATCH_SIZE = 100
+
+# Attributes index_tasks reads: the indexed ones plus the tombstone marker
+_INDEX_NAMES = {'#id': 'id', '#title': 'title', '#description': 'description', '#deleted_at': 'deleted_at'}
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text: Any) -> List[str]:
+    """
+    Split text into normalized tokens.
+
+    Text is NFKD normalized with accents stripped and case folded, so
+    ``Café`` and ``cafe`` index alike. Tokens shorter than
+    SEARCH_PREFIX_LENGTH are dropped.
+    """
+    if not isinstance(text, str):
+        return []
+    decomposed = unicodedata.normalize('NFKD', text)
+    folded = ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    return [
+        word[:SEARCH_MAX_TOKEN_LENGTH] for word in _WORD.findall(folded)
+        if len(word) >= SEARCH_PREFIX_LENGTH
+    ]
+
+
+def token_weights(task: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """Weighted term frequencies of a task's indexed attributes."""
+    weights: Counter = Counter()
+    if task is None or 'deleted_at' in task:
+        return {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(task.get(field)):
+            weights[token] += weight
+    return dict(weights)
+
+
+def posting_key(token: str, task_id: str) -> Dict[str, str]:
+    """Meta table key of one token's posting for a task."""
+    return {'pk': POSTING_PREFIX + token[:SEARCH_PREFIX_LENGTH], 'sk': f"{token}#{task_id}"}
+
+
+def posting_changes(
+    task_id: str,
+    old: Optional[Dict[str, Any]],
+    new: Optional[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    BatchWriteItem requests moving a task's postings from one version to another.
+
+    Only tokens whose weight changed are written, and applying the same
+    change twice leaves the same postings.
+
+    Args:
+        task_id: Task ID
+        old: Task before the change (None for a create)
+        new: Task after the change (None or a tombstone for a delete)
+
+    Returns:
+        ``PutRequest`` / ``DeleteRequest`` entries for the meta table
+    """
+    before, after = token_weights(old), token_weights(new)
+    requests = [
+        {'DeleteRequest': {'Key': posting_key(token, task_id)}}
+        for token in sorted(set(before) - set(after))
+    ]
+    for token, weight in sorted(after.items()):
+        if before.get(token) != weight:
+            requests.append({'PutRequest': {'Item': dict(
+                posting_key(token, task_id), task_id=task_id, token=token, weight=weight
+            )}})
+    return requests
+
+
+def index_tasks(
+    table: Any,
+    meta_table: Any,
+    max_workers: int = 4,
+    batch_size: int = INDEX_BATCH_SIZE,
+    **scan_options: Any
+) -> Dict[str, Any]:
+    """
+    Write the postings of every live task.
+
+    The stream handler only indexes tasks as they change, so tasks written
+    before search was enabled need this once. It can run while the stream is
+    live: after writing a batch's postings the tasks are read again, and a
+    task changed or deleted since the scan has its postings moved to what it
+    is now, so a stream record applied before this write is not undone.
+    Postings are idempotent, so running it again writes the same items.
+
+    Args:
+        table: Tasks table
+        meta_table: Table holding the postings
+        max_workers: BatchWriteItem chunks written concurrently
+        batch_size: Tasks per batch
+        scan_options: ParallelScan options (segments, capacity_per_second)
+
+    Returns:
+        ``{"indexed": n, "changed": n, "postings": n, "unwritten": n,
+        "unverified": n}``: tasks indexed, tasks re-indexed because they
+        changed during the run, postings written, postings that could not
+        be written and tasks that could not be read again
+    """
+    scan = ParallelScan(
+        table,
+        projection_expression='#id, #title, #description, #deleted_at',
+        filter_expression='attribute_not_exists(#deleted_at)',
+        expression_attribute_names=_INDEX_NAMES,
+        **scan_options
+    )
+    counts = {'indexed': 0, 'changed': 0, 'postings': 0, 'unwritten': 0, 'unverified': 0}
+    batch: List[Dict[str, Any]] = []
+    for task in scan:
+        batch.append(task)
+        if len(batch) == batch_size:
+            _index_batch(table, meta_table, batch, max_workers, counts)
+            batch = []
+    if batch:
+        _index_batch(table, meta_table, batch, max_workers, counts)
+    return counts
+
+
+def _index_batch(
+    table: Any,
+    meta_table: Any,
+    tasks: List[Dict[str, Any]],
+    max_workers: int,
+    counts: Dict[str, int]
+) -> None:
+    requests = [request for task in tasks for request in posting_changes(task['id'], None, task)]
+    failed = write_all(meta_table, requests, max_workers=max_workers) if requests else []
+    current, unread = get_all(
+        table,
+        [{'id': task['id']} for task in tasks],
+        ConsistentRead=True,
+        ProjectionExpression='#id, #title, #description, #deleted_at',
+        ExpressionAttributeNames=_INDEX_NAMES
+    )
+    by_id = {item['id']: item for item in current}
+    unread_ids = {key['id'] for key in unread}
+    moves = []
+    for task in tasks:
+        if task['id'] in unread_ids:
+            continue
+        now = by_id.get(task['id'])
+        if token_weights(now) != token_weights(task):
+            counts['changed'] += 1
+            moves.extend(posting_changes(task['id'], task, now))
+    if moves:
+        failed += write_all(meta_table, moves, max_workers=max_workers)
+    counts['indexed'] += len(tasks)
+    counts['postings'] += len(requests) + len(moves) - len(failed)
+    counts['unwritten'] += len(failed)
+    counts['unverified'] += len(unread_ids)
+
+def parse_query(query: Optional[str]) -> List[str]:
+    """
+    Terms of a search query.
+
+    Raises:
+        ValueError: If the query has no usable terms or too many
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        raise ValueError(f"q must contain a word of at least {SEARCH_PREFIX_LENGTH} characters")
+    if len(terms) > SEARCH_MAX_TERMS:
+        raise ValueError(f"q can contain at most {SEARCH_MAX_TERMS} words")
+    return terms
+
+
+def read_term(meta_table: Any, term: str, max_postings: int = SEARCH_MAX_POSTINGS) -> Tuple[Dict[str, float], bool]:
+    """
+    Tasks matching one term.
+
+    Returns:
+        Tuple of (task id -> best match weight, whether postings were left
+        unread)
+    """
+    params = {
+        'KeyConditionExpression': '#pk = :pk AND begins_with(#sk, :term)',
+        'ProjectionExpression': '#task_id, #token, #weight',
+        'ExpressionAttributeNames': {
+            '#pk': 'pk', '#sk': 'sk', '#task_id': 'task_id', '#token': 'token', '#weight': 'weight'
+        },
+        'ExpressionAttributeValues': {':pk': POSTING_PREFIX + term[:SEARCH_PREFIX_LENGTH], ':term': term}
+    }
+    matches: Dict[str, float] = {}
+    read = 0
+    while True:
+        response = meta_table.query(**params, Limit=max_postings - read)
+        for posting in response.get('Items', []):
+            factor = 1 if posting['token'] == term else PREFIX_MATCH_FACTOR
+            score = float(posting['weight']) * factor
+            if score > matches.get(posting['task_id'], 0):
+                matches[posting['task_id']] = score
+        read += len(response.get('Items', []))
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key or read >= max_postings:
+            return matches, last_key is not None
+        params['ExclusiveStartKey'] = last_key
+
+
+def search(meta_table: Any, terms: List[str], total_tasks: Optional[int] = None) -> Tuple[List[Tuple[str, float]], bool]:
+    """
+    Rank the tasks matching every term.
+
+    Terms are read concurrently. Each contributes its match weight times
+    ``log(1 + N / df)``, so rare terms count more than common ones.
+
+    Args:
+        meta_table: Table holding the postings
+        terms: Query terms (see parse_query)
+        total_tasks: Number of tasks N; the largest term match count when
+            unknown
+
+    Returns:
+        Tuple of ([(task id, score)] best first, whether results may be
+        incomplete because a term had more than SEARCH_MAX_POSTINGS postings)
+    """
+    with ThreadPoolExecutor(max_workers=len(terms)) as pool:
+        results = list(pool.map(lambda term: read_term(meta_table, term), terms))
+
+    truncated = any(more for _, more in results)
+    candidates = set(results[0][0])
+    for matches, _ in results[1:]:
+        candidates &= set(matches)
+
+    total = max([total_tasks or 0] + [len(matches) for matches, _ in results])
+    scores = {task_id: 0.0 for task_id in candidates}
+    for matches, _ in results:
+        idf = math.log(1 + total / max(len(matches), 1))
+        for task_id in candidates:
+            scores[task_id] += matches[task_id] * idf
+    # Ties go to the newer task (UUIDv7 ids sort by creation time)
+    ranked = sorted(scores.items(), key=lambda entry: (entry[1], entry[0]), reverse=True)
+    return ranked, truncated
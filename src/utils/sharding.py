@@ -0,0 +1,187 @@
+"""
+Write-sharded index reads
+
+An index partitioned on a low-cardinality value concentrates writes on one
+partition key. Spreading items over a few shard values keeps writes parallel;
+a read then queries every shard and merges the streams. Each shard's Query
+already returns items in sort-key order, so a k-way heap merge produces a
+globally ordered page without sorting in memory.
+"""
+
+import heapq
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+# Number of write shards per sharded index partition
+TASK_SHARDS = int(os.environ.get('TASK_SHARDS', '4'))
+
+# Placeholder the merged Query's KeyConditionExpression uses for the shard
+SHARD_PLACEHOLDER = ':shard'
+
+
+def shard_for(task_id: str, shards: int = TASK_SHARDS) -> int:
+    """Stable write shard (0 to shards - 1) for a task id."""
+    return zlib.crc32(task_id.encode('utf-8')) % shards
+
+
+def shard_partition(value: Any, shard: int) -> str:
+    """Partition key value ``<value>#<shard>`` of one shard of a value."""
+    return f"{value}#{shard}"
+
+
+def sharded_value(value: Any, task_id: str, shards: int = TASK_SHARDS) -> str:
+    """Partition key value spreading one indexed value over shards by task id."""
+    return shard_partition(value, shard_for(task_id, shards))
+
+
+class _ShardStream:
+    """Sorted items of one shard, read a page at a time."""
+
+    def __init__(
+        self,
+        table: Any,
+        params: Dict[str, Any],
+        partition_key: str,
+        partition_value: Any,
+        position: Optional[Dict[str, Any]]
+    ) -> None:
+        self.table = table
+        values = dict(params.get('ExpressionAttributeValues') or {})
+        values[SHARD_PLACEHOLDER] = partition_value
+        self.params = dict(params, ExpressionAttributeValues=values)
+        self.partition_key = partition_key
+        self.partition_value = partition_value
+        self.buffer: deque = deque()
+        # Where a later page resumes to see the unconsumed items again
+        self.position = position
+        self._next_key = position
+        self.more = True
+
+    @property
+    def exhausted(self) -> bool:
+        return not self.buffer and not self.more
+
+    def fetch(self, limit: int) -> None:
+        kwargs = dict(self.params, Limit=limit)
+        if self._next_key:
+            kwargs['ExclusiveStartKey'] = dict(self._next_key, **{self.partition_key: self.partition_value})
+        response = self.table.query(**kwargs)
+        self.buffer.extend(response.get('Items', []))
+
+        last_key = response.get('LastEvaluatedKey')
+        self.more = last_key is not None
+        self._next_key = self._resume_key(last_key) if last_key else None
+        if not self.buffer:
+            self.position = self._next_key
+
+    def pop(self, key_attributes: Tuple[str, ...]) -> Dict[str, Any]:
+        item = self.buffer.popleft()
+        if self.buffer:
+            self.position = {name: item[name] for name in key_attributes}
+        else:
+            self.position = self._next_key
+        return item
+
+    def _resume_key(self, key: Dict[str, Any]) -> Dict[str, Any]:
+        # The partition value is known per shard, so cursors need not carry it
+        return {name: value for name, value in key.items() if name != self.partition_key}
+
+
+class _Head:
+    """Heap entry for the next item of a stream."""
+
+    __slots__ = ('order', 'stream', 'descending')
+
+    def __init__(self, stream: _ShardStream, sort_key: str, descending: bool) -> None:
+        item = stream.buffer[0]
+        self.order = (item.get(sort_key, ''), item.get('id', ''))
+        self.stream = stream
+        self.descending = descending
+
+    def __lt__(self, other: '_Head') -> bool:
+        return self.order > other.order if self.descending else self.order < other.order
+
+
+def merge_shard_queries(
+    table: Any,
+    params: Dict[str, Any],
+    partition_key: str,
+    sort_key: str,
+    partitions: Dict[str, Any],
+    limit: int,
+    positions: Optional[Dict[str, Any]] = None,
+    max_extra_rounds: int = 5
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Read one page, in sort-key order, across the shards of an index.
+
+    The first page of every shard is read concurrently. An item is only
+    emitted while every unfinished shard has a buffered head, so nothing
+    that sorts earlier can still be unread; a shard running dry is refilled
+    first. Filtered reads may need such refills, and once ``max_extra_rounds``
+    of them are spent the page is returned short.
+
+    Args:
+        table: DynamoDB Table
+        params: Query parameters; the KeyConditionExpression compares the
+            partition key with SHARD_PLACEHOLDER, and ScanIndexForward sets
+            the direction
+        partition_key: Index partition key attribute
+        sort_key: Index sort key attribute
+        partitions: Shard label -> partition key value
+        limit: Maximum number of items to return
+        positions: Shard label -> resume key from a previous page; shards
+            missing from it are finished. None starts every shard
+        max_extra_rounds: Refill queries allowed beyond the first round
+
+    Returns:
+        Tuple of (items, positions to resume from, or None when all shards
+        are finished)
+    """
+    descending = params.get('ScanIndexForward') is False
+    key_attributes = ('id', sort_key)
+    if positions is None:
+        positions = {label: None for label in partitions}
+
+    streams = {
+        label: _ShardStream(table, params, partition_key, partitions[label], positions[label])
+        for label in partitions if label in positions
+    }
+    if not streams:
+        return [], None
+
+    if len(streams) == 1:
+        next(iter(streams.values())).fetch(limit)
+    else:
+        with ThreadPoolExecutor(max_workers=len(streams)) as pool:
+            list(pool.map(lambda stream: stream.fetch(limit), streams.values()))
+
+    rounds = 0
+
+    def refill(stream: _ShardStream) -> bool:
+        # True once the stream has a head or is finished
+        nonlocal rounds
+        while not stream.buffer and stream.more:
+            if rounds >= max_extra_rounds:
+                return False
+            stream.fetch(limit)
+            rounds += 1
+        return True
+
+    ready = all([refill(stream) for stream in streams.values()])
+    heap = [_Head(stream, sort_key, descending) for stream in streams.values() if stream.buffer]
+    heapq.heapify(heap)
+
+    items: List[Dict[str, Any]] = []
+    while ready and heap and len(items) < limit:
+        stream = heapq.heappop(heap).stream
+        items.append(stream.pop(key_attributes))
+        ready = refill(stream)
+        if stream.buffer:
+            heapq.heappush(heap, _Head(stream, sort_key, descending))
+
+    remaining = {label: stream.position for label, stream in streams.items() if not stream.exhausted}
+    return items, remaining or None
@@ -0,0 +1,306 @@
+"""
+Materialized task counters
+
+Items in the meta table hold the number of tasks in total and per status.
+Task writes adjust them in the same TransactWriteItems call, so
+``GET /tasks/stats`` is one Query instead of a scan. The counts are spread
+over STATS_SHARDS items, each write adding to a random one, so concurrent
+transactions rarely meet on the same item; a read sums them.
+
+Tasks in the counters carry the ``counted`` attribute. Tasks written before
+counters were enabled lack it; writes leave their counts alone and
+count_uncounted adds them, so that can run while the API takes writes.
+"""
+
+import os
+import random
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from utils.scan import ParallelScan
+
+# Counter items share this partition; their sort keys start with STATS_SORT
+STATS_PARTITION = 'STATS'
+STATS_SORT = 'tasks'
+
+# Counter items writes are spread over
+STATS_SHARDS = int(os.environ.get('STATS_SHARDS', '8'))
+
+# Marks a task whose status is in the counters
+COUNTED_ATTRIBUTE = 'counted'
+
+# Tasks added per count_uncounted transaction; the counter shard takes the
+# last of its 100 operations
+COUNT_BATCH_SIZE = 99
+
+TOTAL_ATTRIBUTE = 'total'
+STATUS_PREFIX = 'status:'
+
+
+def counter_deltas(old_status: Optional[str], new_status: Optional[str]) -> Dict[str, int]:
+    """
+    Counter changes for a task moving between statuses.
+
+    Args:
+        old_status: Status before the write; None for a create
+        new_status: Status after the write; None for a delete
+
+    Returns:
+        Counter attribute -> delta; empty when nothing changes
+    """
+    deltas: Dict[str, int] = {}
+    if old_status == new_status:
+        return deltas
+    if old_status is not None:
+        deltas[STATUS_PREFIX + old_status] = -1
+    if new_status is not None:
+        deltas[STATUS_PREFIX + new_status] = 1
+    if old_status is None or new_status is None:
+        deltas[TOTAL_ATTRIBUTE] = 1 if old_status is None else -1
+    return deltas
+
+
+def task_deltas(current: Optional[Dict[str, Any]], new_status: Optional[str]) -> Dict[str, int]:
+    """
+    Counter changes for a write moving a task to ``new_status``.
+
+    Args:
+        current: Task as stored; None for a create
+        new_status: Status after the write; None for a delete
+
+    Returns:
+        Counter attribute -> delta; empty for tasks not counted yet, which
+        count_uncounted adds as they are when it reaches them
+    """
+    if current is None:
+        return counter_deltas(None, new_status)
+    if not is_counted(current):
+        return {}
+    return counter_deltas(current.get('status'), new_status)
+
+
+def is_counted(task: Dict[str, Any]) -> bool:
+    """Check whether a task's status is in the counters."""
+    return bool(task.get(COUNTED_ATTRIBUTE))
+
+
+def merge_deltas(deltas: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    """Sum several sets of counter deltas, dropping those that cancel out."""
+    merged: Dict[str, int] = {}
+    for delta in deltas:
+        for name, value in delta.items():
+            merged[name] = merged.get(name, 0) + value
+    return {name: value for name, value in merged.items() if value}
+
+
+def stats_key(shard: int) -> Dict[str, str]:
+    """Meta table key of one counter shard."""
+    return {'pk': STATS_PARTITION, 'sk': f"{STATS_SORT}#{shard}"}
+
+
+def _add_params(deltas: Dict[str, int], shard: Optional[int] = None) -> Dict[str, Any]:
+    names, values, terms = {}, {}, []
+    for i, (name, delta) in enumerate(sorted(deltas.items())):
+        names[f"#c{i}"] = name
+        values[f":d{i}"] = delta
+        terms.append(f"#c{i} :d{i}")
+    return {
+        'Key': stats_key(random.randrange(STATS_SHARDS) if shard is None else shard),
+        'UpdateExpression': 'ADD ' + ', '.join(terms),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+
+def counter_update(table_name: str, deltas: Dict[str, int], shard: Optional[int] = None) -> Dict[str, Any]:
+    """TransactWriteItems operation applying counter deltas to a (random) shard."""
+    return {'Update': dict(_add_params(deltas, shard), TableName=table_name)}
+
+
+def add_to_counters(meta_table: Any, deltas: Dict[str, int], shard: Optional[int] = None) -> None:
+    """Apply counter deltas outside a transaction (a single UpdateItem)."""
+    if deltas:
+        meta_table.update_item(**_add_params(deltas, shard))
+
+
+def read_stats(meta_table: Any) -> Dict[str, Any]:
+    """
+    Read and sum the counter shards.
+
+    Every item of the counters partition is summed, so changing STATS_SHARDS
+    keeps the counts already written.
+
+    Returns:
+        The counters, shaped like ``GET /tasks/stats``
+    """
+    params = {
+        'KeyConditionExpression': '#pk = :pk AND begins_with(#sk, :sk)',
+        'ExpressionAttributeNames': {'#pk': 'pk', '#sk': 'sk'},
+        'ExpressionAttributeValues': {':pk': STATS_PARTITION, ':sk': STATS_SORT}
+    }
+    items: List[Dict[str, Any]] = []
+    while True:
+        response = meta_table.query(**params)
+        items.extend(response.get('Items', []))
+        if not response.get('LastEvaluatedKey'):
+            return stats_from_items(items)
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def stats_from_items(items: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Sum counter items into the ``GET /tasks/stats`` response."""
+    total = 0
+    by_status: Dict[str, int] = {}
+    for item in items:
+        for name, value in (item or {}).items():
+            if name == TOTAL_ATTRIBUTE:
+                total += int(value)
+            elif name.startswith(STATUS_PREFIX):
+                status = name[len(STATUS_PREFIX):]
+                by_status[status] = by_status.get(status, 0) + int(value)
+    return {'total': total, 'by_status': {status: count for status, count in by_status.items() if count}}
+
+
+def cancellation_codes(error: ClientError) -> List[str]:
+    """Per-operation reasons of a cancelled transaction; empty for other errors."""
+    response = error.response
+    if response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+        return []
+    return [reason.get('Code') for reason in response.get('CancellationReasons', [])]
+
+
+def is_transaction_conflict(error: ClientError) -> bool:
+    """
+    Check whether a transaction was cancelled by a concurrent write.
+
+    That is a failed condition (the task changed since it was read) or a
+    TransactionConflict (another transaction held one of the items, most
+    often a counter shard). A plain write to an item a transaction holds
+    fails with TransactionConflictException and counts too. Either way the
+    write can be retried from a fresh read.
+    """
+    if error.response.get('Error', {}).get('Code') == 'TransactionConflictException':
+        return True
+    return any(code in ('ConditionalCheckFailed', 'TransactionConflict') for code in cancellation_codes(error))
+
+
+def mark_counted(table_name: str, task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    TransactWriteItems operation marking a task as counted.
+
+    The write is conditional on the task still being live, uncounted and at
+    the version and status it was read with, so it cannot count a status
+    that a concurrent write has already changed.
+    """
+    names = {'#id': 'id', '#counted': COUNTED_ATTRIBUTE, '#deleted_at': 'deleted_at'}
+    values: Dict[str, Any] = {':counted': True}
+    conditions = ['attribute_exists(#id)', 'attribute_not_exists(#counted)', 'attribute_not_exists(#deleted_at)']
+    for name in ('version', 'status'):
+        names[f"#{name}"] = name
+        if name in task:
+            conditions.append(f"#{name} = :{name}")
+            values[f":{name}"] = task[name]
+        else:
+            conditions.append(f"attribute_not_exists(#{name})")
+    return {'Update': {
+        'TableName': table_name,
+        'Key': {'id': task['id']},
+        'UpdateExpression': 'SET #counted = :counted',
+        'ConditionExpression': ' AND '.join(conditions),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }}
+
+
+def count_uncounted(
+    table: Any,
+    meta_table: Any,
+    transact: Callable[[List[Dict[str, Any]]], Any],
+    attempts: int = 3,
+    batch_size: int = COUNT_BATCH_SIZE,
+    **scan_options: Any
+) -> Dict[str, Any]:
+    """
+    Add the tasks that are not in the counters yet.
+
+    Used when counters are enabled on a table with tasks, and to pick up
+    tasks a batch create could not count. Tasks are marked and added to the
+    counters in the same transaction, each pinned to the version and status
+    scanned, so this can run while the handler writes: a task changed in
+    between is read again and counted as it is then, and one deleted or
+    counted meanwhile is skipped. Running it again adds nothing twice.
+
+    Args:
+        table: Tasks table
+        meta_table: Table holding the counter items
+        transact: TransactWriteItems function (utils.dynamodb.transact_write)
+        attempts: Transactions per batch of tasks before the tasks that kept
+            changing are left for the next run
+        batch_size: Tasks per transaction
+        scan_options: ParallelScan options (segments, capacity_per_second)
+
+    Returns:
+        ``{"counted": n, "uncounted": n, "added": {...}}`` with the added
+        counts shaped like ``GET /tasks/stats``
+    """
+    scan = ParallelScan(
+        table,
+        projection_expression='#id, #status, #version',
+        filter_expression='attribute_not_exists(#counted) AND attribute_not_exists(#deleted_at)',
+        expression_attribute_names={
+            '#id': 'id', '#status': 'status', '#version': 'version',
+            '#counted': COUNTED_ATTRIBUTE, '#deleted_at': 'deleted_at'
+        },
+        **scan_options
+    )
+    counted: List[Dict[str, Any]] = []
+    uncounted = 0
+    batch: List[Dict[str, Any]] = []
+    for task in scan:
+        batch.append(task)
+        if len(batch) == batch_size:
+            done, left = _count_batch(table, meta_table, transact, batch, attempts)
+            counted.extend(done)
+            uncounted += left
+            batch = []
+    if batch:
+        done, left = _count_batch(table, meta_table, transact, batch, attempts)
+        counted.extend(done)
+        uncounted += left
+    added = merge_deltas(counter_deltas(None, task.get('status')) for task in counted)
+    return {'counted': len(counted), 'uncounted': uncounted, 'added': stats_from_items([added])}
+
+
+def _count_batch(
+    table: Any,
+    meta_table: Any,
+    transact: Callable[[List[Dict[str, Any]]], Any],
+    tasks: List[Dict[str, Any]],
+    attempts: int
+) -> Tuple[List[Dict[str, Any]], int]:
+    pending = tasks
+    for _ in range(attempts):
+        if not pending:
+            break
+        items = [mark_counted(table.name, task) for task in pending]
+        deltas = merge_deltas(counter_deltas(None, task.get('status')) for task in pending)
+        if deltas:
+            items.append(counter_update(meta_table.name, deltas))
+        try:
+            transact(items)
+            return pending, 0
+        except ClientError as e:
+            codes = cancellation_codes(e)
+            if not codes:
+                raise
+            retry = []
+            for task, code in zip(pending, codes):
+                if code != 'ConditionalCheckFailed':
+                    retry.append(task)
+                    continue
+                current = table.get_item(Key={'id': task['id']}, ConsistentRead=True).get('Item')
+                if current and not is_counted(current) and 'deleted_at' not in current:
+                    retry.append(current)
+            pending = retry
+    return [], len(pending)
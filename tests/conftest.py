@@ -0,0 +1,18 @@
+"""
+Shared pytest configuration
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Lambda functions are packaged from src/, so handlers import shared code as
+# ``utils.*``. Mirror that layout here; the repo root provides local_aws.
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('TASKS_TABLE', 'tasks-test')
+os.environ.setdefault('META_TABLE', 'tasks-meta-test')
+os.environ.setdefault('CURSOR_SECRET', 'test-cursor-secret')
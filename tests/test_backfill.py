@@ -0,0 +1,58 @@
+"""
+Unit tests for attribute backfills
+"""
+
+from local_aws.dynamodb import tasks_table
+from utils.backfill import backfill
+from utils.sharding import shard_for
+
+
+def test_backfill_sets_missing_attributes_once():
+    """Test that only items with stale values are updated, and reruns are no-ops."""
+    table = tasks_table()
+    table.seed({'id': f'task-{i}', 'created_at': f'2024-01-0{i}'} for i in range(1, 9))
+    table.put_item(Item={'id': 'task-9', 'created_at': '2024-01-09', 'shard': shard_for('task-9')})
+    
+    def derive(item):
+        return {'shard': shard_for(item['id'])}
+    
+    first = backfill(table, derive, ['shard'], segments=3)
+    second = backfill(table, derive, ['shard'], segments=3)
+    
+    assert (first['scanned'], first['updated']) == (9, 8)
+    assert second['updated'] == 0
+    assert all(item['shard'] == shard_for(item['id']) for item in table.items())
+    assert table.query(
+        IndexName='CreatedIndex',
+        KeyConditionExpression='shard = :s',
+        ExpressionAttributeValues={':s': shard_for('task-1')}
+    )['Count'] >= 1
+
+
+def test_backfill_derives_again_after_a_concurrent_write():
+    """Test that an item written after the scan is re-read instead of overwritten with stale values."""
+    table = tasks_table()
+    table.seed([
+        {'id': 'a', 'status': 'pending', 'version': 1},
+        {'id': 'b', 'status': 'pending', 'version': 1}
+    ])
+    update_item = table.update_item
+    
+    def write_first(**params):
+        if params['Key']['id'] == 'a' and table.get_item(Key={'id': 'a'})['Item']['version'] == 1:
+            table.put_item(Item={'id': 'a', 'status': 'done', 'version': 2})
+        if params['Key']['id'] == 'b' and table.get_item(Key={'id': 'b'}).get('Item'):
+            table.delete_item(Key={'id': 'b'})
+        return update_item(**params)
+    table.update_item = write_first
+    
+    result = backfill(
+        table,
+        lambda item: {'status_shard': f"{item['status']}#0"},
+        ['status', 'status_shard'],
+        pinned=['version', 'status']
+    )
+    
+    assert (result['updated'], result['skipped']) == (1, 1)
+    assert table.get_item(Key={'id': 'a'})['Item'] == {'id': 'a', 'status': 'done', 'version': 2, 'status_shard': 'done#0'}
+    assert table.get_item(Key={'id': 'b'}).get('Item') is None
@@ -0,0 +1,72 @@
+"""
+Unit tests for batch write helpers
+"""
+
+from local_aws.dynamodb import InMemoryTable
+from utils.batch import chunked, get_all, write_all, write_chunk
+
+
+def put(i):
+    return {'PutRequest': {'Item': {'id': str(i)}}}
+
+
+def test_chunked_splits_into_batches():
+    """Test chunking at the BatchWriteItem limit."""
+    assert [len(chunk) for chunk in chunked(list(range(60)), 25)] == [25, 25, 10]
+
+
+def test_write_chunk_retries_unprocessed_items_with_backoff():
+    """Test that unprocessed requests are retried until written."""
+    table = InMemoryTable(unprocessed_rate=0.5, seed=3)
+    delays = []
+    
+    failed = write_chunk(table, [put(i) for i in range(25)], max_attempts=20, sleep=delays.append)
+    
+    assert failed == []
+    assert len(table) == 25
+    assert len(delays) == table.calls['batch_write'] - 1
+    assert all(delay >= 0 for delay in delays)
+
+
+def test_write_chunk_gives_up_after_max_attempts():
+    """Test that persistently unprocessed requests are returned."""
+    table = InMemoryTable(throttle_rate=1.0)
+    
+    failed = write_chunk(table, [put(1), put(2)], max_attempts=3, sleep=lambda delay: None)
+    
+    assert failed == [put(1), put(2)]
+    assert table.calls['batch_write'] == 3
+
+
+def test_write_all_writes_chunks_concurrently():
+    """Test that every chunk is written when using a worker pool."""
+    table = InMemoryTable()
+    
+    failed = write_all(table, [put(i) for i in range(110)], max_workers=4)
+    
+    assert failed == []
+    assert len(table) == 110
+    assert table.calls['batch_write'] == 5
+
+
+def test_get_all_fetches_chunks_and_retries_unprocessed_keys():
+    """Test 100-key chunks, concurrent fetches and UnprocessedKeys retries."""
+    table = InMemoryTable(unprocessed_rate=0.3, seed=5)
+    table.seed({'id': str(i)} for i in range(250))
+    keys = [{'id': str(i)} for i in range(260)]
+    
+    items, unprocessed = get_all(table, keys, max_workers=3, max_attempts=20, sleep=lambda delay: None)
+    
+    assert unprocessed == []
+    assert sorted(item['id'] for item in items) == sorted(str(i) for i in range(250))
+    assert table.calls['batch_get'] > 3
+
+
+def test_get_all_returns_keys_it_could_not_read():
+    """Test that persistently unprocessed keys are reported."""
+    table = InMemoryTable(throttle_rate=1.0)
+    
+    items, unprocessed = get_all(table, [{'id': 'a'}], max_attempts=2, sleep=lambda delay: None)
+    
+    assert items == []
+    assert unprocessed == [{'id': 'a'}]
@@ -0,0 +1,70 @@
+"""
+Unit tests for the in-process LRU cache
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from utils.cache import LRUCache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_evicts_least_recently_used():
+    """Test that the oldest untouched entry is evicted when full."""
+    cache = LRUCache(max_size=2, ttl_seconds=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+
+def test_entries_expire_after_ttl():
+    """Test that stale entries count as misses and are dropped."""
+    clock = FakeClock()
+    cache = LRUCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.put('a', 1)
+    
+    clock.now = 4.9
+    assert cache.get('a') == 1
+    clock.now = 5.0
+    assert cache.get('a') is None
+    assert cache.stats() == {
+        'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'size': 0, 'max_size': 10
+    }
+
+
+def test_zero_size_disables_cache():
+    """Test that a size of zero turns caching off."""
+    cache = LRUCache(max_size=0, ttl_seconds=5)
+    cache.put('a', 1)
+    
+    assert cache.get('a') is None
+
+
+def test_full_cache_survives_concurrent_use():
+    """Test that threads sharing a full cache never see a half-applied eviction."""
+    cache = LRUCache(max_size=8, ttl_seconds=60)
+    
+    def churn(worker):
+        for i in range(2000):
+            key = (worker * 7 + i) % 24
+            cache.put(key, i)
+            cache.get((key + 3) % 24)
+            cache.invalidate((key + 5) % 24)
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(churn, range(8)))
+    
+    assert cache.stats()['size'] <= 8
+    assert cache.hits + cache.misses == 8 * 2000
@@ -0,0 +1,151 @@
+"""
+Unit tests for the low-level DynamoDB table facade
+"""
+
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+from utils.dynamodb import DynamoTable
+
+
+def test_table_serializes_requests_and_deserializes_results():
+    """Test that callers see plain Python values on both sides of the client."""
+    client = MagicMock()
+    client.update_item.return_value = {
+        'Attributes': {'id': {'S': 'a'}, 'version': {'N': '2'}}
+    }
+    
+    with patch('utils.dynamodb.get_client', return_value=client):
+        response = DynamoTable('tasks').update_item(
+            Key={'id': 'a'},
+            UpdateExpression='SET #v = #v + :one',
+            ExpressionAttributeNames={'#v': 'version'},
+            ExpressionAttributeValues={':one': 1}
+        )
+    
+    assert response['Attributes'] == {'id': 'a', 'version': Decimal(2)}
+    client.update_item.assert_called_once_with(
+        TableName='tasks',
+        Key={'id': {'S': 'a'}},
+        UpdateExpression='SET #v = #v + :one',
+        ExpressionAttributeNames={'#v': 'version'},
+        ExpressionAttributeValues={':one': {'N': '1'}}
+    )
+
+
+def test_scan_deserializes_items_and_last_key():
+    """Test paging fields of scan results."""
+    client = MagicMock()
+    client.scan.return_value = {
+        'Items': [{'id': {'S': 'a'}}],
+        'LastEvaluatedKey': {'id': {'S': 'a'}}
+    }
+    
+    with patch('utils.dynamodb.get_client', return_value=client):
+        response = DynamoTable('tasks').scan(Limit=1, ExclusiveStartKey={'id': 'z'})
+    
+    assert response['Items'] == [{'id': 'a'}]
+    assert response['LastEvaluatedKey'] == {'id': 'a'}
+    assert client.scan.call_args.kwargs['ExclusiveStartKey'] == {'id': {'S': 'z'}}
+
+
+def test_client_is_created_lazily_and_cached():
+    """Test that no client exists until first use and one is reused after."""
+    from utils import dynamodb
+    
+    with patch.object(dynamodb, '_client', None):
+        DynamoTable('tasks')
+        assert dynamodb._client is None
+        
+        client = dynamodb.get_client()
+        
+        assert dynamodb.get_client() is client
+        assert client.meta.config.retries['mode'] == 'adaptive'
+
+
+def test_batch_calls_convert_requests_and_unprocessed_entries():
+    """Test BatchWriteItem / BatchGetItem wrapping for a single table."""
+    client = MagicMock()
+    client.batch_write_item.return_value = {
+        'UnprocessedItems': {'tasks': [{'PutRequest': {'Item': {'id': {'S': 'b'}}}}]}
+    }
+    client.batch_get_item.return_value = {
+        'Responses': {'tasks': [{'id': {'S': 'a'}}]},
+        'UnprocessedKeys': {'tasks': {'Keys': [{'id': {'S': 'b'}}]}}
+    }
+    
+    with patch('utils.dynamodb.get_client', return_value=client):
+        table = DynamoTable('tasks')
+        written = table.batch_write([
+            {'PutRequest': {'Item': {'id': 'a'}}},
+            {'DeleteRequest': {'Key': {'id': 'c'}}}
+        ])
+        read = table.batch_get([{'id': 'a'}, {'id': 'b'}], ConsistentRead=True)
+    
+    assert written == {'UnprocessedItems': [{'PutRequest': {'Item': {'id': 'b'}}}]}
+    assert read == {'Items': [{'id': 'a'}], 'UnprocessedKeys': [{'id': 'b'}]}
+    client.batch_write_item.assert_called_once_with(RequestItems={'tasks': [
+        {'PutRequest': {'Item': {'id': {'S': 'a'}}}},
+        {'DeleteRequest': {'Key': {'id': {'S': 'c'}}}}
+    ]})
+    client.batch_get_item.assert_called_once_with(RequestItems={'tasks': {
+        'Keys': [{'id': {'S': 'a'}}, {'id': {'S': 'b'}}],
+        'ConsistentRead': True
+    }})
+
+
+def test_transact_write_serializes_each_operation():
+    """Test that transaction items carry serialized keys, items and values."""
+    from utils.dynamodb import transact_write
+    
+    client = MagicMock()
+    
+    with patch('utils.dynamodb.get_client', return_value=client):
+        transact_write([
+            {'Put': {'TableName': 'tasks', 'Item': {'id': 'a', 'version': 1}}},
+            {'Update': {
+                'TableName': 'meta',
+                'Key': {'pk': 'STATS', 'sk': 'tasks'},
+                'UpdateExpression': 'ADD #n :one',
+                'ExpressionAttributeNames': {'#n': 'total'},
+                'ExpressionAttributeValues': {':one': 1}
+            }}
+        ])
+    
+    put, update = client.transact_write_items.call_args.kwargs['TransactItems']
+    assert put['Put']['Item'] == {'id': {'S': 'a'}, 'version': {'N': '1'}}
+    assert update['Update']['Key'] == {'pk': {'S': 'STATS'}, 'sk': {'S': 'tasks'}}
+    assert update['Update']['ExpressionAttributeValues'] == {':one': {'N': '1'}}
+
+
+def test_transact_write_retries_conflicting_transactions_only():
+    """Test backoff retries for TransactionConflict cancellations, not for failed conditions."""
+    from utils.dynamodb import transact_write
+    
+    def cancelled(*codes):
+        return ClientError({
+            'Error': {'Code': 'TransactionCanceledException'},
+            'CancellationReasons': [{'Code': code} for code in codes]
+        }, 'TransactWriteItems')
+    
+    client = MagicMock()
+    client.transact_write_items.side_effect = [cancelled('None', 'TransactionConflict'), {}]
+    sleep = MagicMock()
+    with patch('utils.dynamodb.get_client', return_value=client):
+        assert transact_write([{'Put': {'TableName': 'tasks', 'Item': {'id': 'a'}}}], sleep=sleep) == {}
+    assert client.transact_write_items.call_count == 2
+    sleep.assert_called_once()
+    
+    client.transact_write_items.side_effect = cancelled('ConditionalCheckFailed', 'TransactionConflict')
+    client.transact_write_items.reset_mock()
+    with patch('utils.dynamodb.get_client', return_value=client), pytest.raises(ClientError):
+        transact_write([{'Put': {'TableName': 'tasks', 'Item': {'id': 'a'}}}], sleep=sleep)
+    assert client.transact_write_items.call_count == 1
+    
+    client.transact_write_items.side_effect = cancelled('TransactionConflict')
+    client.transact_write_items.reset_mock()
+    with patch('utils.dynamodb.get_client', return_value=client), pytest.raises(ClientError):
+        transact_write([{'Put': {'TableName': 'tasks', 'Item': {'id': 'a'}}}], max_attempts=3, sleep=sleep)
+    assert client.transact_write_items.call_count == 3
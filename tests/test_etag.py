@@ -0,0 +1,44 @@
+"""
+Unit tests for ETag helpers
+"""
+
+from utils.etag import collection_etag, etag_matches, task_etag, version_from_etag
+
+
+def test_task_etag_round_trip():
+    """Test that a task ETag carries its version."""
+    assert task_etag({'id': 'a', 'version': 7}) == '"v7"'
+    assert task_etag({'id': 'a'}) == '"v0"'
+    assert version_from_etag('"v7"') == 7
+    assert version_from_etag('"abc"') is None
+
+
+def test_etag_matches_uses_weak_comparison():
+    """Test If-None-Match matching for lists, wildcards and weak tags."""
+    assert etag_matches('"v1", "v2"', '"v2"')
+    assert etag_matches('W/"v2"', '"v2"')
+    assert etag_matches('*', '"v2"')
+    assert not etag_matches('"v1"', '"v2"')
+    assert not etag_matches(None, '"v2"')
+
+
+def test_collection_etag_tracks_versions_and_cursor():
+    """Test that list ETags change with item versions and the next cursor."""
+    items = [{'id': 'a', 'version': 1}, {'id': 'b', 'version': 1}]
+    
+    etag = collection_etag(items, None)
+    
+    assert etag == collection_etag([dict(item) for item in items], None)
+    assert etag != collection_etag([{'id': 'a', 'version': 2}, items[1]], None)
+    assert etag != collection_etag(items, 'cursor')
+
+
+def test_partial_representations_have_distinct_etags():
+    """Test ETags of sparse fieldsets against the full task's tag."""
+    item = {'id': 'a', 'version': 4}
+    
+    partial = task_etag(item, 'abc123')
+    
+    assert partial == '"v4-abc123"'
+    assert not etag_matches(task_etag(item), partial)
+    assert version_from_etag(partial) == 4
@@ -0,0 +1,59 @@
+"""
+Unit tests for NDJSON export encoding
+"""
+
+import gzip
+import json
+import pytest
+from decimal import Decimal
+from utils import response
+from utils.export import NDJSONWriter
+
+ITEMS = [{'id': str(i), 'points': Decimal(i), 'title': 'Task ' * 20} for i in range(200)]
+
+
+def decode_lines(data):
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+
+def test_writer_emits_one_json_document_per_line():
+    """Test plain NDJSON output."""
+    writer = NDJSONWriter()
+    for item in ITEMS[:3]:
+        writer.write(item)
+    
+    data = writer.finish()
+    
+    assert data.endswith(b'\n')
+    assert decode_lines(data) == [{'id': str(i), 'points': i, 'title': 'Task ' * 20} for i in range(3)]
+    assert writer.items == 3
+
+
+def test_gzip_writer_compresses_incrementally():
+    """Test that the gzip stream round-trips and size tracks compressed output."""
+    writer = NDJSONWriter('gzip')
+    for item in ITEMS:
+        writer.write(item)
+    writer.flush()
+    flushed = writer.size
+    
+    data = writer.finish()
+    
+    assert 0 < flushed <= len(data)
+    assert len(data) < len(b''.join(json.dumps(item, default=int).encode() for item in ITEMS)) / 5
+    assert [item['id'] for item in decode_lines(gzip.decompress(data))] == [item['id'] for item in ITEMS]
+
+
+@pytest.mark.skipif(response.brotli is None, reason='brotli not installed')
+def test_brotli_writer_round_trips():
+    """Test the brotli stream when brotli is available."""
+    writer = NDJSONWriter('br')
+    writer.write(ITEMS[0])
+    
+    assert decode_lines(response.brotli.decompress(writer.finish()))[0]['id'] == '0'
+
+
+def test_unsupported_coding_is_rejected():
+    """Test that unknown codings fail early."""
+    with pytest.raises(ValueError):
+        NDJSONWriter('deflate')
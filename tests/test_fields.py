@@ -0,0 +1,44 @@
+"""
+Unit tests for sparse fieldsets
+"""
+
+import pytest
+from utils.fields import fields_tag, parse_fields, projection_params, select_fields
+
+
+def test_parse_fields_normalizes_and_adds_id():
+    """Test de-duplication, ordering and the required id attribute."""
+    assert parse_fields('title, status,title') == ('id', 'status', 'title')
+    assert parse_fields(None) is None
+    assert parse_fields(' ') is None
+
+
+def test_parse_fields_rejects_unknown_attributes():
+    """Test validation against the known task attributes."""
+    with pytest.raises(ValueError, match='Unknown fields: secret'):
+        parse_fields('title,secret')
+
+
+def test_projection_params_merges_placeholders():
+    """Test that projection placeholders coexist with filter placeholders."""
+    params = projection_params(['title', 'status'], {'#status': 'status', '#priority': 'priority'})
+    
+    assert params['ProjectionExpression'] == '#status, #title'
+    assert params['ExpressionAttributeNames'] == {
+        '#status': 'status', '#priority': 'priority', '#title': 'title'
+    }
+
+
+def test_select_fields_and_tag():
+    """Test response trimming and stable selection tags."""
+    item = {'id': 'a', 'title': 't', 'version': 2}
+    
+    assert select_fields(item, ('id', 'title', 'due_date')) == {'id': 'a', 'title': 't'}
+    assert select_fields(dict(item, shard=1, queue_key='k'), None) == item
+    assert fields_tag(('id', 'title')) == fields_tag(['title', 'id']) != fields_tag(('id',))
+    assert fields_tag(None) is None
+
+
+def test_claim_fields_can_be_selected():
+    """Test that a claimed task's worker and lease are valid sparse fields."""
+    assert parse_fields('claimed_by,lease_expires_at') == ('claimed_by', 'id', 'lease_expires_at')
@@ -0,0 +1,34 @@
+"""
+Unit tests for task ID generation
+"""
+
+import uuid
+import pytest
+from unittest.mock import patch
+from utils.ids import new_task_id, uuid7
+
+
+def test_uuid7_is_versioned_and_time_ordered():
+    """Test the version and variant bits and that ids sort by generation order."""
+    ids = [uuid7() for _ in range(2000)]
+    
+    assert all(value.version == 7 and value.variant == uuid.RFC_4122 for value in ids)
+    assert [str(value) for value in ids] == sorted(str(value) for value in ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_uuid7_embeds_millisecond_timestamp():
+    """Test that the leading 48 bits are the Unix time in milliseconds."""
+    with patch('utils.ids._last_ms', 0), \
+            patch('utils.ids.time.time_ns', return_value=1_700_000_000_123_456_789):
+        value = uuid7()
+    
+    assert value.int >> 80 == 1_700_000_000_123
+
+
+def test_new_task_id_formats():
+    """Test both formats and rejection of unknown ones."""
+    assert uuid.UUID(new_task_id('uuid4')).version == 4
+    assert uuid.UUID(new_task_id('uuid7')).version == 7
+    with pytest.raises(ValueError):
+        new_task_id('ulid')
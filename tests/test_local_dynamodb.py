@@ -0,0 +1,258 @@
+"""
+Unit tests for the in-memory DynamoDB stand-in
+"""
+
+import pytest
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from local_aws.dynamodb import InMemoryTable, InMemoryTransactions, meta_table, tasks_table
+
+
+def test_put_get_and_copy_semantics():
+    """Test that items round-trip and callers cannot mutate stored items."""
+    table = InMemoryTable()
+    item = {'id': 'a', 'tags': ['x']}
+    table.put_item(Item=item)
+    item['tags'].append('y')
+    
+    fetched = table.get_item(Key={'id': 'a'})['Item']
+    fetched['tags'].append('z')
+    
+    assert table.get_item(Key={'id': 'a'})['Item'] == {'id': 'a', 'tags': ['x']}
+    assert table.get_item(Key={'id': 'missing'}) == {}
+    assert table.calls['get_item'] == 3
+
+
+def test_scan_paginates_with_last_evaluated_key():
+    """Test Limit / ExclusiveStartKey paging over all items."""
+    table = InMemoryTable()
+    table.seed({'id': str(i)} for i in range(5))
+    
+    seen, start_key = [], None
+    while True:
+        kwargs = {'Limit': 2}
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        page = table.scan(**kwargs)
+        seen.extend(item['id'] for item in page['Items'])
+        start_key = page.get('LastEvaluatedKey')
+        if not start_key:
+            break
+    
+    assert sorted(seen) == ['0', '1', '2', '3', '4']
+    assert table.calls['scan'] == 3
+
+
+def test_unsupported_parameters_are_rejected():
+    """Test that the stand-in fails loudly instead of ignoring parameters."""
+    with pytest.raises(NotImplementedError):
+        InMemoryTable().scan(ConditionalOperator='AND')
+
+
+def seeded_tasks(count=10, **options):
+    table = tasks_table(**options)
+    table.seed(
+        {
+            'id': f'task-{i:02d}',
+            'status': ('pending', 'completed')[i % 2],
+            'created_at': f'2024-01-{i + 1:02d}',
+            'points': i
+        }
+        for i in range(count)
+    )
+    return table
+
+
+def test_query_uses_index_key_condition_filter_and_order():
+    """Test GSI queries with sort key ranges, filters and descending order."""
+    table = seeded_tasks()
+    
+    page = table.query(
+        IndexName='StatusIndex',
+        KeyConditionExpression='#status = :status AND created_at > :after',
+        FilterExpression='points <> :skip',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':status': 'pending', ':after': '2024-01-02', ':skip': 4},
+        ScanIndexForward=False
+    )
+    
+    assert [item['id'] for item in page['Items']] == ['task-08', 'task-06', 'task-02']
+    assert page['ScannedCount'] == 4
+    assert 'LastEvaluatedKey' not in page
+
+
+def test_index_last_evaluated_key_includes_index_attributes():
+    """Test that index pages resume from the index position."""
+    table = seeded_tasks()
+    params = {
+        'IndexName': 'StatusIndex',
+        'KeyConditionExpression': '#status = :status',
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': {':status': 'completed'},
+        'Limit': 3
+    }
+    
+    first = table.query(**params)
+    table.delete_item(Key={'id': 'task-05'})
+    second = table.query(ExclusiveStartKey=first['LastEvaluatedKey'], **params)
+    
+    assert first['LastEvaluatedKey'] == {'id': 'task-05', 'status': 'completed', 'created_at': '2024-01-06'}
+    assert [item['id'] for item in second['Items']] == ['task-07', 'task-09']
+
+
+def test_sparse_index_skips_items_without_index_keys():
+    """Test that items lacking an index key are not in the index."""
+    table = seeded_tasks(4)
+    
+    page = table.scan(IndexName='PriorityIndex')
+    
+    assert page['Count'] == 0
+
+
+def test_pages_stop_at_page_size_bytes():
+    """Test the 1 MB page cut (scaled down here)."""
+    table = InMemoryTable(page_size_bytes=1000)
+    table.seed({'id': f'{i:03d}', 'body': 'x' * 300} for i in range(10))
+    
+    pages, start_key = [], None
+    while True:
+        page = table.scan(**({'ExclusiveStartKey': start_key} if start_key else {}))
+        pages.append(page['Count'])
+        start_key = page.get('LastEvaluatedKey')
+        if not start_key:
+            break
+    
+    assert pages == [4, 4, 2]
+
+
+def test_parallel_scan_segments_partition_the_table():
+    """Test that segments are disjoint and cover every item."""
+    table = seeded_tasks(50)
+    
+    segments = [
+        {item['id'] for item in table.scan(Segment=segment, TotalSegments=4)['Items']}
+        for segment in range(4)
+    ]
+    
+    assert sum(len(ids) for ids in segments) == 50
+    assert set().union(*segments) == {f'task-{i:02d}' for i in range(50)}
+
+
+def test_update_item_conditions_and_return_values():
+    """Test update expressions, condition failures and ReturnValues."""
+    table = seeded_tasks(1)
+    
+    response = table.update_item(
+        Key={'id': 'task-00'},
+        UpdateExpression='SET points = points + :one, #v = if_not_exists(#v, :zero) + :one REMOVE created_at',
+        ConditionExpression='attribute_exists(id)',
+        ExpressionAttributeNames={'#v': 'version'},
+        ExpressionAttributeValues={':one': 1, ':zero': 0},
+        ReturnValues='UPDATED_NEW'
+    )
+    
+    assert response['Attributes'] == {'points': Decimal(1), 'version': Decimal(1)}
+    assert 'created_at' not in table.get_item(Key={'id': 'task-00'})['Item']
+    with pytest.raises(ClientError) as error:
+        table.update_item(
+            Key={'id': 'task-00'},
+            UpdateExpression='SET points = :zero',
+            ConditionExpression='#v = :stale',
+            ExpressionAttributeNames={'#v': 'version'},
+            ExpressionAttributeValues={':zero': 0, ':stale': 7}
+        )
+    assert error.value.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+
+def test_get_item_projection_and_consumed_capacity():
+    """Test ProjectionExpression and ReturnConsumedCapacity on reads."""
+    table = seeded_tasks(1)
+    
+    response = table.get_item(
+        Key={'id': 'task-00'},
+        ProjectionExpression='id, #s',
+        ExpressionAttributeNames={'#s': 'status'},
+        ReturnConsumedCapacity='TOTAL'
+    )
+    
+    assert response['Item'] == {'id': 'task-00', 'status': 'pending'}
+    assert response['ConsumedCapacity'] == {'TableName': 'tasks', 'CapacityUnits': 0.5}
+
+
+def test_throttling_and_unprocessed_batch_requests():
+    """Test injected throttling for single calls and batch calls."""
+    throttled = InMemoryTable(throttle_rate=1.0)
+    with pytest.raises(ClientError) as error:
+        throttled.get_item(Key={'id': 'a'})
+    assert error.value.response['Error']['Code'] == 'ProvisionedThroughputExceededException'
+    
+    requests = [{'PutRequest': {'Item': {'id': str(i)}}} for i in range(25)]
+    assert throttled.batch_write(requests) == {'UnprocessedItems': requests}
+    
+    flaky = InMemoryTable(unprocessed_rate=0.5, seed=1)
+    unprocessed = flaky.batch_write(requests)['UnprocessedItems']
+    result = flaky.batch_get([{'id': str(i)} for i in range(25)])
+    
+    assert 0 < len(unprocessed) < 25
+    assert len(flaky) == 25 - len(unprocessed)
+    assert len(result['Items']) + len(result['UnprocessedKeys']) <= 25
+
+
+def test_batch_limits_are_enforced():
+    """Test the BatchWriteItem / BatchGetItem request size limits."""
+    table = InMemoryTable()
+    
+    with pytest.raises(ClientError):
+        table.batch_write([{'PutRequest': {'Item': {'id': str(i)}}} for i in range(26)])
+    with pytest.raises(ClientError):
+        table.batch_get([{'id': str(i)} for i in range(101)])
+
+
+def test_transactions_are_all_or_nothing_across_tables():
+    """Test that a failed condition cancels every operation with per-item reasons."""
+    tasks, meta = tasks_table(), meta_table()
+    transactions = InMemoryTransactions(tasks, meta)
+    counter = {'Update': {
+        'TableName': 'tasks-meta',
+        'Key': {'pk': 'STATS', 'sk': 'tasks'},
+        'UpdateExpression': 'ADD #n :one',
+        'ExpressionAttributeNames': {'#n': 'total'},
+        'ExpressionAttributeValues': {':one': 1}
+    }}
+    put = {'Put': {
+        'TableName': 'tasks',
+        'Item': {'id': 'a'},
+        'ConditionExpression': 'attribute_not_exists(id)'
+    }}
+    
+    transactions.transact_write([put, counter])
+    with pytest.raises(ClientError) as error:
+        transactions.transact_write([put, counter])
+    
+    assert error.value.response['Error']['Code'] == 'TransactionCanceledException'
+    assert [reason['Code'] for reason in error.value.response['CancellationReasons']] == [
+        'ConditionalCheckFailed', 'None'
+    ]
+    assert meta.get_item(Key={'pk': 'STATS', 'sk': 'tasks'})['Item']['total'] == 1
+    assert len(tasks) == 1
+
+
+def test_stream_records_describe_each_change():
+    """Test INSERT/MODIFY/REMOVE records with images, skipping writes that change nothing."""
+    table = tasks_table(stream=True)
+    table.put_item(Item={'id': 'a', 'n': 1})
+    table.put_item(Item={'id': 'a', 'n': 1})
+    table.update_item(Key={'id': 'a'}, UpdateExpression='SET n = :n', ExpressionAttributeValues={':n': 2})
+    table.batch_write([{'DeleteRequest': {'Key': {'id': 'a'}}}])
+    table.delete_item(Key={'id': 'a'})
+    
+    records = table.take_stream_records()
+    
+    assert [record['eventName'] for record in records] == ['INSERT', 'MODIFY', 'REMOVE']
+    assert records[0]['dynamodb']['NewImage'] == {'id': {'S': 'a'}, 'n': {'N': '1'}}
+    assert 'OldImage' not in records[0]['dynamodb']
+    assert records[1]['dynamodb']['OldImage']['n'] == {'N': '1'}
+    assert records[2]['dynamodb']['Keys'] == {'id': {'S': 'a'}}
+    assert 'NewImage' not in records[2]['dynamodb']
+    assert records[0]['dynamodb']['SequenceNumber'] < records[2]['dynamodb']['SequenceNumber']
+    assert table.take_stream_records() == []
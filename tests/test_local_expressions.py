@@ -0,0 +1,63 @@
+"""
+Unit tests for the DynamoDB expression evaluator used by local_aws
+"""
+
+import pytest
+from decimal import Decimal
+from local_aws.expressions import (
+    Context, ExpressionError, apply_update, evaluate_condition,
+    parse_condition, parse_projection, parse_update, project
+)
+
+ITEM = {
+    'id': 'a',
+    'status': 'pending',
+    'points': Decimal(3),
+    'tags': ['x', 'y'],
+    'meta': {'owner': 'sam'}
+}
+
+
+@pytest.mark.parametrize('expression,expected', [
+    ('points BETWEEN :low AND :high', True),
+    ('#s IN (:done, :pending)', True),
+    ('NOT attribute_exists(missing) AND begins_with(id, :a)', True),
+    ('size(tags) > :two OR meta.owner = :owner', True),
+    ('contains(tags, :z)', False),
+    ('attribute_type(points, :n) AND tags[1] = :y', True),
+])
+def test_evaluate_condition(expression, expected):
+    """Test condition expression grammar and functions."""
+    context = Context({'#s': 'status'}, {
+        ':low': Decimal(1), ':high': Decimal(5), ':done': 'done', ':pending': 'pending',
+        ':a': 'a', ':two': Decimal(2), ':owner': 'sam', ':z': 'z', ':n': 'N', ':y': 'y'
+    })
+    
+    assert evaluate_condition(parse_condition(expression), ITEM, context) is expected
+
+
+def test_apply_update_returns_copy_and_touched_names():
+    """Test SET / REMOVE / ADD actions without mutating the input."""
+    context = Context(None, {':more': ['z'], ':one': Decimal(1)})
+    actions = parse_update('SET tags = list_append(tags, :more) REMOVE meta ADD points :one')
+    
+    updated, touched = apply_update(actions, ITEM, context)
+    
+    assert updated['tags'] == ['x', 'y', 'z']
+    assert updated['points'] == Decimal(4)
+    assert 'meta' not in updated
+    assert ITEM['points'] == Decimal(3)
+    assert set(touched) == {'tags', 'meta', 'points'}
+
+
+def test_project_nested_paths():
+    """Test projections of top-level and nested attributes."""
+    assert project(ITEM, parse_projection('id, meta.owner'), Context()) == {
+        'id': 'a', 'meta': {'owner': 'sam'}
+    }
+
+
+def test_invalid_expression_raises():
+    """Test that malformed expressions are reported."""
+    with pytest.raises(ExpressionError):
+        parse_condition('status = ')
@@ -0,0 +1,54 @@
+"""
+Unit tests for offloading responses to S3
+"""
+
+import gzip
+from datetime import datetime, timedelta, timezone
+from local_aws.s3 import InMemoryS3
+from utils.offload import ResponseStore
+
+
+def test_offload_stores_compressed_body_under_content_address():
+    """Test that bodies are gzip compressed under their SHA-256."""
+    s3 = InMemoryS3()
+    store = ResponseStore('bucket', client=s3, url_ttl_seconds=60)
+    body = b'{"tasks": []}' * 1000
+    
+    envelope = store.offload(body)
+    
+    key = f"responses/{envelope['sha256']}.json.gz"
+    stored = s3.objects[('bucket', key)]
+    assert gzip.decompress(stored['Body']) == body
+    assert stored['ContentEncoding'] == 'gzip'
+    assert envelope['url'].startswith(f'https://bucket.s3.local/{key}?')
+    assert envelope['expires_in'] == 60
+    assert envelope['size'] == len(body)
+    assert envelope['reused'] is False
+
+
+def test_offload_reuses_identical_bodies():
+    """Test that unchanged data is not uploaded again."""
+    s3 = InMemoryS3()
+    store = ResponseStore('bucket', client=s3)
+    
+    first = store.offload(b'same')
+    second = store.offload(b'same')
+    store.offload(b'different')
+    
+    assert second['reused'] is True
+    assert second['sha256'] == first['sha256']
+    assert s3.calls['put_object'] == 2
+
+
+def test_offload_rewrites_objects_close_to_expiry():
+    """Test that old objects are refreshed instead of reused."""
+    now = [datetime(2024, 1, 1, tzinfo=timezone.utc)]
+    s3 = InMemoryS3(now=lambda: now[0])
+    store = ResponseStore('bucket', client=s3, max_reuse_seconds=3600, now=lambda: now[0])
+    store.offload(b'body')
+    
+    now[0] += timedelta(hours=2)
+    envelope = store.offload(b'body')
+    
+    assert envelope['reused'] is False
+    assert s3.calls['put_object'] == 2
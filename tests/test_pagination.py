@@ -0,0 +1,113 @@
+"""
+Unit tests for pagination utilities
+"""
+
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import MagicMock
+from utils import pagination
+from utils.pagination import (
+    InvalidCursorError,
+    MAX_PAGE_SIZE,
+    cursor_secret_from_env,
+    decode_cursor,
+    encode_cursor,
+    get_cursor_secret,
+    parse_limit,
+)
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes back to the original key."""
+    key = {'id': 'task-123'}
+    
+    token = encode_cursor(key, 'secret')
+    
+    assert decode_cursor(token, 'secret') == key
+
+
+def test_cursor_rejects_tampering():
+    """Test that a modified cursor or wrong secret is rejected."""
+    token = encode_cursor({'id': 'task-123'}, 'secret')
+    payload, signature = token.split('.')
+    forged = encode_cursor({'id': 'task-999'}, 'secret').split('.')[0] + '.' + signature
+    
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(forged, 'secret')
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, 'other-secret')
+    with pytest.raises(InvalidCursorError):
+        decode_cursor('not-a-cursor', 'secret')
+
+
+def test_cursor_bound_to_scope():
+    """Test that a cursor issued for one listing is rejected by another."""
+    token = encode_cursor({'id': 'task-123'}, 'secret', scope='status=pending')
+    
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, 'secret', scope='status=completed')
+
+
+def test_parse_limit():
+    """Test page size parsing and bounds."""
+    assert parse_limit(None) == 50
+    assert parse_limit('10') == 10
+    
+    for value in ['0', str(MAX_PAGE_SIZE + 1), 'ten']:
+        with pytest.raises(ValueError):
+            parse_limit(value)
+
+
+def test_cursor_secret_comes_from_secrets_manager(monkeypatch):
+    """Test that the deployed ARN is read once, and a local CURSOR_SECRET wins."""
+    client = MagicMock()
+    client.get_secret_value.return_value = {'SecretString': 'from-secrets-manager'}
+    monkeypatch.setenv('CURSOR_SECRET_ARN', 'arn:aws:secretsmanager:us-east-1:123:secret:cursor')
+    monkeypatch.setenv('CURSOR_SECRET', '')
+    
+    assert cursor_secret_from_env(client) == 'from-secrets-manager'
+    client.get_secret_value.assert_called_once_with(SecretId='arn:aws:secretsmanager:us-east-1:123:secret:cursor')
+    
+    monkeypatch.setenv('CURSOR_SECRET', 'local')
+    assert cursor_secret_from_env(client) == 'local'
+
+
+def test_missing_cursor_secret_fails_fast(monkeypatch):
+    """Test that an empty CURSOR_SECRET without an ARN is refused rather than signing with ''."""
+    monkeypatch.delenv('CURSOR_SECRET_ARN', raising=False)
+    monkeypatch.setenv('CURSOR_SECRET', '')
+    
+    with pytest.raises(RuntimeError):
+        cursor_secret_from_env()
+
+
+def test_cursor_secret_is_loaded_once_on_first_use(monkeypatch):
+    """Test that the secret is resolved lazily and cached for the container."""
+    monkeypatch.setattr(pagination, '_cursor_secret', None)
+    monkeypatch.setenv('CURSOR_SECRET', 'first')
+    
+    assert get_cursor_secret() == 'first'
+    monkeypatch.setenv('CURSOR_SECRET', 'second')
+    assert get_cursor_secret() == 'first'
+
+
+def test_importing_the_handler_does_not_load_the_secret():
+    """Test that a cold start with only CURSOR_SECRET_ARN makes no Secrets Manager call."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([os.path.join(root, 'src'), root]),
+        CURSOR_SECRET='',
+        CURSOR_SECRET_ARN='arn:aws:secretsmanager:us-east-1:123:secret:cursor',
+        AWS_EC2_METADATA_DISABLED='true'
+    )
+    probe = (
+        "import sys, handlers.task_handler, utils.pagination as p; "
+        "print('boto3' in sys.modules, p._cursor_secret)"
+    )
+    
+    result = subprocess.run([sys.executable, '-c', probe], env=env, capture_output=True, text=True, check=True)
+    
+    assert result.stdout.split() == ['False', 'None']
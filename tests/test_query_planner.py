@@ -0,0 +1,133 @@
+"""
+Unit tests for the list query planner
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from utils.query_planner import plan_task_query, execute_page
+
+
+def test_status_filter_uses_status_index():
+    """Test that status and created_after become key conditions on StatusIndex."""
+    plan = plan_task_query({
+        'status': 'pending',
+        'created_after': '2024-01-01',
+        'priority': 'high'
+    })
+    
+    assert plan.operation == 'query'
+    assert plan.params['IndexName'] == 'StatusIndex'
+    assert plan.params['KeyConditionExpression'] == (
+        '#created_at > :created_after AND #status = :status'
+    )
+    assert plan.params['FilterExpression'] == '#priority = :priority'
+    assert plan.params['ScanIndexForward'] is False
+
+
+def test_priority_filter_uses_priority_index():
+    """Test that a priority-only filter is served by PriorityIndex."""
+    plan = plan_task_query({'priority': 'high', 'due_before': '2024-06-01'})
+    
+    assert plan.params['IndexName'] == 'PriorityIndex'
+    assert plan.params['KeyConditionExpression'] == '#priority = :priority'
+    assert plan.params['FilterExpression'] == '#due_date < :due_before'
+
+
+def test_unindexed_filters_fall_back_to_scan():
+    """Test that filters without a usable index produce a filtered scan."""
+    plan = plan_task_query({'due_before': '2024-06-01', 'limit': '10'})
+    
+    assert plan.operation == 'scan'
+    assert 'IndexName' not in plan.params
+    assert plan.params['FilterExpression'] == (
+        '#due_date < :due_before AND attribute_not_exists(#deleted_at)'
+    )
+    assert plan_task_query({}).params == {
+        'FilterExpression': 'attribute_not_exists(#deleted_at)',
+        'ExpressionAttributeNames': {'#deleted_at': 'deleted_at'}
+    }
+
+
+def test_invalid_date_filter():
+    """Test that malformed dates are rejected."""
+    with pytest.raises(ValueError):
+        plan_task_query({'created_after': 'yesterday'})
+
+
+def test_date_filters_with_an_offset_are_compared_in_utc():
+    """Test that offset and Z bounds match the +00:00 form timestamps are stored in."""
+    offset = plan_task_query({'status': 'pending', 'created_after': '2024-01-01T05:00:00+05:00'})
+    zulu = plan_task_query({'due_before': '2024-06-01T12:00:00Z'})
+    dated = plan_task_query({'due_before': '2024-06-01'})
+    
+    assert offset.params['ExpressionAttributeValues'][':created_after'] == '2024-01-01T00:00:00+00:00'
+    assert '2024-01-01T00:30:00+00:00' > offset.params['ExpressionAttributeValues'][':created_after']
+    assert zulu.params['ExpressionAttributeValues'][':due_before'] == '2024-06-01T12:00:00+00:00'
+    assert '2024-06-01T12:00:00.500000+00:00' > zulu.params['ExpressionAttributeValues'][':due_before']
+    assert dated.params['ExpressionAttributeValues'][':due_before'] == '2024-06-01'
+
+
+def test_execute_page_trims_and_resumes_after_last_item():
+    """Test that over-filled filtered pages are trimmed with an exact resume key."""
+    table = MagicMock()
+    table.query.side_effect = [
+        {'Items': [{'id': 'a', 'status': 'pending', 'created_at': '3'}],
+         'LastEvaluatedKey': {'id': 'x'}},
+        {'Items': [{'id': 'b', 'status': 'pending', 'created_at': '2'},
+                   {'id': 'c', 'status': 'pending', 'created_at': '1'}],
+         'LastEvaluatedKey': {'id': 'y'}},
+    ]
+    plan = plan_task_query({'status': 'pending', 'priority': 'high'})
+    
+    items, last_key = execute_page(table, plan, 2)
+    
+    assert [item['id'] for item in items] == ['a', 'b']
+    assert last_key == {'id': 'b', 'status': 'pending', 'created_at': '2'}
+    assert table.query.call_count == 2
+
+
+def test_plan_projects_requested_fields_plus_key_attributes():
+    """Test that sparse fieldsets still read what paging and ETags need."""
+    plan = plan_task_query({'status': 'pending', 'fields': 'title'})
+    
+    assert plan.fields == ('id', 'title')
+    projected = set(plan.params['ProjectionExpression'].split(', '))
+    assert projected == {'#id', '#title', '#status', '#created_at', '#updated_at', '#version'}
+    assert plan.params['ExpressionAttributeNames']['#status'] == 'status'
+    assert plan.params['KeyConditionExpression'] == '#status = :status'
+
+
+def test_unfiltered_listing_merges_created_index_shards():
+    """Test that, when enabled, unindexed listings query every CreatedIndex shard."""
+    with patch('utils.query_planner.LIST_FROM_CREATED_INDEX', True):
+        plan = plan_task_query({'created_after': '2024-01-01', 'due_before': '2024-06-01'})
+    
+    assert plan.operation == 'merge'
+    assert plan.sorted_by_index
+    assert plan.params['IndexName'] == 'CreatedIndex'
+    assert plan.params['KeyConditionExpression'] == '#shard = :shard AND #created_at > :created_after'
+    assert plan.params['FilterExpression'] == '#due_date < :due_before'
+    assert plan.scope.startswith('CreatedIndex/4&')
+    
+    table = MagicMock()
+    table.query.return_value = {'Items': []}
+    
+    items, positions = execute_page(table, plan, 10)
+    
+    assert (items, positions) == ([], None)
+    shards = sorted(call.kwargs['ExpressionAttributeValues'][':shard'] for call in table.query.call_args_list)
+    assert shards == [0, 1, 2, 3]
+
+
+def test_sharded_status_index_queries_each_status_shard():
+    """Test that status filters map to one StatusShardIndex partition per shard."""
+    with patch('utils.query_planner.STATUS_INDEX_SHARDED', True):
+        plan = plan_task_query({'status': 'pending', 'priority': 'high'})
+    
+    assert plan.operation == 'merge'
+    assert plan.params['IndexName'] == 'StatusShardIndex'
+    assert plan.params['KeyConditionExpression'] == '#status_shard = :shard'
+    assert plan.params['FilterExpression'] == '#priority = :priority'
+    assert ':status' not in plan.params['ExpressionAttributeValues']
+    assert plan.partitions == {str(i): f'pending#{i}' for i in range(4)}
+    assert plan.scope == 'StatusShardIndex/4&priority=high&status=pending'
@@ -0,0 +1,56 @@
+"""
+Unit tests for the task work queue
+"""
+
+import random
+from utils.queue import is_queued_correctly, queue_attributes, queue_changes, spread
+from utils.sharding import shard_for
+
+
+def test_queue_attributes_order_pending_by_priority_then_age():
+    """Test pending and leased entries, and that other tasks are not queued."""
+    shard = shard_for('a')
+    pending = {'id': 'a', 'status': 'pending', 'priority': 'high', 'created_at': '2024-01-02'}
+    
+    assert queue_attributes(pending) == {'queue_shard': f'pending#{shard}', 'queue_key': '0#2024-01-02'}
+    assert queue_attributes(dict(pending, priority='low'))['queue_key'] == '2#2024-01-02'
+    assert queue_attributes(dict(pending, priority='urgent'))['queue_key'] == '3#2024-01-02'
+    assert queue_attributes(dict(pending, status='in_progress', lease_expires_at='2024-01-03')) == {
+        'queue_shard': f'leased#{shard}', 'queue_key': '2024-01-03'
+    }
+    assert queue_attributes(dict(pending, status='in_progress')) == {}
+    assert queue_attributes(dict(pending, deleted_at='2024-01-04')) == {}
+
+
+def test_queue_changes_move_and_release_tasks():
+    """Test the attributes set and removed as a task moves through the queue."""
+    pending = {'id': 'a', 'status': 'pending', 'priority': 'low', 'created_at': '2024-01-02'}
+    pending.update(queue_attributes(pending))
+    leased = dict(pending, status='in_progress', claimed_by='w1', lease_expires_at='2024-01-03')
+    leased.update(queue_attributes(leased))
+    
+    assert queue_changes(pending, dict(pending, priority='high')) == ({'queue_key': '0#2024-01-02'}, [])
+    assert queue_changes(pending, dict(pending, title='x')) == ({}, [])
+    assert queue_changes(leased, dict(leased, status='completed')) == (
+        {}, ['queue_shard', 'queue_key', 'claimed_by', 'lease_expires_at']
+    )
+    assert is_queued_correctly(pending)
+    assert not is_queued_correctly(dict(pending, status='completed'))
+
+
+def test_spread_shuffles_only_equally_ranked_candidates():
+    """Test that a shuffle never moves a lower priority ahead of a higher one."""
+    def entry(kind, key):
+        return {'queue_shard': f'{kind}#0', 'queue_key': key}
+    
+    high = [entry('pending', f'0#2024-01-0{day}') for day in range(1, 4)]
+    candidates = high + [entry('pending', f'2#2024-01-0{day}') for day in range(1, 6)]
+    
+    for seed in range(20):
+        spread_out = spread(candidates, 4, random.Random(seed))
+        assert sorted(spread_out[:3], key=lambda task: task['queue_key']) == high
+        assert spread_out[3:] == candidates[3:]
+    
+    leased = [entry('leased', '2024-01-01'), entry('pending', '0#2024-01-01')]
+    assert spread(leased, 4, random.Random(0)) == leased
+    assert spread([], 4) == []
@@ -0,0 +1,52 @@
+"""
+Unit tests for the recent tasks snapshot
+"""
+
+import pytest
+from utils.recent import RecentTasks
+
+
+def task(task_id, created_at, version=1, **attributes):
+    return dict(id=task_id, created_at=created_at, version=version, shard=0, **attributes)
+
+
+def test_snapshot_keeps_newest_tasks_in_order():
+    """Test insertion order, bounding and eviction tracking."""
+    snapshot = RecentTasks(size=3)
+    for i in [2, 4, 1, 3]:
+        snapshot.apply(task(f't{i}', f'2024-01-0{i}'))
+    
+    assert [entry['id'] for entry in snapshot.tasks] == ['t4', 't3', 't2']
+    assert 'shard' not in snapshot.tasks[0]
+    assert snapshot.evicted
+    assert snapshot.changed
+
+
+def test_replayed_and_stale_records_are_no_ops():
+    """Test that applying a change twice, or an older version, changes nothing."""
+    snapshot = RecentTasks(tasks=[task('a', '2024-01-01', version=2, title='new')])
+    
+    snapshot.apply(task('a', '2024-01-01', version=2, title='new'))
+    snapshot.apply(task('a', '2024-01-01', version=1, title='old'))
+    assert not snapshot.changed
+    
+    snapshot.apply(task('a', '2024-01-01', version=3, title='newer'))
+    assert snapshot.tasks[0]['title'] == 'newer'
+
+
+def test_deletes_remove_tasks_and_limit_what_can_be_served():
+    """Test tombstones and removals, and the fallback signal after eviction."""
+    snapshot = RecentTasks(size=2)
+    for i in [1, 2, 3]:
+        snapshot.apply(task(f't{i}', f'2024-01-0{i}'))
+    
+    snapshot.apply(dict(id='t3', deleted_at='2024-02-01', version=2))
+    snapshot.apply(None, task('t2', '2024-01-02'))
+    snapshot.apply(None, task('missing', '2024-01-09'))
+    
+    assert snapshot.tasks == []
+    assert snapshot.newest(1) is None
+    assert RecentTasks(tasks=[task('a', '2024-01-01')]).newest(10) == [task('a', '2024-01-01')]
+    assert RecentTasks.from_item(None).newest(1) is None
+    with pytest.raises(ValueError):
+        snapshot.apply(None, None)
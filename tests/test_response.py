@@ -0,0 +1,83 @@
+"""
+Unit tests for response utilities
+"""
+
+import base64
+import gzip
+import json
+import pytest
+from utils.response import compress_response, negotiate_encoding, success_response
+
+
+def test_negotiate_encoding():
+    """Test Accept-Encoding negotiation including q-values and wildcards."""
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding('gzip, deflate') == 'gzip'
+    assert negotiate_encoding('gzip;q=0') is None
+    assert negotiate_encoding('identity') is None
+    assert negotiate_encoding('*') in ('br', 'gzip')
+
+
+def test_compress_response_gzip_round_trip():
+    """Test that large bodies are gzipped, base64 encoded and flagged."""
+    payload = {'tasks': [{'id': str(i), 'title': 'Task'} for i in range(100)]}
+    response = {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'ETag': '"abc"'},
+        'body': json.dumps(payload)
+    }
+    
+    compressed = compress_response(response, 'gzip', min_size=10)
+    
+    assert compressed['isBase64Encoded'] is True
+    assert compressed['headers']['Content-Encoding'] == 'gzip'
+    assert compressed['headers']['Vary'] == 'Accept-Encoding'
+    assert compressed['headers']['ETag'] == 'W/"abc"'
+    assert json.loads(gzip.decompress(base64.b64decode(compressed['body']))) == payload
+    assert 'Content-Encoding' not in response['headers']
+
+
+def test_small_bodies_stay_uncompressed():
+    """Test that bodies under the threshold are returned as plain text."""
+    response = success_response(200, {'ok': True}, accept_encoding='gzip')
+    
+    assert 'isBase64Encoded' not in response
+    assert json.loads(response['body'])['data'] == {'ok': True}
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_to_json_handles_dynamodb_types(monkeypatch, use_orjson):
+    """Test that Decimals, sets and datetimes serialize with either backend."""
+    from datetime import datetime, timezone
+    from decimal import Decimal
+    from utils import response
+    
+    if not use_orjson:
+        monkeypatch.setattr(response, 'orjson', None)
+    elif response.orjson is None:
+        pytest.skip("orjson is not installed")
+    
+    data = {
+        'count': Decimal('3'),
+        'ratio': Decimal('0.25'),
+        'tags': {'b', 'a'},
+        'at': datetime(2024, 1, 1, tzinfo=timezone.utc)
+    }
+    
+    assert json.loads(response.to_json(data)) == {
+        'count': 3,
+        'ratio': 0.25,
+        'tags': ['a', 'b'],
+        'at': '2024-01-01T00:00:00+00:00'
+    }
+
+
+def test_json_response_does_not_share_header_dicts():
+    """Test that per-response headers never leak into the precomputed defaults."""
+    from utils.response import API_HEADERS, json_response
+    
+    response = json_response(200, {}, headers={'ETag': '"v1"'})
+    response['headers']['X-Test'] = '1'
+    
+    assert 'ETag' not in API_HEADERS
+    assert 'X-Test' not in API_HEADERS
@@ -0,0 +1,77 @@
+"""
+Unit tests for the parallel scan engine
+"""
+
+import pytest
+from local_aws.dynamodb import InMemoryTable
+from utils.scan import ParallelScan, RateLimiter, parallel_scan
+
+
+@pytest.fixture
+def table():
+    table = InMemoryTable(page_size_bytes=2000)
+    table.seed({'id': f'{i:04d}', 'body': 'x' * 100, 'n': i} for i in range(500))
+    return table
+
+
+def test_parallel_scan_yields_every_item_once(table):
+    """Test that segments together cover the table and follow page keys."""
+    scan = ParallelScan(table, segments=4)
+    
+    ids = [item['id'] for item in scan]
+    
+    assert sorted(ids) == [f'{i:04d}' for i in range(500)]
+    assert scan.stats['items'] == 500
+    assert scan.stats['pages'] == table.calls['scan'] > 4
+    assert scan.stats['consumed_capacity'] > 0
+
+
+def test_parallel_scan_applies_projection_and_filter(table):
+    """Test that expressions are passed to every segment."""
+    items = list(parallel_scan(
+        table,
+        segments=3,
+        projection_expression='id',
+        filter_expression='n < :n',
+        expression_attribute_values={':n': 10}
+    ))
+    
+    assert sorted(items, key=lambda item: item['id']) == [{'id': f'{i:04d}'} for i in range(10)]
+
+
+def test_parallel_scan_stops_workers_when_consumer_stops(table):
+    """Test that closing the stream early does not read the whole table."""
+    stream = parallel_scan(table, segments=2, page_limit=5)
+    
+    first = [next(stream) for _ in range(3)]
+    stream.close()
+    
+    assert len(first) == 3
+    assert table.calls['scan'] < 500 / 5
+
+
+def test_parallel_scan_propagates_worker_errors():
+    """Test that a failing segment surfaces in the consumer."""
+    with pytest.raises(Exception) as error:
+        list(parallel_scan(InMemoryTable(throttle_rate=1.0), segments=2))
+    
+    assert 'ProvisionedThroughputExceeded' in str(error.value)
+
+
+def test_rate_limiter_waits_for_consumed_capacity():
+    """Test that overspending the budget delays the next read."""
+    now = [0.0]
+    sleeps = []
+    
+    def sleep(delay):
+        sleeps.append(delay)
+        now[0] += delay
+    
+    limiter = RateLimiter(10, clock=lambda: now[0], sleep=sleep)
+    
+    assert limiter.wait() == 0
+    limiter.charge(25)
+    waited = limiter.wait()
+    
+    assert waited == pytest.approx(1.5)
+    assert sum(sleeps) == pytest.approx(1.5)
@@ -0,0 +1,97 @@
+"""
+Unit tests for inverted-index task search
+"""
+
+import pytest
+from local_aws.dynamodb import meta_table, tasks_table
+from utils.batch import write_all
+from utils.search import index_tasks, parse_query, posting_changes, search, tokenize
+
+
+def index(meta, *tasks):
+    for task in tasks:
+        write_all(meta, posting_changes(task['id'], None, task))
+
+
+def test_tokenize_normalizes_case_accents_and_short_words():
+    """Test that text is folded to comparable tokens."""
+    assert tokenize('Café: Ship the NEW ÉCLAIR-menu, v2 a') == ['cafe', 'ship', 'the', 'new', 'eclair', 'menu', 'v2']
+    assert tokenize(None) == []
+    assert parse_query('Ship ship menus') == ['ship', 'menus']
+    with pytest.raises(ValueError):
+        parse_query('a !')
+
+
+def test_posting_changes_only_touch_changed_tokens():
+    """Test create, edit and delete diffs, including weights per field."""
+    old = {'id': 't1', 'title': 'Write report', 'description': 'report draft'}
+    new = {'id': 't1', 'title': 'Write report', 'description': 'final'}
+    
+    created = posting_changes('t1', None, old)
+    edited = posting_changes('t1', old, new)
+    
+    assert {request['PutRequest']['Item']['token']: request['PutRequest']['Item']['weight'] for request in created} == {
+        'write': 3, 'report': 4, 'draft': 1
+    }
+    assert created[0]['PutRequest']['Item']['pk'] == 'SEARCH#dr'
+    assert [request['DeleteRequest']['Key']['sk'] for request in edited if 'DeleteRequest' in request] == ['draft#t1']
+    assert sorted(request['PutRequest']['Item']['sk'] for request in edited if 'PutRequest' in request) == [
+        'final#t1', 'report#t1'
+    ]
+    assert len(posting_changes('t1', new, dict(id='t1', deleted_at='now'))) == 3
+    assert posting_changes('t1', new, dict(new)) == []
+
+
+def test_search_ands_terms_matches_prefixes_and_ranks():
+    """Test AND semantics, prefix matches and relevance ordering."""
+    meta = meta_table()
+    index(
+        meta,
+        {'id': 'a', 'title': 'Quarterly report', 'description': ''},
+        {'id': 'b', 'title': 'Reporting pipeline', 'description': 'quarterly numbers'},
+        {'id': 'c', 'title': 'Report', 'description': 'monthly'},
+        {'id': 'd', 'title': 'Groceries', 'description': ''}
+    )
+    
+    ranked, truncated = search(meta, ['report', 'quarterly'])
+    
+    assert [task_id for task_id, _ in ranked] == ['a', 'b']
+    assert not truncated
+    assert [task_id for task_id, _ in search(meta, ['repo'])[0]] == ['c', 'b', 'a']
+    assert search(meta, ['report', 'groceries'])[0] == []
+    assert meta.calls['query'] == 5
+
+
+def test_index_tasks_backfills_live_tasks_and_keeps_concurrent_changes():
+    """Test the backfill indexes existing tasks without undoing stream writes."""
+    tasks, meta = tasks_table(), meta_table()
+    tasks.seed([
+        {'id': 'a', 'title': 'Quarterly report', 'description': 'draft', 'version': 1},
+        {'id': 'b', 'title': 'Groceries', 'description': '', 'version': 1},
+        {'id': 'c', 'title': 'Old report', 'description': '', 'version': 1, 'deleted_at': 'now'}
+    ])
+    batch_get = tasks.batch_get
+    
+    def edited_meanwhile(keys, **params):
+        # The stream indexes an edit to "a" between the scan and the re-read
+        old = tasks.get_item(Key={'id': 'a'})['Item']
+        new = dict(old, title='Monthly summary', version=2)
+        tasks.put_item(Item=new)
+        write_all(meta, posting_changes('a', old, new))
+        tasks.batch_get = batch_get
+        return batch_get(keys, **params)
+    
+    tasks.batch_get = edited_meanwhile
+    
+    result = index_tasks(tasks, meta, segments=2)
+    
+    assert result == {'indexed': 2, 'changed': 1, 'postings': 8, 'unwritten': 0, 'unverified': 0}
+    assert [task_id for task_id, _ in search(meta, ['report'])[0]] == []
+    assert [task_id for task_id, _ in search(meta, ['monthly', 'draft'])[0]] == ['a']
+    assert [task_id for task_id, _ in search(meta, ['groceries'])[0]] == ['b']
+    
+    postings = sorted(item['sk'] for item in meta.scan()['Items'])
+    rerun = index_tasks(tasks, meta)
+    
+    assert rerun['changed'] == 0
+    assert sorted(item['sk'] for item in meta.scan()['Items']) == postings
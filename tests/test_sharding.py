@@ -0,0 +1,89 @@
+"""
+Unit tests for merged reads of write-sharded indexes
+"""
+
+import random
+import pytest
+from local_aws.dynamodb import InMemoryTable
+from utils.sharding import merge_shard_queries, shard_for, sharded_value
+
+SHARDS = 4
+PARAMS = {
+    'IndexName': 'CreatedIndex',
+    'KeyConditionExpression': '#shard = :shard',
+    'ExpressionAttributeNames': {'#shard': 'shard'},
+    'ScanIndexForward': False
+}
+PARTITIONS = {str(shard): shard for shard in range(SHARDS)}
+
+
+@pytest.fixture
+def table():
+    table = InMemoryTable(indexes={'CreatedIndex': ('shard', 'created_at')})
+    timestamps = list(range(200))
+    random.Random(7).shuffle(timestamps)
+    table.seed(
+        {'id': f'task-{i:03d}', 'shard': shard_for(f'task-{i:03d}', SHARDS), 'created_at': f'{t:05d}', 'n': t}
+        for i, t in enumerate(timestamps)
+    )
+    return table
+
+
+def read_all(table, limit, params=PARAMS):
+    pages, positions = [], None
+    while True:
+        items, positions = merge_shard_queries(
+            table, params, 'shard', 'created_at', PARTITIONS, limit, positions
+        )
+        pages.append(items)
+        if positions is None:
+            return pages
+
+
+def test_shard_for_is_stable_and_in_range():
+    """Test that shards are deterministic and cover the range."""
+    shards = {shard_for(f'task-{i}', SHARDS) for i in range(100)}
+    
+    assert shards == set(range(SHARDS))
+    assert shard_for('task-1', SHARDS) == shard_for('task-1', SHARDS)
+
+
+def test_merge_returns_globally_ordered_pages(table):
+    """Test that paging through the merge yields every item newest first."""
+    pages = read_all(table, 7)
+    created = [item['created_at'] for page in pages for item in page]
+    
+    assert created == [f'{t:05d}' for t in range(199, -1, -1)]
+    assert all(len(page) == 7 for page in pages[:-1])
+
+
+def test_merge_ascending(table):
+    """Test that ScanIndexForward=True merges oldest first."""
+    pages = read_all(table, 50, dict(PARAMS, ScanIndexForward=True))
+    
+    assert [item['n'] for page in pages for item in page] == list(range(200))
+
+
+def test_merge_with_sparse_filter_refills_shards(table):
+    """Test that filtered shards are refilled and short pages still resume exactly."""
+    params = dict(PARAMS, FilterExpression='n < :n', ExpressionAttributeValues={':n': 20})
+    
+    pages = read_all(table, 5, params)
+    
+    assert [item['n'] for page in pages for item in page] == list(range(19, -1, -1))
+
+
+def test_merge_skips_finished_shards(table):
+    """Test that shards missing from the positions are not queried."""
+    items, positions = merge_shard_queries(
+        table, PARAMS, 'shard', 'created_at', PARTITIONS, 500, {'2': None}
+    )
+    
+    assert positions is None
+    assert {item['shard'] for item in items} == {2}
+    assert table.calls['query'] == 1
+
+
+def test_sharded_value_uses_task_shard():
+    """Test the ``<value>#<shard>`` partition key format."""
+    assert sharded_value('pending', 'task-1', SHARDS) == f"pending#{shard_for('task-1', SHARDS)}"
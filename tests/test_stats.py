@@ -0,0 +1,141 @@
+"""
+Unit tests for the materialized task counters
+"""
+
+from botocore.exceptions import ClientError
+from local_aws.dynamodb import InMemoryTransactions, meta_table, tasks_table
+from utils.stats import (
+    STATS_SHARDS, add_to_counters, count_uncounted, counter_deltas, counter_update,
+    is_transaction_conflict, merge_deltas, read_stats, stats_from_items, stats_key, task_deltas
+)
+
+
+def test_counter_deltas_for_each_kind_of_write():
+    """Test deltas for creates, status changes, unchanged status and deletes."""
+    assert counter_deltas(None, 'pending') == {'status:pending': 1, 'total': 1}
+    assert counter_deltas('pending', 'done') == {'status:pending': -1, 'status:done': 1}
+    assert counter_deltas('done', 'done') == {}
+    assert counter_deltas('done', None) == {'status:done': -1, 'total': -1}
+    assert merge_deltas([counter_deltas('a', 'b'), counter_deltas('b', 'a')]) == {}
+
+
+def test_counter_update_adds_deltas_atomically():
+    """Test the transaction operation and the plain update share one ADD expression."""
+    meta = meta_table()
+    operation = counter_update('tasks-meta', {'total': 1, 'status:done': 1})
+    
+    assert operation['Update']['TableName'] == 'tasks-meta'
+    assert operation['Update']['UpdateExpression'] == 'ADD #c0 :d0, #c1 :d1'
+    
+    add_to_counters(meta, {'total': 2, 'status:done': 2})
+    add_to_counters(meta, {'status:done': -2, 'status:pending': 2})
+    add_to_counters(meta, {})
+    
+    assert meta.calls['update_item'] == 2
+    assert read_stats(meta) == {'total': 2, 'by_status': {'pending': 2}}
+    assert stats_from_items([None]) == {'total': 0, 'by_status': {}}
+
+
+def test_counter_shards_are_summed_on_read():
+    """Test that deltas spread over shards read back as one set of counts."""
+    meta = meta_table()
+    for shard in range(STATS_SHARDS):
+        add_to_counters(meta, {'total': 1, 'status:pending': 1}, shard=shard)
+    add_to_counters(meta, {'status:pending': -1, 'status:done': 1})
+    meta.put_item(Item={'pk': 'OTHER', 'sk': 'tasks#0', 'total': 100})
+    
+    assert counter_update('tasks-meta', {'total': 1}, shard=3)['Update']['Key'] == stats_key(3)
+    assert read_stats(meta) == {
+        'total': STATS_SHARDS, 'by_status': {'pending': STATS_SHARDS - 1, 'done': 1}
+    }
+    assert meta.calls['query'] == 1
+
+
+def test_task_deltas_leave_uncounted_tasks_alone():
+    """Test that only tasks already in the counters change them."""
+    assert task_deltas(None, 'pending') == {'status:pending': 1, 'total': 1}
+    assert task_deltas({'status': 'pending', 'counted': True}, 'done') == {'status:pending': -1, 'status:done': 1}
+    assert task_deltas({'status': 'pending'}, 'done') == {}
+    assert task_deltas({'status': 'pending'}, None) == {}
+
+
+def test_count_uncounted_adds_to_the_counters():
+    """Test that a rebuild adds live uncounted tasks once, keeping existing counts."""
+    tasks, meta = tasks_table(), meta_table()
+    tasks.seed([
+        {'id': 'a', 'status': 'pending', 'version': 1},
+        {'id': 'b', 'status': 'done'},
+        {'id': 'c', 'status': 'pending', 'version': 2},
+        {'id': 'd', 'deleted_at': '2024-01-01T00:00:00+00:00'},
+        {'id': 'e', 'status': 'done', 'counted': True}
+    ])
+    add_to_counters(meta, {'total': 1, 'status:done': 1})
+    transactions = InMemoryTransactions(tasks, meta)
+    
+    result = count_uncounted(tasks, meta, transactions.transact_write, batch_size=2, segments=2)
+    
+    assert result == {'counted': 3, 'uncounted': 0, 'added': {'total': 3, 'by_status': {'pending': 2, 'done': 1}}}
+    assert read_stats(meta) == {'total': 4, 'by_status': {'pending': 2, 'done': 2}}
+    assert all(tasks.get_item(Key={'id': task_id})['Item']['counted'] for task_id in 'abc')
+    assert 'counted' not in tasks.get_item(Key={'id': 'd'})['Item']
+    
+    assert count_uncounted(tasks, meta, transactions.transact_write)['counted'] == 0
+    assert read_stats(meta) == {'total': 4, 'by_status': {'pending': 2, 'done': 2}}
+
+
+def test_count_uncounted_counts_tasks_as_they_are_after_a_concurrent_write():
+    """Test that tasks changed or deleted after the scan are re-read instead of counted stale."""
+    tasks, meta = tasks_table(), meta_table()
+    tasks.seed([
+        {'id': 'a', 'status': 'pending', 'version': 1},
+        {'id': 'b', 'status': 'pending', 'version': 1},
+        {'id': 'c', 'status': 'pending', 'version': 1}
+    ])
+    transactions = InMemoryTransactions(tasks, meta)
+    
+    def transact_after_writes(items):
+        if not transact_after_writes.raced:
+            transact_after_writes.raced = True
+            tasks.put_item(Item={'id': 'a', 'status': 'done', 'version': 2})
+            tasks.put_item(Item={'id': 'b', 'deleted_at': '2024-01-01T00:00:00+00:00', 'version': 2})
+        return transactions.transact_write(items)
+    transact_after_writes.raced = False
+    
+    result = count_uncounted(tasks, meta, transact_after_writes)
+    
+    assert result['counted'] == 2
+    assert read_stats(meta) == {'total': 2, 'by_status': {'pending': 1, 'done': 1}}
+    assert tasks.get_item(Key={'id': 'a'})['Item']['counted'] is True
+
+
+def test_count_uncounted_leaves_tasks_that_keep_changing():
+    """Test that a batch that cannot be pinned within the attempts is reported, not counted."""
+    tasks, meta = tasks_table(), meta_table()
+    tasks.seed([{'id': 'a', 'status': 'pending', 'version': 1}])
+    transactions = InMemoryTransactions(tasks, meta)
+    
+    def transact_after_a_write(items):
+        task = tasks.get_item(Key={'id': 'a'})['Item']
+        tasks.put_item(Item=dict(task, version=task['version'] + 1))
+        return transactions.transact_write(items)
+    
+    result = count_uncounted(tasks, meta, transact_after_a_write, attempts=2)
+    
+    assert result == {'counted': 0, 'uncounted': 1, 'added': {'total': 0, 'by_status': {}}}
+    assert read_stats(meta) == {'total': 0, 'by_status': {}}
+
+
+def test_is_transaction_conflict():
+    """Test that failed conditions and conflicting transactions count as conflicts."""
+    def error(code, reasons):
+        return ClientError({'Error': {'Code': code}, 'CancellationReasons': reasons}, 'TransactWriteItems')
+    
+    assert is_transaction_conflict(error('TransactionCanceledException', [
+        {'Code': 'None'}, {'Code': 'ConditionalCheckFailed'}
+    ]))
+    assert is_transaction_conflict(error('TransactionCanceledException', [
+        {'Code': 'None'}, {'Code': 'TransactionConflict'}
+    ]))
+    assert not is_transaction_conflict(error('TransactionCanceledException', [{'Code': 'ThrottlingError'}]))
+    assert not is_transaction_conflict(error('ConditionalCheckFailedException', []))
+    assert is_transaction_conflict(error('TransactionConflictException', []))
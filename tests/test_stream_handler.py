@@ -0,0 +1,86 @@
+"""
+Unit tests for the stream processor
+"""
+
+import pytest
+from unittest.mock import patch
+from local_aws.dynamodb import meta_table, tasks_table
+from utils.recent import RECENT_KEY
+from src.handlers.stream_handler import lambda_handler
+
+
+@pytest.fixture
+def tables():
+    """Tasks table recording stream records, and the meta table the snapshot lives in."""
+    tasks, meta = tasks_table(stream=True), meta_table()
+    with patch('src.handlers.stream_handler.meta_table', meta):
+        yield tasks, meta
+
+
+def snapshot_ids(meta):
+    return [task['id'] for task in meta.get_item(Key=RECENT_KEY)['Item']['tasks']]
+
+
+def write_tasks(tasks, count):
+    for i in range(count):
+        tasks.put_item(Item={'id': f't{i}', 'title': str(i), 'created_at': f'2024-01-{i + 1:02d}', 'version': 1})
+
+
+def test_snapshot_follows_inserts_updates_and_deletes(tables):
+    """Test that stream batches keep the newest tasks, and replays change nothing."""
+    tasks, meta = tables
+    write_tasks(tasks, 3)
+    tasks.update_item(
+        Key={'id': 't0'},
+        UpdateExpression='SET title = :t, version = version + :one',
+        ExpressionAttributeValues={':t': 'renamed', ':one': 1}
+    )
+    tasks.update_item(
+        Key={'id': 't2'},
+        UpdateExpression='SET deleted_at = :now REMOVE created_at',
+        ExpressionAttributeValues={':now': '2024-02-01'}
+    )
+    records = tasks.take_stream_records()
+    
+    assert lambda_handler({'Records': records}, None) == {'batchItemFailures': []}
+    snapshot = meta.get_item(Key=RECENT_KEY)['Item']
+    assert [task['id'] for task in snapshot['tasks']] == ['t1', 't0']
+    assert snapshot['tasks'][1]['title'] == 'renamed'
+    
+    meta.reset_calls()
+    assert lambda_handler({'Records': records}, None) == {'batchItemFailures': []}
+    assert meta.calls['put_item'] == 0
+    assert meta.get_item(Key=RECENT_KEY)['Item']['revision'] == snapshot['revision']
+
+
+def test_bad_record_is_reported_and_earlier_records_are_kept(tables):
+    """Test batch item failure reporting from the first record that cannot be applied."""
+    tasks, meta = tables
+    write_tasks(tasks, 3)
+    records = tasks.take_stream_records()
+    del records[1]['dynamodb']['NewImage']
+    
+    response = lambda_handler({'Records': records}, None)
+    
+    assert response == {'batchItemFailures': [{'itemIdentifier': records[1]['dynamodb']['SequenceNumber']}]}
+    assert snapshot_ids(meta) == ['t0']
+
+
+def test_concurrent_snapshot_writes_are_retried(tables):
+    """Test that a revision conflict re-reads the snapshot instead of overwriting it."""
+    tasks, meta = tables
+    write_tasks(tasks, 2)
+    first, second = tasks.take_stream_records()
+    read = meta.get_item
+    
+    def racing_get(**params):
+        response = read(**params)
+        if meta.calls['get_item'] == 1:
+            lambda_handler({'Records': [first]}, None)
+        return response
+    
+    with patch.object(meta, 'get_item', side_effect=racing_get):
+        assert lambda_handler({'Records': [second]}, None) == {'batchItemFailures': []}
+    
+    assert snapshot_ids(meta) == ['t1', 't0']
+    assert meta.get_item(Key=RECENT_KEY)['Item']['revision'] == 2
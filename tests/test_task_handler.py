@@ -2,19 +2,51 @@
 Unit tests for task handler Lambda function
 """
 
+import base64
+import gzip
 import json
 import pytest
 from unittest.mock import patch, MagicMock
-from src.handlers.task_handler import lambda_handler, create_task, get_task
+from botocore.exceptions import ClientError
+from local_aws.dynamodb import InMemoryTransactions, meta_table, tasks_table
+from utils.etag import task_etag
+from utils.fields import TASK_FIELDS, select_fields
+from utils.stats import count_uncounted
+from src.handlers.task_handler import (
+    lambda_handler, create_task, create_tasks_batch, get_task, list_tasks, update_task,
+    delete_task, task_cache
+)
 
 
 @pytest.fixture
 def mock_dynamodb():
     """Mock DynamoDB table."""
-    with patch('src.handlers.task_handler.table') as mock_table:
+    with patch('src.handlers.task_handler.table') as mock_table, \
+            patch('src.handlers.task_handler.meta_table', None):
+        task_cache.clear()
         yield mock_table
 
 
+@pytest.fixture
+def fake_table():
+    """In-memory tasks table exercising real expression and index behavior."""
+    table = tasks_table()
+    with patch('src.handlers.task_handler.table', table), \
+            patch('src.handlers.task_handler.meta_table', None):
+        task_cache.clear()
+        yield table
+
+
+@pytest.fixture
+def counted_tables(fake_table):
+    """In-memory tasks and meta tables with transactional counters enabled."""
+    meta = meta_table()
+    transactions = InMemoryTransactions(fake_table, meta)
+    with patch('src.handlers.task_handler.meta_table', meta), \
+            patch('src.handlers.task_handler.transact_write', transactions.transact_write):
+        yield fake_table, meta
+
+
 def test_create_task_success(mock_dynamodb):
     """Test successful task creation."""
     event = {
@@ -26,7 +58,7 @@ def test_create_task_success(mock_dynamodb):
         })
     }
     
-    with patch('src.handlers.task_handler.uuid.uuid4') as mock_uuid:
+    with patch('utils.ids.uuid.uuid4') as mock_uuid:
         mock_uuid.return_value = 'test-uuid-123'
         
         response = create_task(event)
@@ -134,7 +166,7 @@ def test_lambda_handler_get_task(mock_dynamodb):
         
         response = lambda_handler(event, {})
         
-        mock_get.assert_called_once_with('test-uuid-123')
+        mock_get.assert_called_once_with('test-uuid-123', event)
 
 
 def test_lambda_handler_method_not_allowed(mock_dynamodb):
@@ -148,4 +180,1204 @@ def test_lambda_handler_method_not_allowed(mock_dynamodb):
     
     assert response['statusCode'] == 405
     body = json.loads(response['body'])
-    assert 'Method PATCH not allowed' in body['error'] 
\ No newline at end of file
+    assert 'Method PATCH not allowed' in body['error'] 
+
+NOT_DELETED = {
+    'FilterExpression': 'attribute_not_exists(#deleted_at)',
+    'ExpressionAttributeNames': {'#deleted_at': 'deleted_at'}
+}
+
+
+def test_list_tasks_returns_page_and_cursor(mock_dynamodb):
+    """Test that list_tasks reads a single page and returns a continuation cursor."""
+    mock_dynamodb.scan.return_value = {
+        'Items': [
+            {'id': 'a', 'created_at': '2024-01-01T00:00:00+00:00'},
+            {'id': 'b', 'created_at': '2024-01-02T00:00:00+00:00'}
+        ],
+        'LastEvaluatedKey': {'id': 'b'}
+    }
+    
+    response = list_tasks({'queryStringParameters': {'limit': '2'}})
+    
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert [task['id'] for task in body['tasks']] == ['b', 'a']
+    assert body['next_cursor']
+    mock_dynamodb.scan.assert_called_once_with(Limit=2, **NOT_DELETED)
+    
+    # Follow the cursor
+    mock_dynamodb.scan.reset_mock()
+    mock_dynamodb.scan.return_value = {'Items': [{'id': 'c'}]}
+    
+    response = list_tasks({'queryStringParameters': {'limit': '2', 'cursor': body['next_cursor']}})
+    
+    body = json.loads(response['body'])
+    assert body['next_cursor'] is None
+    mock_dynamodb.scan.assert_called_once_with(Limit=2, ExclusiveStartKey={'id': 'b'}, **NOT_DELETED)
+
+
+def test_list_tasks_invalid_cursor(mock_dynamodb):
+    """Test that a forged cursor is rejected without touching DynamoDB."""
+    response = list_tasks({'queryStringParameters': {'cursor': 'forged.cursor'}})
+    
+    assert response['statusCode'] == 400
+    mock_dynamodb.scan.assert_not_called()
+
+
+def conditional_check_failed(operation):
+    """Build the ClientError DynamoDB raises when a ConditionExpression fails."""
+    return ClientError(
+        {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'The conditional request failed'}},
+        operation
+    )
+
+
+def test_update_task_single_round_trip(mock_dynamodb):
+    """Test that update_task returns the item from ReturnValues without extra reads."""
+    mock_dynamodb.update_item.return_value = {
+        'Attributes': {'id': 'test-uuid-123', 'title': 'Renamed'}
+    }
+    event = {'body': json.dumps({'title': 'Renamed'})}
+    
+    response = update_task('test-uuid-123', event)
+    
+    assert response['statusCode'] == 200
+    assert json.loads(response['body'])['task']['title'] == 'Renamed'
+    mock_dynamodb.get_item.assert_not_called()
+    kwargs = mock_dynamodb.update_item.call_args.kwargs
+    assert kwargs['ConditionExpression'] == 'attribute_exists(#id) AND attribute_not_exists(#deleted_at)'
+
+
+def test_update_task_not_found(mock_dynamodb):
+    """Test that a failed existence condition maps to 404."""
+    mock_dynamodb.update_item.side_effect = conditional_check_failed('UpdateItem')
+    
+    response = update_task('missing', {'body': json.dumps({'title': 'x'})})
+    
+    assert response['statusCode'] == 404
+
+
+def test_delete_task_single_round_trip(mock_dynamodb):
+    """Test that delete_task is one conditional tombstone write and maps misses to 404."""
+    mock_dynamodb.update_item.return_value = {'Attributes': {'id': 'test-uuid-123'}}
+    
+    response = delete_task('test-uuid-123')
+    
+    assert response['statusCode'] == 200
+    assert json.loads(response['body'])['task']['id'] == 'test-uuid-123'
+    mock_dynamodb.get_item.assert_not_called()
+    mock_dynamodb.delete_item.assert_not_called()
+    kwargs = mock_dynamodb.update_item.call_args.kwargs
+    assert kwargs['ConditionExpression'] == 'attribute_exists(#id) AND attribute_not_exists(#deleted_at)'
+    
+    mock_dynamodb.update_item.side_effect = conditional_check_failed('UpdateItem')
+    
+    assert delete_task('missing')['statusCode'] == 404
+
+
+def test_get_task_if_none_match_returns_304(mock_dynamodb):
+    """Test that a matching If-None-Match skips the body."""
+    mock_dynamodb.get_item.return_value = {'Item': {'id': 'test-uuid-123', 'version': 3}}
+    
+    response = get_task('test-uuid-123')
+    etag = response['headers']['ETag']
+    assert etag == '"v3"'
+    
+    response = get_task('test-uuid-123', {'headers': {'if-none-match': etag}})
+    
+    assert response['statusCode'] == 304
+    assert response['body'] == ''
+
+
+def test_get_task_logs_cache_stats_periodically(mock_dynamodb, capsys):
+    """Test that cache counters are printed once per CACHE_STATS_INTERVAL lookups."""
+    mock_dynamodb.get_item.return_value = {'Item': {'id': 'a', 'version': 1}}
+    
+    with patch('src.handlers.task_handler.CACHE_STATS_INTERVAL', 3):
+        for _ in range(7):
+            get_task('a')
+    
+    logged = [line for line in capsys.readouterr().out.splitlines() if line.startswith('Task cache')]
+    assert len(logged) == 2
+    assert "'hits': 2, 'misses': 1" in logged[0]
+    
+    with patch('src.handlers.task_handler.CACHE_STATS_INTERVAL', 0):
+        assert get_task('a')['statusCode'] == 200
+    
+    assert 'Task cache' not in capsys.readouterr().out
+
+
+def test_list_tasks_if_none_match_returns_304(mock_dynamodb):
+    """Test that an unchanged page is answered with 304."""
+    mock_dynamodb.scan.return_value = {'Items': [{'id': 'a', 'version': 1}]}
+    
+    etag = list_tasks({})['headers']['ETag']
+    response = list_tasks({'headers': {'If-None-Match': etag}})
+    
+    assert response['statusCode'] == 304
+    
+    mock_dynamodb.scan.return_value = {'Items': [{'id': 'a', 'version': 2}]}
+    
+    assert list_tasks({'headers': {'If-None-Match': etag}})['statusCode'] == 200
+
+
+def test_update_task_if_match(mock_dynamodb):
+    """Test that If-Match becomes a version condition and stale versions get 412."""
+    mock_dynamodb.update_item.return_value = {'Attributes': {'id': 'test-uuid-123', 'version': 4}}
+    event = {'headers': {'If-Match': '"v3"'}, 'body': json.dumps({'title': 'x'})}
+    
+    response = update_task('test-uuid-123', event)
+    
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'] == '"v4"'
+    kwargs = mock_dynamodb.update_item.call_args.kwargs
+    assert kwargs['ConditionExpression'] == (
+        'attribute_exists(#id) AND attribute_not_exists(#deleted_at) AND (#version = :expected0)'
+    )
+    assert kwargs['ExpressionAttributeValues'][':expected0'] == 3
+    
+    mock_dynamodb.update_item.side_effect = conditional_check_failed('UpdateItem')
+    mock_dynamodb.get_item.return_value = {'Item': {'id': 'test-uuid-123', 'version': 5}}
+    
+    assert update_task('test-uuid-123', event)['statusCode'] == 412
+
+
+def test_get_task_served_from_cache(mock_dynamodb):
+    """Test that repeat reads hit the container cache and writes keep it current."""
+    mock_dynamodb.get_item.return_value = {'Item': {'id': 'test-uuid-123', 'version': 1}}
+    
+    get_task('test-uuid-123')
+    response = get_task('test-uuid-123')
+    
+    assert response['statusCode'] == 200
+    mock_dynamodb.get_item.assert_called_once()
+    assert task_cache.stats()['hits'] == 1
+    
+    mock_dynamodb.update_item.return_value = {'Attributes': {'id': 'test-uuid-123', 'version': 2}}
+    update_task('test-uuid-123', {'body': json.dumps({'title': 'x'})})
+    
+    assert json.loads(get_task('test-uuid-123')['body'])['task']['version'] == 2
+    
+    delete_task('test-uuid-123')
+    get_task('test-uuid-123')
+    
+    assert mock_dynamodb.get_item.call_count == 2
+
+
+def test_lambda_handler_compresses_large_responses(mock_dynamodb):
+    """Test that responses are compressed when the client accepts gzip."""
+    mock_dynamodb.scan.return_value = {
+        'Items': [{'id': str(i), 'description': 'x' * 100} for i in range(50)]
+    }
+    event = {'httpMethod': 'GET', 'headers': {'Accept-Encoding': 'gzip'}}
+    
+    response = lambda_handler(event, {})
+    
+    assert response['isBase64Encoded'] is True
+    body = json.loads(gzip.decompress(base64.b64decode(response['body'])))
+    assert body['count'] == 50
+
+
+def test_create_task_accepts_base64_body(mock_dynamodb):
+    """Test that base64 encoded request bodies are decoded."""
+    event = {
+        'httpMethod': 'POST',
+        'isBase64Encoded': True,
+        'body': base64.b64encode(json.dumps({'title': 'Encoded'}).encode()).decode()
+    }
+    
+    response = create_task(event)
+    
+    assert response['statusCode'] == 201
+    assert json.loads(response['body'])['task']['title'] == 'Encoded'
+
+
+def test_task_lifecycle_against_fake_table(fake_table):
+    """Test create / update / conditional update / delete end to end."""
+    created = json.loads(lambda_handler({
+        'httpMethod': 'POST',
+        'body': json.dumps({'title': 'Write docs', 'status': 'pending'})
+    }, None)['body'])['task']
+    path = {'id': created['id']}
+    
+    updated = lambda_handler({
+        'httpMethod': 'PUT',
+        'pathParameters': path,
+        'headers': {'If-Match': '"v1"'},
+        'body': json.dumps({'status': 'completed'})
+    }, None)
+    stale = lambda_handler({
+        'httpMethod': 'PUT',
+        'pathParameters': path,
+        'headers': {'If-Match': '"v1"'},
+        'body': json.dumps({'status': 'pending'})
+    }, None)
+    deleted = lambda_handler({'httpMethod': 'DELETE', 'pathParameters': path}, None)
+    missing = lambda_handler({'httpMethod': 'GET', 'pathParameters': path}, None)
+    
+    assert updated['statusCode'] == 200
+    assert json.loads(updated['body'])['task']['version'] == 2
+    assert stale['statusCode'] == 412
+    assert deleted['statusCode'] == 200
+    assert missing['statusCode'] == 404
+    tombstone = fake_table.items()[0]
+    assert 'deleted_at' in tombstone and 'title' not in tombstone and tombstone['ttl'] > 0
+
+
+def test_list_tasks_pages_through_status_index(fake_table):
+    """Test that index queries with cursors return every matching task once."""
+    fake_table.seed(
+        {
+            'id': f'task-{i:02d}',
+            'title': f'Task {i}',
+            'status': ('pending', 'completed')[i % 2],
+            'created_at': f'2024-01-01T00:00:{i:02d}+00:00',
+            'version': 1
+        }
+        for i in range(25)
+    )
+    
+    seen, cursor = [], None
+    while True:
+        params = {'status': 'pending', 'limit': '4'}
+        if cursor:
+            params['cursor'] = cursor
+        body = json.loads(list_tasks({'queryStringParameters': params})['body'])
+        seen.extend(task['id'] for task in body['tasks'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    
+    assert seen == [f'task-{i:02d}' for i in range(24, -1, -2)]
+    assert fake_table.calls['scan'] == 0
+
+
+def batch_event(tasks):
+    return {'httpMethod': 'POST', 'resource': '/tasks/batch', 'body': json.dumps({'tasks': tasks})}
+
+
+def test_batch_create_writes_valid_tasks_and_reports_per_item(fake_table):
+    """Test validation and per-item results of POST /tasks/batch."""
+    tasks = [{'title': f'Task {i}'} for i in range(30)] + [{'description': 'no title'}, 'oops']
+    
+    response = lambda_handler(batch_event(tasks), None)
+    body = json.loads(response['body'])
+    
+    assert response['statusCode'] == 207
+    assert body['created'] == 30
+    assert body['failed'] == 2
+    assert [result['index'] for result in body['results']] == list(range(32))
+    assert body['results'][30] == {'index': 30, 'status': 400, 'error': 'Title is required'}
+    assert body['results'][31]['status'] == 400
+    assert len(fake_table) == 30
+    assert fake_table.calls['batch_write'] == 2
+    assert fake_table.calls['put_item'] == 0
+
+
+def test_batch_create_reports_unwritten_tasks(fake_table):
+    """Test that items still unprocessed after retries are reported as 503."""
+    fake_table.throttle_rate = 1.0
+    
+    with patch('utils.batch.time.sleep'):
+        response = create_tasks_batch(batch_event([{'title': 'A'}, {'title': 'B'}]))
+    body = json.loads(response['body'])
+    
+    assert response['statusCode'] == 207
+    assert body['created'] == 0
+    assert [result['status'] for result in body['results']] == [503, 503]
+    assert len(fake_table) == 0
+
+
+@pytest.mark.parametrize('body', ['{"tasks": []}', '{"tasks": {}}', '[]', 'not json'])
+def test_batch_create_rejects_invalid_bodies(fake_table, body):
+    """Test request-level validation of POST /tasks/batch."""
+    response = create_tasks_batch({'httpMethod': 'POST', 'resource': '/tasks/batch', 'body': body})
+    
+    assert response['statusCode'] == 400
+    assert fake_table.calls['batch_write'] == 0
+
+
+def test_batch_create_enforces_max_tasks(fake_table):
+    """Test the configurable per-request limit."""
+    with patch('src.handlers.task_handler.BATCH_MAX_TASKS', 2):
+        response = create_tasks_batch(batch_event([{'title': str(i)} for i in range(3)]))
+    
+    assert response['statusCode'] == 400
+
+
+def ids_event(ids, headers=None):
+    return {'httpMethod': 'GET', 'pathParameters': None, 'headers': headers or {}, 'queryStringParameters': {'ids': ids}}
+
+
+def test_batch_get_returns_results_in_request_order(fake_table):
+    """Test GET /tasks?ids= ordering, explicit misses and chunked reads."""
+    fake_table.seed({'id': f'task-{i:03d}', 'title': str(i), 'version': 1} for i in range(150))
+    ids = [f'task-{i:03d}' for i in range(149, -1, -1)] + ['nope', 'task-007']
+    
+    # More IDs than one BatchGetItem chunk, which takes a raised limit
+    with patch('src.handlers.task_handler.BATCH_GET_MAX_IDS', 200):
+        response = lambda_handler(ids_event(','.join(ids)), None)
+    body = json.loads(response['body'])
+    
+    assert response['statusCode'] == 200
+    assert [result['id'] for result in body['results']] == ids
+    assert body['results'][0]['task']['title'] == '149'
+    assert body['results'][150] == {'id': 'nope', 'status': 404, 'error': 'Task not found'}
+    assert body['results'][151]['status'] == 200
+    assert (body['found'], body['missing']) == (151, 1)
+    assert fake_table.calls['batch_get'] == 2
+    assert fake_table.calls['get_item'] == 0
+
+
+def test_batch_get_uses_cache_and_if_none_match(fake_table):
+    """Test that cached tasks skip DynamoDB and unchanged results return 304."""
+    fake_table.seed([{'id': 'a', 'version': 1}, {'id': 'b', 'version': 3}])
+    
+    first = lambda_handler(ids_event('a,b'), None)
+    second = lambda_handler(ids_event('a,b', {'If-None-Match': first['headers']['ETag']}), None)
+    
+    assert second['statusCode'] == 304
+    assert fake_table.calls['batch_get'] == 1
+
+
+def test_batch_get_reports_throttled_reads(fake_table):
+    """Test that keys still unprocessed after retries are reported as 503."""
+    fake_table.seed([{'id': 'a'}])
+    fake_table.throttle_rate = 1.0
+    
+    with patch('utils.batch.time.sleep'):
+        body = json.loads(list_tasks(ids_event('a'))['body'])
+    
+    assert body['results'] == [{'id': 'a', 'status': 503, 'error': 'Task could not be read, retry later'}]
+
+
+@pytest.mark.parametrize('ids', ['', ' , ', ','.join(str(i) for i in range(101))])
+def test_batch_get_rejects_invalid_ids(fake_table, ids):
+    """Test validation of the ids parameter."""
+    assert list_tasks(ids_event(ids))['statusCode'] == 400
+
+
+def export_event(params=None, headers=None):
+    return {
+        'httpMethod': 'GET',
+        'resource': '/tasks/export',
+        'pathParameters': None,
+        'headers': headers or {},
+        'queryStringParameters': params
+    }
+
+
+def read_export(response):
+    data = base64.b64decode(response['body'])
+    if response['headers'].get('Content-Encoding') == 'gzip':
+        data = gzip.decompress(data)
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+
+def test_export_returns_bounded_chunks_with_cursor(fake_table):
+    """Test that chunks stay under the byte budget and resume to cover every task."""
+    fake_table.seed({'id': f'task-{i:04d}', 'title': 'x' * 200} for i in range(300))
+    
+    exported, cursor, chunks = [], None, 0
+    with patch('src.handlers.task_handler.EXPORT_MAX_BYTES', 20000), \
+            patch('src.handlers.task_handler.EXPORT_PAGE_SIZE', 20):
+        while True:
+            response = lambda_handler(export_event({'cursor': cursor} if cursor else None), None)
+            assert response['statusCode'] == 200
+            assert response['headers']['Content-Type'] == 'application/x-ndjson'
+            assert len(base64.b64decode(response['body'])) <= 20000
+            exported.extend(task['id'] for task in read_export(response))
+            chunks += 1
+            cursor = response['headers'].get('X-Next-Cursor')
+            if not cursor:
+                break
+    
+    assert sorted(exported) == [f'task-{i:04d}' for i in range(300)]
+    assert chunks > 3
+
+
+def test_export_gzip_and_segments(fake_table):
+    """Test gzip negotiation and segment-scoped exports."""
+    fake_table.seed({'id': f'task-{i:03d}'} for i in range(100))
+    
+    segments = []
+    for segment in range(3):
+        response = lambda_handler(export_event(
+            {'segment': str(segment), 'total_segments': '3'},
+            {'Accept-Encoding': 'gzip'}
+        ), None)
+        assert response['headers']['Content-Encoding'] == 'gzip'
+        segments.append({task['id'] for task in read_export(response)})
+    
+    assert sum(len(ids) for ids in segments) == 100
+    assert set().union(*segments) == {f'task-{i:03d}' for i in range(100)}
+
+
+@pytest.mark.parametrize('params', [
+    {'segment': '3', 'total_segments': '3'},
+    {'segment': 'x'},
+    {'cursor': 'bogus'},
+])
+def test_export_rejects_invalid_parameters(fake_table, params):
+    """Test validation of export parameters."""
+    assert lambda_handler(export_event(params), None)['statusCode'] == 400
+
+
+def test_large_list_response_is_offloaded_to_s3(fake_table):
+    """Test that oversized pages become a presigned download envelope."""
+    from local_aws.s3 import InMemoryS3
+    from utils.offload import ResponseStore
+    
+    s3 = InMemoryS3()
+    fake_table.seed({'id': f'task-{i:02d}', 'description': 'x' * 500} for i in range(10))
+    event = {'httpMethod': 'GET', 'pathParameters': None, 'queryStringParameters': None}
+    
+    with patch('src.handlers.task_handler.response_store', ResponseStore('offload', client=s3)), \
+            patch('src.handlers.task_handler.LIST_OFFLOAD_BYTES', 2000):
+        first = json.loads(lambda_handler(event, None)['body'])
+        second = json.loads(lambda_handler(event, None)['body'])
+    
+    assert 'tasks' not in first
+    assert first['count'] == 10
+    assert first['download']['url'].startswith('https://offload.s3.local/responses/')
+    assert second['download']['reused'] is True
+    assert len(s3.objects) == 1
+    stored = json.loads(gzip.decompress(next(iter(s3.objects.values()))['Body']))
+    assert len(stored['tasks']) == 10
+
+
+def test_small_list_response_is_not_offloaded(fake_table):
+    """Test that pages under the threshold are returned inline."""
+    from local_aws.s3 import InMemoryS3
+    from utils.offload import ResponseStore
+    
+    s3 = InMemoryS3()
+    fake_table.seed([{'id': 'a'}])
+    
+    with patch('src.handlers.task_handler.response_store', ResponseStore('offload', client=s3)):
+        body = json.loads(list_tasks({'queryStringParameters': None})['body'])
+    
+    assert body['tasks'] == [{'id': 'a'}]
+    assert not s3.calls
+
+
+def test_list_tasks_with_fields_pages_through_index(fake_table):
+    """Test sparse fieldsets on an index-backed, paginated listing."""
+    fake_table.seed(
+        {
+            'id': f'task-{i}',
+            'title': f'Task {i}',
+            'description': 'x' * 1000,
+            'status': 'pending',
+            'created_at': f'2024-01-01T00:00:0{i}+00:00',
+            'version': 1
+        }
+        for i in range(5)
+    )
+    
+    first = json.loads(list_tasks({'queryStringParameters': {
+        'status': 'pending', 'fields': 'title', 'limit': '3'
+    }})['body'])
+    second = json.loads(list_tasks({'queryStringParameters': {
+        'status': 'pending', 'fields': 'title', 'limit': '3', 'cursor': first['next_cursor']
+    }})['body'])
+    
+    assert first['tasks'][0] == {'id': 'task-4', 'title': 'Task 4'}
+    assert [task['id'] for task in first['tasks'] + second['tasks']] == [f'task-{i}' for i in range(4, -1, -1)]
+
+
+def test_get_task_with_fields(fake_table):
+    """Test projection, validation and ETags of GET /tasks/{id}?fields=."""
+    fake_table.seed([{'id': 'a', 'title': 'T', 'description': 'long', 'version': 2}])
+    
+    def get(params):
+        return get_task('a', {'queryStringParameters': params})
+    
+    partial = get({'fields': 'title'})
+    full = get(None)
+    
+    assert json.loads(partial['body'])['task'] == {'id': 'a', 'title': 'T'}
+    assert partial['headers']['ETag'] != full['headers']['ETag']
+    assert partial['headers']['ETag'].startswith('"v2-')
+    assert get({'fields': 'nope'})['statusCode'] == 400
+    assert json.loads(get({'fields': 'description'})['body'])['task'] == {'id': 'a', 'description': 'long'}
+
+
+def test_list_tasks_rejects_unknown_fields(fake_table):
+    """Test that invalid fieldsets are a client error."""
+    response = list_tasks({'queryStringParameters': {'fields': 'title,password'}})
+    
+    assert response['statusCode'] == 400
+    assert 'password' in json.loads(response['body'])['error']
+
+
+def test_newest_first_listing_from_created_index(fake_table):
+    """Test that unfiltered listings page through CreatedIndex without scanning."""
+    with patch('utils.ids.TASK_ID_FORMAT', 'uuid7'):
+        for i in range(12):
+            lambda_handler({'httpMethod': 'POST', 'body': json.dumps({'title': f'Task {i}'})}, None)
+    
+    seen, cursor = [], None
+    with patch('utils.query_planner.LIST_FROM_CREATED_INDEX', True):
+        while True:
+            params = {'limit': '5', 'fields': 'title'}
+            if cursor:
+                params['cursor'] = cursor
+            body = json.loads(list_tasks({'queryStringParameters': params})['body'])
+            seen.extend(task['title'] for task in body['tasks'])
+            cursor = body['next_cursor']
+            if not cursor:
+                break
+    
+    assert seen == [f'Task {i}' for i in range(11, -1, -1)]
+    assert fake_table.calls['scan'] == 0
+    assert {item['shard'] for item in fake_table.items()} <= {0, 1, 2, 3}
+
+
+def test_status_listing_merges_status_shards(fake_table):
+    """Test that status changes move tasks between StatusShardIndex partitions."""
+    with patch('utils.ids.TASK_ID_FORMAT', 'uuid7'):
+        ids = [
+            json.loads(lambda_handler({'httpMethod': 'POST', 'body': json.dumps({'title': f'Task {i}'})}, None)['body'])['task']['id']
+            for i in range(10)
+        ]
+    for task_id in ids[:4]:
+        update_task(task_id, {'body': json.dumps({'status': 'completed'})})
+    
+    def titles(status):
+        seen, cursor = [], None
+        while True:
+            params = {'status': status, 'limit': '3'}
+            if cursor:
+                params['cursor'] = cursor
+            body = json.loads(list_tasks({'queryStringParameters': params})['body'])
+            seen.extend(task['title'] for task in body['tasks'])
+            cursor = body['next_cursor']
+            if not cursor:
+                return seen
+    
+    with patch('utils.query_planner.STATUS_INDEX_SHARDED', True):
+        assert titles('pending') == [f'Task {i}' for i in range(9, 3, -1)]
+        assert titles('completed') == [f'Task {i}' for i in range(3, -1, -1)]
+    assert fake_table.calls['scan'] == 0
+    assert len({item['status_shard'] for item in fake_table.items()}) > 2
+
+
+def sync(token, limit=None):
+    params = {'since': token}
+    if limit:
+        params['limit'] = str(limit)
+    return lambda_handler({'httpMethod': 'GET', 'pathParameters': None, 'queryStringParameters': params}, None)
+
+
+def test_delta_sync_returns_changes_and_tombstones(fake_table):
+    """Test GET /tasks?since= paging, tombstones and checkpoint advance."""
+    fake_table.seed([{'id': 'old', 'shard': 0, 'title': 'Old', 'updated_at': '2000-01-01T00:00:00+00:00'}])
+    token = json.loads(sync('')['body'])['next_token']
+    
+    created = [
+        json.loads(lambda_handler({'httpMethod': 'POST', 'body': json.dumps({'title': f'Task {i}'})}, None)['body'])['task']
+        for i in range(4)
+    ]
+    update_task(created[0]['id'], {'body': json.dumps({'title': 'Renamed'})})
+    delete_task(created[1]['id'])
+    
+    tasks, deleted, pages = {}, [], 0
+    while True:
+        body = json.loads(sync(token, limit=2)['body'])
+        tasks.update({task['id']: task for task in body['tasks']})
+        deleted.extend(entry['id'] for entry in body['deleted'])
+        token = body['next_token']
+        pages += 1
+        if not body['has_more']:
+            break
+    
+    assert pages >= 2
+    assert set(tasks) == {created[0]['id'], created[2]['id'], created[3]['id']}
+    assert tasks[created[0]['id']]['title'] == 'Renamed'
+    assert deleted == [created[1]['id']]
+    assert fake_table.calls['scan'] == 0
+    
+    with patch('src.handlers.task_handler.SYNC_OVERLAP_SECONDS', 0):
+        body = json.loads(sync(token)['body'])
+    assert (body['tasks'], body['deleted'], body['has_more']) == ([], [], False)
+
+
+def test_delta_sync_rejects_invalid_and_expired_tokens(fake_table):
+    """Test that forged tokens are 400 and tokens older than tombstones are 410."""
+    from utils.pagination import encode_cursor
+    
+    old = encode_cursor({'since': '2000-01-01T00:00:00+00:00'}, 'test-cursor-secret', scope='sync:4')
+    
+    assert sync('forged.token')['statusCode'] == 400
+    assert sync(old)['statusCode'] == 410
+
+
+def test_deleted_tasks_are_hidden_from_reads(fake_table):
+    """Test that tombstones are not returned by get, batch get, list or export, and cannot be updated."""
+    fake_table.seed([{'id': 'a', 'title': 'A', 'version': 1}, {'id': 'b', 'title': 'B', 'version': 1}])
+    delete_task('a')
+    task_cache.clear()
+    
+    batch = json.loads(lambda_handler(ids_event('a,b'), None)['body'])
+    listed = json.loads(list_tasks({'queryStringParameters': None})['body'])
+    exported = base64.b64decode(lambda_handler(export_event(), None)['body']).decode()
+    
+    assert get_task('a')['statusCode'] == 404
+    assert [result['status'] for result in batch['results']] == [404, 200]
+    assert [task['id'] for task in listed['tasks']] == ['b']
+    assert [json.loads(line)['id'] for line in exported.splitlines()] == ['b']
+    assert update_task('a', {'body': json.dumps({'title': 'x'})})['statusCode'] == 404
+    assert delete_task('a')['statusCode'] == 404
+
+
+def stats():
+    response = lambda_handler({'httpMethod': 'GET', 'resource': '/tasks/stats', 'pathParameters': None}, None)
+    assert response['statusCode'] == 200
+    return json.loads(response['body'])
+
+
+def put_event(body, headers=None):
+    return {'body': json.dumps(body), 'headers': headers or {}}
+
+
+def test_counters_follow_creates_status_changes_and_deletes(counted_tables):
+    """Test that every write keeps the per-status counters in step with the tasks."""
+    tasks, meta = counted_tables
+    
+    first = json.loads(create_task({'body': json.dumps({'title': 'A'})})['body'])['task']
+    create_tasks_batch({'body': json.dumps({'tasks': [
+        {'title': 'B', 'status': 'done'}, {'title': 'C'}, {}
+    ]})})
+    assert stats() == {'total': 3, 'by_status': {'pending': 2, 'done': 1}}
+    
+    updated = update_task(first['id'], put_event({'status': 'in_progress', 'title': 'A2'}))
+    task = json.loads(updated['body'])['task']
+    assert updated['statusCode'] == 200
+    assert task == select_fields(tasks.get_item(Key={'id': first['id']})['Item'], TASK_FIELDS)
+    assert updated['headers']['ETag'] == task_etag(task)
+    
+    update_task(first['id'], put_event({'title': 'A3'}))
+    update_task(first['id'], put_event({'status': 'in_progress'}))
+    assert stats() == {'total': 3, 'by_status': {'pending': 1, 'done': 1, 'in_progress': 1}}
+    
+    assert delete_task(first['id'])['statusCode'] == 200
+    assert delete_task(first['id'])['statusCode'] == 404
+    assert stats() == {'total': 2, 'by_status': {'pending': 1, 'done': 1}}
+    assert tasks.calls['scan'] == 0
+
+
+def test_batch_create_reports_written_tasks_when_counting_fails(counted_tables):
+    """Test that a failed counter update after the batch write is logged, not a 500."""
+    tasks, meta = counted_tables
+    throttled = ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'UpdateItem')
+    
+    with patch.object(meta, 'update_item', side_effect=throttled):
+        response = create_tasks_batch({'body': json.dumps({'tasks': [{'title': 'A'}, {'title': 'B'}]})})
+    
+    assert response['statusCode'] == 201
+    assert json.loads(response['body'])['created'] == 2
+    assert len(tasks.scan()['Items']) == 2
+    
+    count_uncounted(tasks, meta, InMemoryTransactions(tasks, meta).transact_write)
+    assert stats() == {'total': 2, 'by_status': {'pending': 2}}
+
+
+def test_counters_add_tasks_written_before_counting_once(counted_tables):
+    """Test that writes leave uncounted tasks to the rebuild, which can run alongside them."""
+    tasks, meta = counted_tables
+    tasks.seed([
+        {'id': 'a', 'title': 'A', 'status': 'pending', 'version': 1},
+        {'id': 'b', 'title': 'B', 'status': 'pending', 'version': 1},
+        {'id': 'c', 'title': 'C', 'status': 'pending', 'version': 1}
+    ])
+    transactions = InMemoryTransactions(tasks, meta)
+    
+    def transact_after_writes(items):
+        if not transact_after_writes.raced:
+            transact_after_writes.raced = True
+            update_task('a', put_event({'status': 'done'}))
+            delete_task('b')
+        return transactions.transact_write(items)
+    transact_after_writes.raced = False
+    
+    create_task({'body': json.dumps({'title': 'New'})})
+    count_uncounted(tasks, meta, transact_after_writes)
+    update_task('c', put_event({'status': 'blocked'}))
+    delete_task('a')
+    
+    assert stats() == {'total': 2, 'by_status': {'pending': 1, 'blocked': 1}}
+
+
+def test_counted_update_checks_if_match_and_missing_tasks(counted_tables):
+    """Test that status changes keep 412 and 404 semantics on the transactional path."""
+    tasks, meta = counted_tables
+    tasks.seed([{'id': 'a', 'title': 'A', 'status': 'pending', 'version': 2, 'counted': True}])
+    
+    stale = update_task('a', put_event({'status': 'done'}, {'If-Match': '"v1"'}))
+    current = update_task('a', put_event({'status': 'done'}, {'If-Match': '"v2"'}))
+    
+    assert stale['statusCode'] == 412
+    assert current['statusCode'] == 200
+    assert update_task('missing', put_event({'status': 'done'}))['statusCode'] == 404
+    assert stats()['by_status'] == {'pending': -1, 'done': 1}
+
+
+def test_counted_writes_retry_when_status_changes_concurrently(counted_tables):
+    """Test that a status change between read and write cancels and retries the transaction."""
+    tasks, meta = counted_tables
+    tasks.seed([{'id': 'a', 'title': 'A', 'status': 'pending', 'version': 1, 'counted': True}])
+    transactions = InMemoryTransactions(tasks, meta)
+    calls = []
+    
+    def racing_write(items):
+        if not calls:
+            tasks.update_item(
+                Key={'id': 'a'},
+                UpdateExpression='SET #s = :s',
+                ExpressionAttributeNames={'#s': 'status'},
+                ExpressionAttributeValues={':s': 'blocked'}
+            )
+        calls.append(items)
+        return transactions.transact_write(items)
+    
+    with patch('src.handlers.task_handler.transact_write', racing_write):
+        response = update_task('a', put_event({'status': 'done'}))
+    
+    assert response['statusCode'] == 200
+    assert len(calls) == 2
+    assert stats()['by_status'] == {'blocked': -1, 'done': 1}
+    
+    with patch('src.handlers.task_handler.COUNTER_WRITE_ATTEMPTS', 0):
+        assert delete_task('a')['statusCode'] == 409
+
+
+def transaction_conflict():
+    return ClientError({
+        'Error': {'Code': 'TransactionCanceledException'},
+        'CancellationReasons': [{'Code': 'None'}, {'Code': 'TransactionConflict'}]
+    }, 'TransactWriteItems')
+
+
+def test_counted_writes_survive_conflicting_transactions(counted_tables):
+    """Test that a TransactionConflict on a counter shard is retried, not a 500."""
+    tasks, meta = counted_tables
+    tasks.seed([{'id': 'a', 'title': 'A', 'status': 'pending', 'version': 1, 'counted': True}])
+    transactions = InMemoryTransactions(tasks, meta)
+    conflicts = []
+    
+    def conflicting_once(items):
+        if not conflicts:
+            conflicts.append(items)
+            raise transaction_conflict()
+        return transactions.transact_write(items)
+    
+    with patch('src.handlers.task_handler.transact_write', conflicting_once):
+        updated = update_task('a', put_event({'status': 'done'}))
+    with patch('src.handlers.task_handler.transact_write', side_effect=transaction_conflict()):
+        created = create_task({'body': json.dumps({'title': 'B'})})
+    
+    assert updated['statusCode'] == 200
+    assert created['statusCode'] == 503
+    assert len(tasks.scan()['Items']) == 1
+    assert stats()['by_status'] == {'pending': -1, 'done': 1}
+
+
+def test_stats_requires_meta_table(mock_dynamodb):
+    """Test that GET /tasks/stats is 501 when counters are not configured."""
+    response = lambda_handler({'httpMethod': 'GET', 'resource': '/tasks/stats', 'pathParameters': None}, None)
+    
+    assert response['statusCode'] == 501
+    mock_dynamodb.scan.assert_not_called()
+
+
+def recent_event(params=None):
+    return {'httpMethod': 'GET', 'pathParameters': None, 'queryStringParameters': dict(params or {}, view='recent')}
+
+
+def test_recent_view_is_served_from_the_stream_snapshot(fake_table):
+    """Test GET /tasks?view=recent against a snapshot built from the table's stream."""
+    from src.handlers import stream_handler
+    
+    fake_table.stream = True
+    meta = meta_table()
+    for i in range(4):
+        fake_table.put_item(Item={'id': f't{i}', 'title': f'Task {i}', 'created_at': f'2024-01-0{i + 1}', 'version': 1})
+    with patch.object(stream_handler, 'meta_table', meta):
+        stream_handler.lambda_handler({'Records': fake_table.take_stream_records()}, None)
+    
+    fake_table.reset_calls()
+    with patch('src.handlers.task_handler.meta_table', meta):
+        response = lambda_handler(recent_event({'limit': '2', 'fields': 'title'}), None)
+        # A new snapshot may be missing older tasks, so it cannot fill a larger page
+        fallback = lambda_handler(recent_event({'limit': '10'}), None)
+    body = json.loads(response['body'])
+    
+    assert response['statusCode'] == 200
+    assert body['tasks'] == [{'id': 't3', 'title': 'Task 3'}, {'id': 't2', 'title': 'Task 2'}]
+    assert body['count'] == 2
+    assert body['next_cursor'] is None
+    assert json.loads(fallback['body'])['count'] == 4
+    assert fake_table.calls['scan'] + fake_table.calls['query'] == 1
+    unknown = {'httpMethod': 'GET', 'pathParameters': None, 'queryStringParameters': {'view': 'oldest'}}
+    assert lambda_handler(unknown, None)['statusCode'] == 400
+
+
+def search_event(q, **params):
+    return {'httpMethod': 'GET', 'resource': '/tasks/search', 'pathParameters': None,
+            'queryStringParameters': dict(params, q=q)}
+
+
+def test_search_reads_postings_built_from_the_stream(counted_tables):
+    """Test GET /tasks/search end to end: writes, stream processing, ranked results."""
+    from src.handlers import stream_handler
+    
+    tasks, meta = counted_tables
+    tasks.stream = True
+    
+    def process_stream():
+        with patch.object(stream_handler, 'meta_table', meta):
+            result = stream_handler.lambda_handler({'Records': tasks.take_stream_records()}, None)
+        assert result == {'batchItemFailures': []}
+    
+    ids = [
+        json.loads(create_task({'body': json.dumps(body)})['body'])['task']['id']
+        for body in [
+            {'title': 'Prepare quarterly report'},
+            {'title': 'Review', 'description': 'Quarterly reporting numbers'},
+            {'title': 'Book flights'}
+        ]
+    ]
+    process_stream()
+    
+    body = json.loads(lambda_handler(search_event('QUARTERLY Report', fields='title'), None)['body'])
+    assert [task['id'] for task in body['tasks']] == ids[:2]
+    assert set(body['tasks'][0]) == {'id', 'title', 'score'}
+    assert body['tasks'][0]['score'] > body['tasks'][1]['score']
+    
+    update_task(ids[0], {'body': json.dumps({'title': 'Prepare budget'})})
+    delete_task(ids[1])
+    process_stream()
+    
+    assert json.loads(lambda_handler(search_event('quarterly'), None)['body'])['count'] == 0
+    assert json.loads(lambda_handler(search_event('budg'), None)['body'])['tasks'][0]['id'] == ids[0]
+    assert lambda_handler(search_event('a'), None)['statusCode'] == 400
+    assert tasks.calls['scan'] == 0
+
+
+def claim(worker='w1', **body):
+    return lambda_handler({
+        'httpMethod': 'POST',
+        'resource': '/tasks/claim',
+        'pathParameters': None,
+        'body': json.dumps(dict(body, worker=worker))
+    }, None)
+
+
+def queued(created_at, priority='medium', status='pending', **attributes):
+    from utils.queue import queue_attributes
+    
+    task = dict(id=f"{priority}-{created_at}", title='t', status=status, priority=priority,
+                created_at=created_at, version=1, **attributes)
+    task.update(queue_attributes(task))
+    return task
+
+
+@pytest.fixture
+def task_queue():
+    with patch('src.handlers.task_handler.TASK_QUEUE', True):
+        yield
+
+
+def test_responses_leave_out_storage_attributes(counted_tables, task_queue):
+    """Test that write shards, queue keys and the counted mark never reach clients."""
+    tasks, meta = counted_tables
+    internal = {'shard', 'status_shard', 'queue_shard', 'queue_key', 'counted'}
+    
+    created = json.loads(create_task({'body': json.dumps({'title': 'Work'})})['body'])['task']
+    stored = tasks.get_item(Key={'id': created['id']})['Item']
+    fetched = json.loads(get_task(created['id'])['body'])['task']
+    listed = json.loads(list_tasks({})['body'])['tasks']
+    claimed = json.loads(claim()['body'])['task']
+    
+    assert internal <= set(stored)
+    for task in [created, fetched, claimed] + listed:
+        assert not internal & set(task)
+    assert claimed['claimed_by'] == 'w1'
+
+
+def test_claims_take_highest_priority_oldest_task(fake_table, task_queue):
+    """Test claim order, the lease written, and an empty queue."""
+    fake_table.seed([
+        queued('2024-01-01', 'low'), queued('2024-01-03', 'high'),
+        queued('2024-01-02', 'high'), queued('2024-01-01', 'medium', status='completed')
+    ])
+    
+    with patch('src.handlers.task_handler.CLAIM_SPREAD', 1):
+        claimed = [json.loads(claim(lease_seconds=60)['body'])['task'] for _ in range(4)]
+    
+    assert [task and task['id'] for task in claimed] == ['high-2024-01-02', 'high-2024-01-03', 'low-2024-01-01', None]
+    stored = fake_table.get_item(Key={'id': 'high-2024-01-02'})['Item']
+    assert (stored['status'], stored['claimed_by'], stored['version']) == ('in_progress', 'w1', 2)
+    assert stored['queue_shard'].startswith('leased#')
+    assert select_fields(stored, TASK_FIELDS) == claimed[0]
+    assert fake_table.calls['scan'] == 0
+    assert claim(lease_seconds=0)['statusCode'] == 400
+    assert claim(worker='')['statusCode'] == 400
+
+
+def test_claim_without_contention_takes_the_best_task(fake_table, task_queue):
+    """Test that the spread for racing workers never reorders an uncontended claim."""
+    for _ in range(20):
+        fake_table.seed([queued('2024-01-05', 'high')] + [queued(f'2024-01-0{day}', 'low') for day in range(1, 6)])
+        
+        # Seeding again puts the claimed task back in the queue
+        assert json.loads(claim()['body'])['task']['id'] == 'high-2024-01-05'
+
+
+def test_concurrent_workers_claim_distinct_tasks(fake_table, task_queue):
+    """Test that racing workers never receive the same task."""
+    from concurrent.futures import ThreadPoolExecutor
+    
+    fake_table.seed(queued(f'2024-01-01T00:00:{i:02d}') for i in range(40))
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda i: claim(worker=f'w{i}'), range(40)))
+    tasks = [json.loads(response['body']).get('task') for response in responses if response['statusCode'] == 200]
+    
+    assert len({task['id'] for task in tasks}) == len(tasks) >= 32
+    assert all(item['claimed_by'] for item in fake_table.items() if item['status'] == 'in_progress')
+
+
+def test_expired_leases_are_reclaimed_and_completion_leaves_the_queue(fake_table, task_queue):
+    """Test lease expiry, releasing a task by updating it, and repairing stale entries."""
+    expired = queued('2024-01-05', status='in_progress', claimed_by='w0', lease_expires_at='2000-01-01T00:00:00+00:00')
+    stale = dict(queued('2024-01-01'), status='completed')
+    fake_table.seed([expired, stale, queued('2024-01-02')])
+    
+    with patch('src.handlers.task_handler.CLAIM_SPREAD', 1):
+        reclaimed = json.loads(claim(worker='w1')['body'])['task']
+        fresh = json.loads(claim(worker='w2')['body'])['task']
+    
+    assert reclaimed['id'] == expired['id']
+    assert reclaimed['claimed_by'] == 'w1'
+    assert fresh['id'] == 'medium-2024-01-02'
+    assert 'queue_shard' not in fake_table.get_item(Key={'id': stale['id']})['Item']
+    
+    update_task(fresh['id'], {'body': json.dumps({'status': 'completed'})})
+    done = fake_table.get_item(Key={'id': fresh['id']})['Item']
+    assert not {'queue_shard', 'queue_key', 'claimed_by', 'lease_expires_at'} & set(done)
+    
+    update_task(fresh['id'], {'body': json.dumps({'status': 'pending'})})
+    assert json.loads(claim(worker='w3')['body'])['task']['id'] == fresh['id']
+
+
+def test_claims_keep_status_counters(counted_tables, task_queue):
+    """Test that a claim moves the task between counters."""
+    create_task({'body': json.dumps({'title': 'Work'})})
+    
+    claim()
+    
+    assert stats() == {'total': 1, 'by_status': {'in_progress': 1}}
+
+
+def test_claim_moves_on_when_a_transaction_conflicts(counted_tables, task_queue):
+    """Test that a TransactionConflict cancellation is a lost race, not a 500."""
+    tasks, meta = counted_tables
+    tasks.seed([dict(queued('2024-01-01', rank), counted=True) for rank in ('high', 'low')])
+    transactions = InMemoryTransactions(tasks, meta)
+    attempts = []
+    
+    def conflicting_first(items):
+        attempts.append(items[0]['Update']['Key']['id'])
+        if len(attempts) == 1:
+            raise transaction_conflict()
+        return transactions.transact_write(items)
+    
+    with patch('src.handlers.task_handler.transact_write', conflicting_first):
+        response = claim()
+    
+    assert response['statusCode'] == 200
+    assert attempts == ['high-2024-01-01', 'low-2024-01-01']
+    assert json.loads(response['body'])['task']['id'] == 'low-2024-01-01'
+    assert tasks.get_item(Key={'id': 'high-2024-01-01'})['Item']['status'] == 'pending'
+    
+    with patch('src.handlers.task_handler.transact_write', side_effect=transaction_conflict()):
+        assert claim()['statusCode'] == 409
+    
+    plain_conflict = ClientError({'Error': {'Code': 'TransactionConflictException'}}, 'UpdateItem')
+    with patch('src.handlers.task_handler.meta_table', None), \
+            patch.object(tasks, 'update_item', side_effect=plain_conflict):
+        assert claim()['statusCode'] == 409
+
+
+@pytest.mark.parametrize('resource', ['/tasks', '/tasks/batch', '/tasks/claim', '/tasks/batch-update'])
+def test_post_without_body_is_a_bad_request(fake_table, task_queue, resource):
+    """Test that a request with a null body is answered with 400, not 500."""
+    response = lambda_handler({'httpMethod': 'POST', 'resource': resource, 'pathParameters': None, 'body': None}, None)
+    
+    assert response['statusCode'] == 400
+
+
+def test_put_without_body_is_an_empty_update(fake_table):
+    """Test that PUT /tasks/{id} treats a missing body as {} and rejects JSON that is not an object."""
+    fake_table.seed([{'id': 'a', 'title': 'A', 'version': 1}])
+    
+    def put(body):
+        return lambda_handler({'httpMethod': 'PUT', 'pathParameters': {'id': 'a'}, 'body': body}, None)
+    
+    assert [put(body)['statusCode'] for body in ('null', '[]')] == [400, 400]
+    assert fake_table.get_item(Key={'id': 'a'})['Item']['version'] == 1
+    assert put(None)['statusCode'] == 200
+
+
+def test_claim_requires_task_queue(mock_dynamodb):
+    """Test that POST /tasks/claim is 501 when the queue is not enabled."""
+    assert claim()['statusCode'] == 501
+
+
+def batch_update(updates, **body):
+    return lambda_handler({
+        'httpMethod': 'POST',
+        'resource': '/tasks/batch-update',
+        'pathParameters': None,
+        'body': json.dumps(dict(body, updates=updates))
+    }, None)
+
+
+def test_atomic_batch_update_is_one_read_and_one_transaction(counted_tables):
+    """Test that an atomic batch applies every update, with counters, in one transaction."""
+    tasks, meta = counted_tables
+    ids = [
+        json.loads(create_task({'body': json.dumps({'title': title})})['body'])['task']['id']
+        for title in ('A', 'B')
+    ]
+    tasks.calls.clear()
+    
+    response = batch_update([
+        {'id': ids[1], 'status': 'completed'},
+        {'id': ids[0], 'status': 'completed', 'priority': 'high', 'if_match': '"v1"'}
+    ])
+    
+    body = json.loads(response['body'])
+    assert response['statusCode'] == 200
+    assert (body['updated'], body['failed']) == (2, 0)
+    assert [result['id'] for result in body['results']] == [ids[1], ids[0]]
+    assert (tasks.calls['batch_get'], tasks.calls['transact_write']) == (1, 1)
+    assert tasks.calls['get_item'] == tasks.calls['update_item'] == 0
+    for result in body['results']:
+        assert result['task'] == select_fields(tasks.get_item(Key={'id': result['id']})['Item'], TASK_FIELDS)
+        assert (result['task']['status'], result['task']['version']) == ('completed', 2)
+    assert stats() == {'total': 2, 'by_status': {'completed': 2}}
+
+
+def test_atomic_batch_update_applies_nothing_when_one_update_fails(counted_tables):
+    """Test per-update results of a failed atomic batch: the cause, then 424 for the rest."""
+    tasks, meta = counted_tables
+    tasks.seed([
+        {'id': 'a', 'title': 'A', 'status': 'pending', 'version': 1, 'counted': True},
+        {'id': 'b', 'title': 'B', 'status': 'pending', 'version': 3, 'counted': True}
+    ])
+    
+    missing = json.loads(batch_update([{'id': 'a', 'status': 'done'}, {'id': 'gone', 'status': 'done'}])['body'])
+    stale = json.loads(batch_update([{'id': 'a', 'status': 'done'}, {'id': 'b', 'if_match': '"v2"'}])['body'])
+    invalid = json.loads(batch_update([{'id': 'a', 'status': 'done'}, {'title': 'No id'}])['body'])
+    
+    assert [result['status'] for result in missing['results']] == [424, 404]
+    assert [result['status'] for result in stale['results']] == [424, 412]
+    assert [result['status'] for result in invalid['results']] == [424, 400]
+    assert tasks.get_item(Key={'id': 'a'})['Item']['version'] == 1
+    assert stats() == {'total': 0, 'by_status': {}}
+
+
+def test_atomic_batch_update_retries_and_reports_conflicts(counted_tables):
+    """Test that a task changed between read and write is re-read, and 409 once attempts run out."""
+    tasks, meta = counted_tables
+    tasks.seed([
+        {'id': 'a', 'title': 'A', 'status': 'pending', 'version': 1, 'counted': True},
+        {'id': 'b', 'title': 'B', 'status': 'pending', 'version': 1, 'counted': True}
+    ])
+    transactions = InMemoryTransactions(tasks, meta)
+    calls = []
+    
+    def racing_write(items):
+        tasks.update_item(
+            Key={'id': 'b'},
+            UpdateExpression='SET #v = #v + :one',
+            ExpressionAttributeNames={'#v': 'version'},
+            ExpressionAttributeValues={':one': 1}
+        )
+        calls.append(items)
+        return transactions.transact_write(items)
+    
+    with patch('src.handlers.task_handler.transact_write', racing_write):
+        response = batch_update([{'id': 'a', 'status': 'done'}, {'id': 'b', 'title': 'B2'}])
+    
+    assert response['statusCode'] == 207
+    assert [result['status'] for result in json.loads(response['body'])['results']] == [424, 409]
+    assert len(calls) == 3
+    assert tasks.get_item(Key={'id': 'a'})['Item']['status'] == 'pending'
+
+
+def test_non_atomic_batch_update_applies_each_update_independently(counted_tables):
+    """Test that an opted-out batch applies the valid updates and reports the others."""
+    tasks, meta = counted_tables
+    tasks.seed([{'id': 'a', 'title': 'A', 'status': 'pending', 'version': 1, 'counted': True}])
+    
+    response = batch_update(
+        [{'id': 'gone', 'status': 'done'}, {'id': 'a', 'status': 'done'}, 'not an update'],
+        atomic=False
+    )
+    
+    body = json.loads(response['body'])
+    assert response['statusCode'] == 207
+    assert [result['status'] for result in body['results']] == [404, 200, 400]
+    assert body['results'][1]['task']['status'] == 'done'
+    assert stats()['by_status'] == {'pending': -1, 'done': 1}
+
+
+def test_non_atomic_batch_update_retries_counter_conflicts(counted_tables):
+    """Test that concurrent updates meeting on a counter shard are retried, not 500s."""
+    tasks, meta = counted_tables
+    tasks.seed([{'id': f't{i}', 'title': 'T', 'status': 'pending', 'version': 1, 'counted': True} for i in range(6)])
+    transactions = InMemoryTransactions(tasks, meta)
+    conflicted = set()
+    
+    def conflicting_once_per_task(items):
+        task_id = items[0]['Update']['Key']['id']
+        if task_id not in conflicted:
+            conflicted.add(task_id)
+            raise transaction_conflict()
+        return transactions.transact_write(items)
+    
+    with patch('src.handlers.task_handler.transact_write', conflicting_once_per_task):
+        response = batch_update([{'id': f't{i}', 'status': 'done'} for i in range(6)], atomic=False)
+    
+    assert response['statusCode'] == 200
+    assert stats()['by_status'] == {'pending': -6, 'done': 6}
+
+
+def test_batch_update_validates_the_request(counted_tables):
+    """Test request-level 400s for batch updates."""
+    assert batch_update([])['statusCode'] == 400
+    assert batch_update([{'id': 'a'}], atomic='yes')['statusCode'] == 400
+    assert batch_update([{'id': 'a'}, {'id': 'a', 'title': 'Again'}])['statusCode'] == 400
+    with patch('src.handlers.task_handler.BATCH_UPDATE_MAX_TASKS', 1):
+        assert batch_update([{'id': 'a'}, {'id': 'b'}])['statusCode'] == 400
+
+
+def test_atomic_batch_update_limit_is_checked_before_reading(counted_tables):
+    """Test that 100 status changes are refused up front, while 100 other updates fit."""
+    tasks, meta = counted_tables
+    tasks.seed([{'id': f't{i:03}', 'title': 'T', 'status': 'pending', 'version': 1, 'counted': True} for i in range(100)])
+    tasks.reset_calls()
+    
+    too_many = batch_update([{'id': f't{i:03}', 'status': 'done'} for i in range(100)])
+    
+    assert too_many['statusCode'] == 400
+    assert 'at most 99' in json.loads(too_many['body'])['error']
+    assert sum(tasks.calls.values()) == 0
+    assert batch_update([{'id': f't{i:03}', 'status': 'done'} for i in range(99)])['statusCode'] == 200
+    assert batch_update([{'id': f't{i:03}', 'title': 'Renamed'} for i in range(100)])['statusCode'] == 200
+    assert batch_update([{'id': f't{i:03}', 'status': 'pending'} for i in range(100)], atomic=False)['statusCode'] == 200